@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+from search.algorithms import CBS, CBSState
+from search.instances import InstanceGenerator
+from search.map import Map
+
+# Maps of the DAO benchmark of movingai.org, from small to large
+DEFAULT_MAPS = ["dao-map/den009d.map", "dao-map/lak303d.map", "dao-map/den520d.map"]
+
+def benchmark(map_names, agent_counts, num_instances, seed=0, output=None):
+    """
+    Measures how the running time of CBS grows with the size of the map and the number of agents. For each map
+    in map_names and each value in agent_counts, num_instances random instances are generated for the map and
+    solved with CBS. The size of a map is reported as its dimensions and its number of free cells.
+
+    If output is given, the solved instances of each map and agent count are written to output with the name of
+    the map and the agent count as suffix (e.g., problems.txt -> problems_den009d_4.txt), so they can be read
+    back with read_instances.
+    """
+    for name_map in map_names:
+        gridded_map = Map(name_map)
+        generator = InstanceGenerator(gridded_map, seed)
+        free_cells = int((gridded_map.data_int[:gridded_map.height, :gridded_map.width] == 0).sum())
+        print('Map: ', name_map,
+              ' Size: ', str(gridded_map.width) + 'x' + str(gridded_map.height),
+              ' Free cells: ', free_cells)
+
+        for num_agents in agent_counts:
+            instances = generator.sample(num_agents, num_instances)
+            costs = []
+            running_times = []
+            for instance in instances:
+                starts, goals = generator.to_states(instance)
+                cbs_state = CBSState(gridded_map, starts, goals)
+                start_time = time.time()
+                _, cost = CBS().search(cbs_state)
+                running_times.append(time.time() - start_time)
+                costs.append(cost)
+
+            print('Agents: ', num_agents,
+                  ' Mean time: ', round(sum(running_times) / len(running_times), 4),
+                  ' Max time: ', round(max(running_times), 4))
+
+            if output is not None:
+                name, extension = os.path.splitext(output)
+                map_stem = os.path.splitext(os.path.basename(name_map))[0]
+                generator.write(name + '_' + map_stem + '_' + str(num_agents) + extension, instances, costs)
+
+if __name__ == "__main__":
+    # Usage: python benchmark.py [instances per agent count] [seed] [map ...]
+    num_instances = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    map_names = sys.argv[3:] if len(sys.argv) > 3 else DEFAULT_MAPS
+    benchmark(map_names, [2, 4, 6, 8], num_instances, seed)
@@ -1,5 +1,6 @@
 import copy
 import heapq
+import time
 
 class State:
     """
@@ -117,12 +118,16 @@ class State:
 
 class CBSState:
         
-    def __init__(self, map, starts, goals):
+    def __init__(self, map, starts, goals, heuristic=None):
         """
         Constructor of the CBS state. Initializes cost, constraints, maps, start and goal locations, 
         number of agents, and the solution paths.
+
+        heuristic is an optional function receiving a state and a goal that replaces the Manhattan
+        distance in the low-level A* searches.
         """
         self._cost = 0
+        self._heuristic = heuristic
         self._constraints = {}
         self._map = map
         self._starts = starts
@@ -139,7 +144,7 @@ class CBSState:
         """
         Computes the cost of a CBS state. Assumes the sum of the cost of the paths as the objective function.
         """
-        astar = AStar(self._map)    # Create an AStar object with the map
+        astar = AStar(self._map, self._heuristic)    # Create an AStar object with the map
         for i in range(self._k):    # Iterate over each agent
             cost, path = astar.search(self._starts[i], self._goals[i], self._constraints[i])
             self._paths[i] = path   # Store the computed path for the current agent
@@ -179,14 +184,14 @@ class CBSState:
         if not is_solution:     # If the current state is not a solution
             agents = []
             for agent in range(self._k): 
-                if len(self._paths[agent]) < conflict_time:     # Check if the agent's path has a state at the conflict time
+                if len(self._paths[agent]) <= conflict_time:    # Check if the agent's path has a state at the conflict time
                     continue
                 else:
                     # add agent to the list of agents involved in the conflict if state at conflict time matches the conflict state
                     if self._paths[agent][conflict_time] == conflict_state:
                         agents.append(agent)
             for agent in agents:
-                c = CBSState(self._map, self._starts, self._goals)      # Create a new child state
+                c = CBSState(self._map, self._starts, self._goals, self._heuristic)      # Create a new child state
                 c._constraints = copy.deepcopy(self._constraints)
                 c.set_constraint(conflict_state, conflict_time, agent)
                 children.append(c)
@@ -221,9 +226,12 @@ class CBSState:
         self._cost = cost
 
 class CBS():
-    def search(self, start):
+    def search(self, start, deadline=None):
         """
         Performs CBS search for the problem defined in start.
+
+        If deadline (a time.time() value) is given, the search gives up and returns None, None once
+        the deadline has passed.
         """
         start.compute_cost()                # Compute the cost of the initial state
         open = []                           # Initialize the open list with the start state
@@ -231,6 +239,8 @@ class CBS():
 
         # Perform the CBS search
         while open != []:
+            if deadline is not None and time.time() > deadline:
+                return None, None
             m = heapq.heappop(open)
             solution,state = m.is_solution()
             if solution == True:            # If a solution is found, return the solution paths and cost
@@ -242,11 +252,14 @@ class CBS():
         
 class AStar():
 
-    def __init__(self, gridded_map):
+    def __init__(self, gridded_map, heuristic=None):
         """
         Constructor of A*. Creates the datastructures OPEN and CLOSED.
+
+        heuristic is an optional function receiving a state and the goal; the Manhattan distance is used by default.
         """
         self.map = gridded_map
+        self.heuristic = heuristic
         self.OPEN = []
         self.CLOSED = {}
     
@@ -254,7 +267,10 @@ class AStar():
         """
         Computes the f-value of nodes in the A* search
         """
-        state.set_cost(state.get_g() + state.get_heuristic(self.goal))
+        if self.heuristic is None:
+            state.set_cost(state.get_g() + state.get_heuristic(self.goal))
+        else:
+            state.set_cost(state.get_g() + self.heuristic(state, self.goal))
 
     def _recover_path(self, node):
         """
@@ -0,0 +1,135 @@
+from collections import deque
+import numpy as np
+from search.algorithms import State
+
+MAX_SAMPLE_CELLS = 1 << 20  # Number of cells InstanceGenerator.sample draws at once
+
+class InstanceGenerator:
+    """
+    Class to generate random MAPF instances for a map. The generator is seeded, so the same seed and map
+    always produce the same instances.
+
+    Free cells are labeled once with their 4-connected component (the same neighborhood used by Map.successors)
+    and stored sorted by label. An instance is sampled by choosing a component and drawing all the start and goal
+    cells of the instance inside that component, which guarantees that every agent can reach its goal.
+    """
+    def __init__(self, gridded_map, seed=None):
+        """
+        Constructor - requires the map from which instances are generated and optionally the seed of the
+        random number generator.
+        """
+        self._map = gridded_map
+        self._rng = np.random.default_rng(seed)
+        self._label_components()
+
+    def _label_components(self):
+        """
+        Labels the connected components of the free cells of the map. Cells are stored as flat indices
+        y * width + x, sorted by component; _offsets and _sizes give the slice of each component.
+        """
+        width = self._map.width
+        free = self._map.data_int[:self._map.height, :width] == 0
+        labels = np.full(free.shape, -1, dtype=np.int64)
+
+        num_components = 0
+        for y, x in zip(*np.nonzero(free)):
+            if labels[y, x] != -1:
+                continue
+            labels[y, x] = num_components
+            queue = deque([(y, x)])
+            while queue:
+                cy, cx = queue.popleft()
+                for ny, nx in ((cy - 1, cx), (cy + 1, cx), (cy, cx - 1), (cy, cx + 1)):
+                    if 0 <= ny < free.shape[0] and 0 <= nx < width and free[ny, nx] and labels[ny, nx] == -1:
+                        labels[ny, nx] = num_components
+                        queue.append((ny, nx))
+            num_components += 1
+
+        cells = np.flatnonzero(free)
+        cell_labels = labels.ravel()[cells]
+        order = np.argsort(cell_labels, kind='stable')
+
+        self._cells = cells[order]
+        self._sizes = np.bincount(cell_labels, minlength=num_components)
+        self._offsets = np.concatenate(([0], np.cumsum(self._sizes)[:-1]))
+
+    def num_components(self):
+        """
+        Returns the number of connected components of free cells in the map.
+        """
+        return len(self._sizes)
+
+    def sample(self, num_agents, num_instances):
+        """
+        Samples num_instances instances with num_agents agents each. Returns a NumPy array of shape
+        (num_instances, num_agents, 2, 2) where entry [i, a] holds the (x, y) pairs of the start and goal of
+        agent a in instance i. All starts and goals of an instance are distinct cells of the same component.
+
+        The cells of an instance are drawn without replacement from its component, so instances never need to
+        be rejected, even when the agents fill most of the component. When an instance takes a small part of its
+        component, the instances of the component are drawn together with array operations.
+        """
+        cells_per_instance = 2 * num_agents
+        eligible = np.flatnonzero(self._sizes >= cells_per_instance)
+        if len(eligible) == 0:
+            raise ValueError("no connected component has " + str(cells_per_instance) + " free cells")
+
+        # Components are chosen in proportion to their size, as if picking a uniformly random free cell
+        weights = self._sizes[eligible] / self._sizes[eligible].sum()
+        components = self._rng.choice(eligible, size=num_instances, p=weights)
+
+        samples = np.empty((num_instances, cells_per_instance), dtype=np.int64)
+        for component in np.unique(components):
+            instances = np.flatnonzero(components == component)
+            size = self._sizes[component]
+            if cells_per_instance ** 2 < 3 * size:
+                # Few repeated cells are expected, so the instances of the component are drawn together, in
+                # chunks of at most MAX_SAMPLE_CELLS cells
+                chunk = max(1, MAX_SAMPLE_CELLS // cells_per_instance)
+                for first in range(0, len(instances), chunk):
+                    rows = instances[first:first + chunk]
+                    positions = self._draw_distinct(size, len(rows), cells_per_instance)
+                    samples[rows] = self._cells[self._offsets[component] + positions]
+            else:
+                # Most rows would repeat a cell; numpy draws each instance without replacement instead
+                for i in instances:
+                    positions = self._rng.choice(size, size=cells_per_instance, replace=False)
+                    samples[i] = self._cells[self._offsets[component] + positions]
+
+        samples = samples.reshape(num_instances, num_agents, 2)
+        return np.stack((samples % self._map.width, samples // self._map.width), axis=-1)
+
+    def _draw_distinct(self, size, num_rows, count):
+        """
+        Draws num_rows rows of count distinct positions in range(size), each row a uniformly random ordered
+        sample. The positions are drawn with replacement and the rows that repeat a position are drawn again,
+        which takes about exp(count**2 / (2 * size)) rounds.
+        """
+        positions = self._rng.integers(0, size, (num_rows, count))
+        rows = np.arange(num_rows)
+        while True:
+            ordered = np.sort(positions[rows], axis=1)
+            rows = rows[(ordered[:, 1:] == ordered[:, :-1]).any(axis=1)]
+            if len(rows) == 0:
+                return positions
+            positions[rows] = self._rng.integers(0, size, (len(rows), count))
+
+    def to_states(self, instance):
+        """
+        Converts one sampled instance into the lists of start and goal states used by CBSState.
+        """
+        starts = [State(int(start[0]), int(start[1])) for start, _ in instance]
+        goals = [State(int(goal[0]), int(goal[1])) for _, goal in instance]
+        return starts, goals
+
+    def write(self, filename, instances, costs=None):
+        """
+        Writes instances to filename in the format read by read_instances in main.py: one instance per line
+        with the x, y values of the start and goal of each agent followed by the solution cost. Instances
+        whose cost isn't known are written with a cost of -1.
+        """
+        with open(filename, 'w') as file:
+            for i, instance in enumerate(instances):
+                values = [str(v) for v in np.asarray(instance).ravel()]
+                values.append(str(-1 if costs is None or costs[i] is None else costs[i]))
+                file.write(",".join(values) + "\n")
@@ -1,4 +1,3 @@
-import copy
 import math
 from search.algorithms import State
 import numpy as np
@@ -64,46 +63,103 @@ class Map:
                 else:
                     self.data_int[i][j] = 1        
     
-    def plot_map(self, closed_data, start, goal, filename):
+    def _plot_data(self):
+        """
+        Returns the matrix used to plot the map: non-traversable cells have the value 100 and
+        traversable cells have the value -100.
+        """
+        return np.where(self.data_int == 0, -100.0, 100.0)
+
+    def _save_plot(self, data_plot, filename):
+        """
+        Saves an image of data_plot to filename.
+        """
         import matplotlib.pyplot as plt
 
-        data_plot = copy.deepcopy(self.data_int)
-        data_plot *= 100
+        fig, ax = plt.subplots()
+        ax.axis('off')
+        ax.imshow(data_plot, cmap='Greys', interpolation='nearest')
+        fig.savefig(filename)
+        plt.close(fig)
 
-        for i in range(0, self.height):
-            for j in range(0, self.width):
-                if data_plot[i][j] == 0:
-                    data_plot[i][j] = -100
+    def plot_map(self, closed_data, start, goal, filename):
+        data_plot = self._plot_data()
 
-        for _, state in closed_data.items():
-            data_plot[state.get_y()][state.get_x()] = 1
+        states = list(closed_data.values())
+        xs = np.fromiter((state.get_x() for state in states), dtype=np.int64, count=len(states))
+        ys = np.fromiter((state.get_y() for state in states), dtype=np.int64, count=len(states))
+        data_plot[ys, xs] = 1
 
         data_plot[start.get_y()][start.get_x()] = -50
         data_plot[goal.get_y()][goal.get_x()] = -50
 
-        plt.axis('off')
-        plt.imshow(data_plot, cmap='Greys', interpolation='nearest')
-        plt.savefig(filename)
-        # plt.show()
+        self._save_plot(data_plot, filename)
 
     def plot_map_list(self, points, filename):
+        data_plot = self._plot_data()
+
+        xs = np.fromiter((state.get_x() for state in points), dtype=np.int64, count=len(points))
+        ys = np.fromiter((state.get_y() for state in points), dtype=np.int64, count=len(points))
+        data_plot[ys, xs] = 1
+
+        self._save_plot(data_plot, filename)
+
+    def path_frames(self, paths, trails=True):
+        """
+        Renders the solution paths of CBS (a dictionary mapping each agent to its list of states) as a stack
+        of frames of shape (T, height, width), one frame per time step, where T is the length of the longest path.
+        Agents that reach their goals stay there until the last frame.
+
+        Frames use the values of plot_map: the current location of each agent is -50 and, if trails is True,
+        the cells the agents visited in earlier time steps are 1.
+        """
+        paths = [path for path in paths.values() if path]
+        horizon = max(len(path) for path in paths)
+
+        # Coordinates of every agent at every time step, padded with the goal of the agent
+        xs = np.empty((len(paths), horizon), dtype=np.int64)
+        ys = np.empty((len(paths), horizon), dtype=np.int64)
+        for i, path in enumerate(paths):
+            xs[i, :len(path)] = [state.get_x() for state in path]
+            ys[i, :len(path)] = [state.get_y() for state in path]
+            xs[i, len(path):] = xs[i, len(path) - 1]
+            ys[i, len(path):] = ys[i, len(path) - 1]
+
+        frames = np.repeat(self._plot_data()[None], horizon, axis=0)
+        steps = np.arange(horizon)
+
+        if trails:
+            # Each cell is marked from the first time step it is visited by any agent until the last frame
+            first_visit = np.full(self.data_int.shape, horizon, dtype=np.int64)
+            np.minimum.at(first_visit, (ys, xs), np.broadcast_to(steps, xs.shape))
+            visited = steps[:, None, None] >= first_visit[None]
+            frames[visited] = 1
+
+        frames[np.broadcast_to(steps, xs.shape), ys, xs] = -50
+        return frames
+
+    def save_animation(self, paths, filename, interval=200, trails=True):
+        """
+        Saves an animated GIF of the solution paths of CBS to filename; interval is the duration of each
+        frame in milliseconds. Returns the stack of frames rendered by path_frames.
+        """
         import matplotlib.pyplot as plt
+        from matplotlib.animation import FuncAnimation, PillowWriter
 
-        data_plot = copy.deepcopy(self.data_int)
-        data_plot *= 100
+        frames = self.path_frames(paths, trails)
 
-        for i in range(0, self.height):
-            for j in range(0, self.width):
-                if data_plot[i][j] == 0:
-                    data_plot[i][j] = -100
+        fig, ax = plt.subplots()
+        ax.axis('off')
+        image = ax.imshow(frames[0], cmap='Greys', interpolation='nearest', vmin=-100, vmax=100)
 
-        for state in points:
-            data_plot[state.get_y()][state.get_x()] = 1
+        def update(t):
+            image.set_data(frames[t])
+            return image,
 
-        plt.axis('off')
-        plt.imshow(data_plot, cmap='Greys', interpolation='nearest')
-        plt.savefig(filename)
-        # plt.show()
+        animation = FuncAnimation(fig, update, frames=len(frames), interval=interval, blit=True)
+        animation.save(filename, writer=PillowWriter(fps=1000 / interval))
+        plt.close(fig)
+        return frames
 
     def random_state(self):
         """
@@ -129,6 +185,28 @@ class Map:
             return False
         return True
     
+    def distances_to(self, goal):
+        """
+        Returns a matrix with the length of the shortest path from every cell of the map to goal, computed
+        with a breadth-first search over the 4-connected free cells. Unreachable cells have the value inf.
+
+        The distances ignore the constraints of CBS, so they are an admissible heuristic for A*.
+        """
+        distances = np.full(self.data_int.shape, np.inf)
+        distances[goal.get_y()][goal.get_x()] = 0
+        frontier = [(goal.get_x(), goal.get_y())]
+        d = 0
+        while frontier:
+            d += 1
+            next_frontier = []
+            for x, y in frontier:
+                for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                    if self.is_valid_pair(nx, ny) and distances[ny][nx] == np.inf:
+                        distances[ny][nx] = d
+                        next_frontier.append((nx, ny))
+            frontier = next_frontier
+        return distances
+
     def cost(self, x, y):
         """
         Returns the cost of an action.
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from search.algorithms import CBS, CBSState, State
+from search.map import Map
+
+MAX_MAPS = 8                # Number of maps each worker keeps in memory
+MAX_TABLES_PER_MAP = 256    # Number of goal distance tables kept for each map
+DEFAULT_TIMEOUT = 30.0      # Seconds a request may run when it doesn't give a timeout
+
+class DistanceHeuristic:
+    """
+    Heuristic for A* that returns the exact distance to the goal on the map without constraints. The distance
+    table of each goal is computed once with a breadth-first search and kept in an LRU cache, so agents of later
+    requests with the same goal reuse it.
+    """
+    def __init__(self, gridded_map, max_tables=MAX_TABLES_PER_MAP):
+        self._map = gridded_map
+        self._max_tables = max_tables
+        self._tables = OrderedDict()
+
+    def table(self, goal):
+        """
+        Returns the distance table of goal, computing it if it isn't in the cache.
+        """
+        key = (goal.get_x(), goal.get_y())
+        if key in self._tables:
+            self._tables.move_to_end(key)
+        else:
+            self._tables[key] = self._map.distances_to(goal).tolist()
+            if len(self._tables) > self._max_tables:
+                self._tables.popitem(last=False)
+        return self._tables[key]
+
+    def __call__(self, state, goal):
+        return self.table(goal)[state.get_y()][state.get_x()]
+
+class MapCache:
+    """
+    LRU cache of maps keyed by the name of the map file. Each entry stores the parsed Map and its DistanceHeuristic.
+    """
+    def __init__(self, max_maps=MAX_MAPS):
+        self._max_maps = max_maps
+        self._entries = OrderedDict()
+
+    def get(self, name_map):
+        """
+        Returns the map and heuristic of name_map, parsing the map file if it isn't in the cache.
+        """
+        if name_map in self._entries:
+            self._entries.move_to_end(name_map)
+        else:
+            gridded_map = Map(name_map)
+            self._entries[name_map] = gridded_map, DistanceHeuristic(gridded_map)
+            if len(self._entries) > self._max_maps:
+                self._entries.popitem(last=False)
+
+        gridded_map, heuristic = self._entries[name_map]
+        # The hash of State depends on the dimensions of the map being searched
+        State.map_width = gridded_map.width
+        State.map_height = gridded_map.height
+        return gridded_map, heuristic
+
+# Cache of the worker process; each process of the pool keeps its own maps warm
+_cache = MapCache()
+
+def solve(name_map, starts, goals, deadline):
+    """
+    Solves one MAPF instance with CBS in a worker process. starts and goals are lists of [x, y] pairs, and
+    deadline is the time.time() value at which the request times out.
+
+    Returns a dictionary with the cost and the paths of the agents as lists of [x, y] pairs, or with the error
+    'timeout' if the deadline passed before a solution was found; a request that waited in the queue past its
+    deadline isn't searched. The cost and the paths are None if the instance has no solution.
+    """
+    if time.time() > deadline:
+        return {'error': 'timeout'}
+    gridded_map, heuristic = _cache.get(name_map)
+    cbs_state = CBSState(gridded_map,
+                         [State(x, y) for x, y in starts],
+                         [State(x, y) for x, y in goals],
+                         heuristic)
+    paths, cost = CBS().search(cbs_state, deadline)
+    if paths is None:
+        if time.time() > deadline:
+            return {'error': 'timeout'}
+        return {'cost': None, 'paths': None}
+    return {'cost': cost,
+            'paths': [[[s.get_x(), s.get_y()] for s in paths[agent]] for agent in sorted(paths)]}
+
+class SolverService:
+    """
+    Serves CBS solve requests written as JSON, one request per line:
+
+    {"id": 1, "map": "dao-map/den009d.map", "starts": [[7, 8], [36, 28]], "goals": [[37, 6], [18, 7]], "timeout": 5}
+
+    Requests are solved concurrently in a process pool and each response is written as soon as it is ready,
+    so responses may arrive in a different order than the requests. A response echoes the id of its request:
+
+    {"id": 1, "cost": 150, "paths": [[[7, 8], ...], [[36, 28], ...]]}
+
+    Failures are reported with an "error" field instead of cost and paths; a request that isn't solved within
+    its timeout, counted from its arrival, gets {"id": 1, "error": "timeout"}.
+    """
+    def __init__(self, max_workers=None):
+        self._executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    async def handle_request(self, line, write):
+        """
+        Solves the request encoded in line and writes the response with the function write.
+        """
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            timeout = float(request.get('timeout', DEFAULT_TIMEOUT))
+            # The deadline is fixed at submission, so the time a request waits for a free worker counts
+            deadline = time.time() + timeout
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._executor, solve,
+                                          request['map'], request['starts'], request['goals'], deadline)
+            # CBS stops by itself at the deadline; the extra second covers the pickling and map parsing. A request
+            # still queued when wait_for gives up is cancelled
+            response = await asyncio.wait_for(future, max(deadline - time.time(), 0) + 1.0)
+        except asyncio.TimeoutError:
+            response = {'error': 'timeout'}
+        except Exception as e:
+            response = {'error': str(e)}
+        response['id'] = request_id
+        await write(json.dumps(response) + '\n')
+
+    async def serve_stream(self, reader, write):
+        """
+        Reads requests from reader until the end of the stream and solves them concurrently.
+        """
+        tasks = set()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.strip():
+                task = asyncio.create_task(self.handle_request(line, write))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+
+    async def serve_stdio(self):
+        """
+        Serves requests read from stdin and writes the responses to stdout.
+        """
+        loop = asyncio.get_running_loop()
+
+        class StdinReader:
+            # stdin may be a regular file, which can't be registered with the event loop
+            async def readline(self):
+                return await loop.run_in_executor(None, sys.stdin.readline)
+
+        async def write(data):
+            sys.stdout.write(data)
+            sys.stdout.flush()
+
+        await self.serve_stream(StdinReader(), write)
+
+    async def serve_unix(self, path):
+        """
+        Serves requests received on the Unix socket path; each connection is served independently.
+        """
+        async def client(reader, writer):
+            async def write(data):
+                writer.write(data.encode())
+                await writer.drain()
+
+            await self.serve_stream(reader, write)
+            writer.close()
+
+        server = await asyncio.start_unix_server(client, path)
+        async with server:
+            await server.serve_forever()
+
+    def shutdown(self):
+        self._executor.shutdown(cancel_futures=True)
+
+if __name__ == "__main__":
+    # Usage: python service.py                 (requests on stdin, responses on stdout)
+    #        python service.py --socket <path> (requests on a Unix socket)
+    service = SolverService()
+    try:
+        if len(sys.argv) > 2 and sys.argv[1] == '--socket':
+            asyncio.run(service.serve_unix(sys.argv[2]))
+        else:
+            asyncio.run(service.serve_stdio())
+    finally:
+        service.shutdown()
@@ -0,0 +1,48 @@
+import tempfile
+import unittest
+from search.algorithms import CBS, CBSState, State
+from search.map import Map
+from testinstances import write_map
+
+def path(cells):
+	"""Returns the path visiting the (x, y) cells in order, one per time step."""
+	states = []
+	for g, (x, y) in enumerate(cells):
+		state = State(x, y)
+		state.set_g(g)
+		states.append(state)
+	return states
+
+class TestCBS(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.map = Map(write_map(self.directory.name, ['.....', '.....', '.....']))
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def test_successors_short_path(self):
+		# Agents 0 and 1 meet at [2, 0] at time 2, when the path of agent 2 has just ended
+		starts = [State(0, 0), State(4, 0), State(0, 2)]
+		goals = [State(3, 0), State(1, 0), State(1, 2)]
+		node = CBSState(self.map, starts, goals)
+		node._paths = {0: path([(0, 0), (1, 0), (2, 0), (3, 0)]),
+		               1: path([(4, 0), (3, 0), (2, 0), (1, 0)]),
+		               2: path([(0, 2), (1, 2)])}
+		children = node.successors()
+		self.assertEqual(len(children), 2)
+		self.assertEqual(children[0]._constraints[0], {(2, 0): {2}})
+		self.assertEqual(children[1]._constraints[1], {(2, 0): {2}})
+
+	def test_search(self):
+		starts = [State(0, 0), State(4, 0), State(0, 2)]
+		goals = [State(3, 0), State(1, 0), State(1, 2)]
+		paths, cost = CBS().search(CBSState(self.map, starts, goals))
+		for agent in range(3):
+			self.assertEqual((paths[agent][-1].get_x(), paths[agent][-1].get_y()), (goals[agent].get_x(), goals[agent].get_y()))
+		self.assertEqual(cost, sum(len(paths[agent]) - 1 for agent in range(3)))
+
+
+if __name__ == '__main__':
+    unittest.main()
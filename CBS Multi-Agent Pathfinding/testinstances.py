@@ -0,0 +1,81 @@
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+from search.instances import InstanceGenerator
+from search.map import Map
+
+def write_map(directory, rows, name='test.map'):
+	"""Writes the map given as a list of rows of '.' and '@' in the movingai.org format and returns its path."""
+	path = os.path.join(directory, name)
+	with open(path, 'w') as file:
+		file.write('type octile\nheight %d\nwidth %d\nmap\n' % (len(rows), len(rows[0])))
+		file.write('\n'.join(rows) + '\n')
+	return path
+
+class TestInstanceGenerator(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def check_instances(self, gridded_map, instances, components):
+		for instance in instances:
+			cells = [(int(x), int(y)) for agent in instance for x, y in agent]
+			self.assertEqual(len(set(cells)), len(cells))
+			for x, y in cells:
+				self.assertEqual(gridded_map.data_int[y][x], 0)
+			self.assertTrue(any(set(cells) <= component for component in components))
+
+	def test_components(self):
+		# Two rooms separated by a wall
+		rows = ['...@...', '...@...', '...@...']
+		gridded_map = Map(write_map(self.directory.name, rows))
+		generator = InstanceGenerator(gridded_map, seed=0)
+		self.assertEqual(generator.num_components(), 2)
+		left = {(x, y) for y in range(3) for x in range(3)}
+		right = {(x, y) for y in range(3) for x in range(4, 7)}
+		instances = generator.sample(4, 50)
+		self.assertEqual(instances.shape, (50, 4, 2, 2))
+		self.check_instances(gridded_map, instances, [left, right])
+		with self.assertRaises(ValueError):
+			generator.sample(5, 1)
+
+	def test_seeded(self):
+		gridded_map = Map(write_map(self.directory.name, ['.' * 10] * 10))
+		first = InstanceGenerator(gridded_map, seed=3).sample(5, 10)
+		second = InstanceGenerator(gridded_map, seed=3).sample(5, 10)
+		self.assertTrue(np.array_equal(first, second))
+
+	def test_fills_map(self):
+		# 100 agents take 200 of the 1444 free cells of an open map, and 722 agents take all of them
+		rows = ['@' * 40] + ['@' + '.' * 38 + '@' for _ in range(38)] + ['@' * 40]
+		gridded_map = Map(write_map(self.directory.name, rows))
+		generator = InstanceGenerator(gridded_map, seed=0)
+		free = {(x, y) for y in range(1, 39) for x in range(1, 39)}
+		start = time.perf_counter()
+		self.check_instances(gridded_map, generator.sample(100, 5), [free])
+		full = generator.sample(722, 2)
+		self.assertLess(time.perf_counter() - start, 5)
+		self.check_instances(gridded_map, full, [free])
+
+
+	def test_uniform(self):
+		# In a room of 30 cells, instances of one agent are drawn together and instances of 15 agents one at a
+		# time; in both cases each start and goal of each agent is any cell with the same frequency
+		gridded_map = Map(write_map(self.directory.name, ['.' * 6] * 5))
+		generator = InstanceGenerator(gridded_map, seed=0)
+		for num_agents in [1, 15]:
+			instances = generator.sample(num_agents, 30000)
+			cells = instances[..., 1] * 6 + instances[..., 0]
+			for agent in range(num_agents):
+				for end in range(2):
+					counts = np.bincount(cells[:, agent, end], minlength=30)
+					self.assertTrue(np.all(np.abs(counts - 1000) < 150))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from PIL import Image
+from search.map import Map
+from testalgorithms import path
+from testinstances import write_map
+
+class TestPathFrames(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.map = Map(write_map(self.directory.name, ['.....', '.@@..', '.....']))
+		# Agent 1 reaches its goal two steps before agent 0
+		self.paths = {0: path([(0, 0), (1, 0), (2, 0), (3, 0), (4, 0), (4, 1)]),
+		              1: path([(0, 2), (1, 2), (2, 2), (3, 2)])}
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def check_agents(self, frames):
+		for agent_path in self.paths.values():
+			for t in range(len(frames)):
+				state = agent_path[min(t, len(agent_path) - 1)]
+				self.assertEqual(frames[t, state.get_y(), state.get_x()], -50)
+		# Two agents in every frame and nothing else marked as an agent
+		self.assertTrue(np.all((frames == -50).sum(axis=(1, 2)) == 2))
+
+	def test_shape(self):
+		frames = self.map.path_frames(self.paths)
+		self.assertEqual(frames.shape, (6, 3, 5))
+		self.assertTrue(np.all(frames[:, 1, 1:3] == 100))
+
+	def test_agents(self):
+		frames = self.map.path_frames(self.paths)
+		self.check_agents(frames)
+		# Agent 1 stays on its goal after its path ends
+		self.assertTrue(np.all(frames[3:, 2, 3] == -50))
+
+	def test_trails(self):
+		frames = self.map.path_frames(self.paths)
+		self.assertEqual(frames[0, 0, 1], -100)
+		self.assertTrue(np.all(frames[2:, 0, 0] == 1))
+		self.assertTrue(np.all(frames[5, 0, :] == [1, 1, 1, 1, 1]))
+		self.assertEqual(frames[5, 2, 4], -100)
+		plain = self.map.path_frames(self.paths, trails=False)
+		self.check_agents(plain)
+		self.assertFalse(np.any(plain == 1))
+		self.assertTrue(np.all(np.isin(plain, [-100, -50, 100])))
+
+	def test_save_animation(self):
+		filename = os.path.join(self.directory.name, 'paths.gif')
+		frames = self.map.save_animation(self.paths, filename, interval=100)
+		self.assertTrue(np.array_equal(frames, self.map.path_frames(self.paths)))
+		with Image.open(filename) as image:
+			self.assertEqual(image.format, 'GIF')
+			self.assertEqual(image.n_frames, len(frames))
+
+
+if __name__ == '__main__':
+    unittest.main()
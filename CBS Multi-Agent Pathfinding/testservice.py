@@ -0,0 +1,63 @@
+import asyncio
+import json
+import tempfile
+import time
+import unittest
+from service import SolverService, solve
+from testinstances import write_map
+
+class TestSolverService(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		cls.service = SolverService(max_workers=1)
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.service.shutdown()
+
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.map = write_map(self.directory.name, ['.....', '.....', '.....'])
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def request(self, **request):
+		"""Sends one request to the service and returns its decoded response."""
+		responses = []
+		async def write(data):
+			responses.append(data)
+
+		asyncio.run(self.service.handle_request(json.dumps(request), write))
+		self.assertEqual(len(responses), 1)
+		self.assertTrue(responses[0].endswith('\n'))
+		return json.loads(responses[0])
+
+	def test_solved(self):
+		# The agents swap the ends of the top row, so one of them has to step aside
+		response = self.request(id=1, map=self.map, starts=[[0, 0], [4, 0]], goals=[[4, 0], [0, 0]], timeout=10)
+		self.assertEqual(response['id'], 1)
+		self.assertNotIn('error', response)
+		self.assertEqual(len(response['paths']), 2)
+		self.assertEqual(response['paths'][0][0], [0, 0])
+		self.assertEqual(response['paths'][0][-1], [4, 0])
+		self.assertEqual(response['paths'][1][0], [4, 0])
+		self.assertEqual(response['paths'][1][-1], [0, 0])
+		self.assertEqual(response['cost'], len(response['paths'][0]) + len(response['paths'][1]) - 2)
+
+	def test_missing_map(self):
+		response = self.request(id=2, map=self.directory.name + '/missing.map', starts=[[0, 0]], goals=[[1, 0]])
+		self.assertEqual(response['id'], 2)
+		self.assertIn('error', response)
+		self.assertNotIn('paths', response)
+
+	def test_timeout(self):
+		response = self.request(id=3, map=self.map, starts=[[0, 0]], goals=[[4, 2]], timeout=0)
+		self.assertEqual(response, {'error': 'timeout', 'id': 3})
+		# A request that reaches its worker after the deadline isn't searched
+		self.assertEqual(solve(self.map, [[0, 0]], [[4, 2]], time.time() - 1), {'error': 'timeout'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,231 @@
+import time
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+from math import inf
+
+def opponent(current_player):
+    if current_player == "X":
+        return "O"
+    else:
+        return "X"
+
+class SearchTimeout(Exception):
+    """Raised by alpha_beta when the deadline of the search has passed or the search is stopped."""
+    pass
+
+def alpha_beta(board, player, alpha, beta, ply, table=None, ordering=None, deadline=None, tablebase=None, stats=None,
+               threats=False, stop=None):
+    """
+    Function receives an instances of the Board class, the player who is to act at this state (either X or O),
+    the value of alpha, beta, and the maximum search depth given by the variable ply.
+
+    table is an optional TranspositionTable. Positions and their mirror images share one entry; stored
+    values cut off the search when their bounds allow it, and stored best moves are searched first.
+
+    ordering is an optional MoveOrdering that decides the order in which moves are searched; by default moves
+    are searched from left to right.
+
+    deadline is an optional time.perf_counter() value; the search raises SearchTimeout once it has passed,
+    leaving the moves of the interrupted branch on the board. stop is an optional threading.Event that interrupts
+    the search in the same way once it is set.
+
+    tablebase is an optional Tablebase; positions found in it return their exact value and a move that keeps it
+    without searching, so searches stop as soon as the number of empty cells drops to its threshold.
+
+    stats is an optional SearchStats that records the nodes, leaves, cutoffs and table probes of the search.
+
+    With threats, the immediate threats of both players (Board.threats) decide the position before any move is
+    searched: a player who can win at once wins, a player facing two threats of the opponent loses, a single
+    threat must be blocked, and moves that let the opponent win at once are skipped (or lose, if all moves do).
+    These positions are decided exactly even at the last ply, where the search alone would only evaluate them.
+
+    The function returns three values:
+    1. the score of the optimal move for the player who is to act;
+    2. the optimal move
+    3. the total number of nodes expanded to find the optimal move
+    """
+
+    if stats is not None:
+        stats.visit(ply)
+    if board.is_terminal():
+        # If the current state is terminal, return the game value and no move
+        if stats is not None:
+            stats.leaf(ply)
+        game_value = board.game_value()
+        return game_value, None, 0
+    if tablebase is not None:
+        entry = tablebase.probe(board, player)
+        if entry is not None:
+            # The position was solved when building the tablebase
+            return entry[0], entry[1], 0
+    if ply == 0:
+        # If maximum search depth is reached, return the heuristic value of the position
+        if stats is not None:
+            stats.leaf(ply)
+        return board.evaluate(), 0, 0
+    if (deadline is not None and time.perf_counter() > deadline) or (stop is not None and stop.is_set()):
+        raise SearchTimeout()
+
+    moves = board.available_moves()
+    if ordering is not None:
+        moves = ordering.order_moves(board, player, moves, ply)
+    if threats:
+        wins, blocks, unsafe = board.threats(player)
+        sign = 1 if player == 'X' else -1
+        if wins:
+            # Winning at once is the best possible move
+            if stats is not None:
+                stats.leaf(ply)
+            return sign, board.columns(wins)[0], 1
+        if blocks:
+            blocks = board.columns(blocks)
+            if len(blocks) > 1:
+                # Two threats of the opponent can't both be blocked
+                if stats is not None:
+                    stats.leaf(ply)
+                return -sign, blocks[0], 1
+            moves = blocks
+        else:
+            unsafe = board.columns(unsafe)
+            safe = [move for move in moves if move not in unsafe]
+            if not safe:
+                # Every move lets the opponent win at once
+                if stats is not None:
+                    stats.leaf(ply)
+                return -sign, moves[0], 1
+            moves = safe
+    if table is not None:
+        key, mirrored = board.symmetric_key()
+        key = 2*key + (player == 'O')                                       # The same checkers with a different player to act are a different position
+        alpha_orig, beta_orig = alpha, beta
+        entry = table.probe(key)
+        if stats is not None:
+            stats.probe(entry is not None)
+        if entry is not None:
+            depth, value, flag, move = entry
+            if move is not None and mirrored:
+                move = board.width-1-move
+            if depth >= ply:
+                # The stored search was at least as deep as this one
+                if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                    return value, move, 0
+            if move in moves:
+                # Search the best move of the stored search first
+                moves.remove(move)
+                moves.insert(0, move)
+
+    if player == 'X':
+        # If the current player is X, initialize v as negative infinity
+        v = -inf
+    else:
+        # If the current player is O, initialize v as positive infinity
+        v = inf
+
+    best_move = None        # Initialize the best move as None
+    total_nodes = 1         # Start with 1 node already expanded for the current state
+    if stats is not None:
+        stats.node(ply)
+
+    for move in moves:
+        board.perform_move(move, player)                                            # Make the move on the board
+        result = alpha_beta(board, opponent(player), alpha, beta, ply - 1, table, ordering, deadline, tablebase, stats, threats, stop)  # Call minimax with opponent player
+        board.undo_move(move)                                                       # Undo the move to backtrack
+        score = result[0]                                                           # Extract score and nodes_expanded
+        nodes_expanded = result[2]
+        total_nodes += nodes_expanded                                               # Increment total nodes expanded
+
+        if player == 'X':
+            # If current player is X (maximizing player)
+            if v < score:
+                # Update v and the best move accordingly
+                v = score
+                best_move = move
+            if v >= beta:
+                # Prune if v is greater than or equal to beta
+                if ordering is not None:
+                    ordering.cutoff(board, player, move, ply)
+                if stats is not None:
+                    stats.cutoff(ply, moves.index(move))
+                break
+            alpha = max(alpha, v)       # Update alpha
+        else:
+            # If current player is O (minimizing player)
+            if v > score:
+                # Update v and the best move accordingly
+                v = score
+                best_move = move
+            if v <= alpha:
+                # Prune if v is less than or equal to alpha
+                if ordering is not None:
+                    ordering.cutoff(board, player, move, ply)
+                if stats is not None:
+                    stats.cutoff(ply, moves.index(move))
+                break
+            beta = min(beta, v)         # Update beta
+
+    if table is not None:
+        # Values outside the original window are only bounds on the value of the position
+        if v <= alpha_orig:
+            flag = UPPER
+        elif v >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        stored_move = best_move
+        if stored_move is not None and mirrored:
+            stored_move = board.width-1-stored_move
+        table.store(key, ply, v, flag, stored_move)
+
+    return v, best_move, total_nodes            # Return the optimal score, move, and total nodes expanded
+
+def iterative_deepening(board, player, time_limit, max_ply=None, table=None, ordering=None, book=None, tablebase=None, stats=None,
+                        threats=False, stop=None):
+    """
+    Runs alpha_beta with increasing depths until time_limit seconds have passed (there is no time limit if it is
+    None), the event stop is set, the depth reaches max_ply, or the result of a search is a proven win or loss.
+
+    Every iteration reuses the transposition table of the previous ones (a new table is created if table is None),
+    so the best moves found at lower depths, including the principal variation, are searched first. An
+    iteration that is interrupted by the deadline or by stop is discarded; the board is left unchanged.
+
+    book is an optional OpeningBook; positions found in the book are answered from it without searching.
+    tablebase is an optional Tablebase, consulted by alpha_beta at every node.
+    stats is an optional SearchStats; it records the searches and the nodes and seconds of each completed iteration.
+    threats is passed to alpha_beta.
+
+    The function returns three values:
+    1. the score of the deepest completed iteration;
+    2. the best move of the deepest completed iteration (the first available move if none completed);
+    3. the list with the number of nodes expanded by each completed iteration
+    """
+    if book is not None:
+        entry = book.lookup(board)
+        if entry is not None:
+            return entry[0], entry[1], []
+
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    if table is None:
+        table = TranspositionTable()
+    max_depth = board.width*board.height - board.num_moves      # Deeper searches can't reach new positions
+    if max_ply is not None:
+        max_depth = min(max_depth, max_ply)
+
+    moves = board.available_moves()
+    best_score, best_move = 0, (moves[0] if moves else None)
+    nodes_per_depth = []
+
+    for ply in range(1, max_depth + 1):
+        search_board = board.copy()     # An interrupted search leaves its moves on the board it searches
+        start = time.perf_counter()
+        try:
+            score, move, nodes = alpha_beta(search_board, player, -inf, inf, ply, table, ordering, deadline, tablebase, stats, threats, stop)
+        except SearchTimeout:
+            break
+        best_score, best_move = score, move
+        nodes_per_depth.append(nodes)
+        if stats is not None:
+            stats.iteration(ply, nodes, time.perf_counter() - start)
+        if abs(score) == 1:
+            # A win or a loss found at this depth doesn't change in deeper searches
+            break
+
+    return best_score, best_move, nodes_per_depth
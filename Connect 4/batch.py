@@ -0,0 +1,147 @@
+import sys
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from alphabeta import alpha_beta
+from connect4 import Board
+from math import inf
+
+def encode(moveStrings, width=7, height=6):
+    """
+    Encodes the positions reached by the move strings (as in Board.create_board) into NumPy arrays.
+
+    The function returns three arrays:
+    1. the boards, of shape (n, height, width), with rows from the bottom up and 1 for 'X', -1 for 'O' and 0 for
+       an empty cell;
+    2. the player who is to act in each position, 1 for 'X' and -1 for 'O';
+    3. the player who dropped the last checker, 1, -1 or 0 if no checker was dropped.
+
+    As in create_board, moves outside the board and moves into a full column are skipped but still pass the turn.
+    """
+    n = len(moveStrings)
+    boards = np.zeros((n, height, width), dtype=np.int8)
+    players = np.ones(n, dtype=np.int8)
+    last = np.zeros(n, dtype=np.int8)
+    for i, moves in enumerate(moveStrings):
+        heights = [0]*width
+        player = 1
+        for colDigit in moves:
+            col = int(colDigit)
+            if 0 <= col < width and heights[col] < height:
+                boards[i, heights[col], col] = player
+                heights[col] += 1
+                last[i] = player
+            player = -player
+        players[i] = player
+    return boards, players, last
+
+def lines(boards, k=4):
+    """
+    Returns, for each board of the batch, whether 'X' and whether 'O' have k checkers in a row. Every window of k
+    cells in each of the four directions is summed at once over the whole batch, as a convolution with a line of
+    ones would; a window belongs to a player when its sum is k times the value of the player's checkers.
+    """
+    n, height, width = boards.shape
+    b = boards.astype(np.int16)
+    windows = []
+    if width >= k:
+        windows.append(sum(b[:, :, i:width-k+1+i] for i in range(k)))
+    if height >= k:
+        windows.append(sum(b[:, i:height-k+1+i, :] for i in range(k)))
+    if width >= k and height >= k:
+        windows.append(sum(b[:, i:height-k+1+i, i:width-k+1+i] for i in range(k)))
+        windows.append(sum(b[:, k-1-i:height-i, i:width-k+1+i] for i in range(k)))
+    x_wins = np.zeros(n, dtype=bool)
+    o_wins = np.zeros(n, dtype=bool)
+    for w in windows:
+        w = w.reshape(n, -1)
+        x_wins |= (w == k).any(axis=1)
+        o_wins |= (w == -k).any(axis=1)
+    return x_wins, o_wins
+
+def terminal_values(boards, last, k=4):
+    """
+    Finds the finished games of a batch encoded by encode. A game is won when the player who dropped the last
+    checker has k in a row; as with Board, the move strings are expected to stop when the game ends.
+
+    Returns a boolean array telling which positions are terminal and an array with their game values (1 if 'X'
+    won, -1 if 'O' won and 0 for a draw or a position that isn't terminal).
+    """
+    x_wins, o_wins = lines(boards, k)
+    won = (x_wins & (last == 1)) | (o_wins & (last == -1))
+    full = (boards != 0).all(axis=(1, 2))
+    values = np.where(won, last, 0).astype(np.int8)
+    return won | full, values
+
+def _search(args):
+    """Searches one position of the batch in a worker process and returns its score and best move."""
+    moves, ply, width, height, k = args
+    board = Board(width, height, k)
+    player = board.create_board(moves)
+    score, move, _ = alpha_beta(board, player, -inf, inf, ply)
+    return score, move
+
+def evaluate_batch(moveStrings, ply, executor=None, width=7, height=6, k=4, chunksize=16):
+    """
+    Scores a batch of positions given as move strings (as in Board.create_board) with alpha_beta to the depth ply,
+    on boards of the given size where k checkers in a row win.
+
+    Finished games are found for the whole batch at once with terminal_values; the other positions are searched
+    by the processes of executor (a ProcessPoolExecutor is created for the call if executor is None), chunksize
+    positions at a time.
+
+    Returns a list with the score (from the point of view of 'X') and the best move of every position, in the
+    order of moveStrings; finished games get their game value and no move.
+    """
+    boards, players, last = encode(moveStrings, width, height)
+    terminal, values = terminal_values(boards, last, k)
+    results = [(int(values[i]), None) if terminal[i] else None for i in range(len(moveStrings))]
+    pending = [i for i in range(len(moveStrings)) if not terminal[i]]
+    tasks = [(moveStrings[i], ply, width, height, k) for i in pending]
+
+    if executor is None:
+        with ProcessPoolExecutor() as pool:
+            searched = list(pool.map(_search, tasks, chunksize=chunksize))
+    else:
+        searched = list(executor.map(_search, tasks, chunksize=chunksize))
+    for i, result in zip(pending, searched):
+        results[i] = result
+    return results
+
+def random_games(count, max_moves, seed=0, width=7, height=6):
+    """Returns count move strings of random games with at most max_moves moves that stop when the game ends."""
+    rng = np.random.default_rng(seed)
+    games = []
+    for _ in range(count):
+        board = Board(width, height)
+        player = 'X'
+        moves = ''
+        for _ in range(rng.integers(max_moves+1)):
+            if board.is_terminal():
+                break
+            col = int(rng.choice(board.available_moves()))
+            board.perform_move(col, player)
+            moves += str(col)
+            player = 'O' if player == 'X' else 'X'
+        games.append(moves)
+    return games
+
+if __name__ == "__main__":
+    # Usage: python batch.py [number of positions] [search depth] [processes]
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    ply = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    games = random_games(count, 42)
+
+    start = time.perf_counter()
+    for moves in games:
+        b = Board()
+        player = b.create_board(moves)
+        alpha_beta(b, player, -inf, inf, ply)
+    serial = time.perf_counter() - start
+
+    with ProcessPoolExecutor(processes) as executor:
+        start = time.perf_counter()
+        evaluate_batch(games, ply, executor)
+        batch = time.perf_counter() - start
+    print(count, 'positions at depth', ply, 'serial', round(serial, 3), 'batch', round(batch, 3))
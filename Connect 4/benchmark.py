@@ -0,0 +1,63 @@
+import random
+import sys
+import time
+from alphabeta import alpha_beta, opponent
+from connect4 import Board
+from math import inf
+
+# Board sizes of the benchmark as (width, height, k), from standard Connect 4 to Gomoku-like boards
+SIZES = [(7, 6, 4), (8, 7, 4), (9, 7, 4), (10, 10, 5), (12, 12, 5), (15, 15, 5)]
+
+def random_openings(width, height, k, count, num_moves, seed=0):
+    """Returns count boards, with the player to act, reached by num_moves random moves that don't end the game."""
+    rng = random.Random(seed)
+    openings = []
+    while len(openings) < count:
+        board = Board(width, height, k)
+        player = 'X'
+        for _ in range(num_moves):
+            board.perform_move(rng.choice(board.available_moves()), player)
+            player = opponent(player)
+            if board.is_terminal():
+                break
+        else:
+            openings.append((board, player))
+    return openings
+
+def benchmark(width, height, k, ply, count=4, seed=0):
+    """
+    Searches count random openings of the board with alpha_beta to the depth ply and times the win checks and
+    the evaluation on the same positions. Returns the nodes searched per second and the win checks and
+    evaluations per second.
+    """
+    openings = random_openings(width, height, k, count, 4, seed)
+    nodes = 0
+    start = time.perf_counter()
+    for board, player in openings:
+        nodes += alpha_beta(board, player, -inf, inf, ply)[2]
+    search = nodes/(time.perf_counter() - start)
+
+    checks = 0
+    start = time.perf_counter()
+    for board, player in openings:
+        for col in board.available_moves():
+            board.perform_move(col, player)
+            board.has_winner()
+            board.undo_move(col)
+            checks += 1
+    wins = checks/(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(100):
+        for board, player in openings:
+            board.evaluate()
+    evaluations = 100*len(openings)/(time.perf_counter() - start)
+    return search, wins, evaluations
+
+if __name__ == "__main__":
+    # Usage: python benchmark.py [search depth]
+    ply = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    print('size      k  nodes/s  win checks/s  evaluations/s')
+    for width, height, k in SIZES:
+        search, wins, evaluations = benchmark(width, height, k, ply)
+        print(f'{width:>2}x{height:<2}    {k}  {search:7.0f}  {wins:12.0f}  {evaluations:13.0f}')
@@ -4,27 +4,116 @@
 
 from math import inf 
 
+# Weights of the features used by Board.evaluate
+TWO_WEIGHT = 1          # Lines of k cells with k-2 checkers of the player and two empty cells
+THREE_WEIGHT = 4        # Lines of k cells with k-1 checkers of the player and one empty cell
+CENTER_WEIGHT = 3       # Checkers in the center column(s)
+THREAT_WEIGHT = 4       # Empty cells that complete a line of k for the player
+PARITY_WEIGHT = 8       # Extra weight of threats on rows of the right parity for the player
+EVAL_SCALE = 100        # Evaluations are scaled into (-1, 1) as score/(|score|+EVAL_SCALE)
+
+# Bitboard masks shared by all the boards of the same size
+_geometries = {}
+
+def _geometry(width, height, k):
+    """
+    Returns the bitboard masks of a board of the given size and line length k, computing them the first time
+    they are used: the bottom cell of every column, all the cells of the board, the cells of a single column,
+    the start cells of the lines of k in each direction, the center column(s), the odd rows (counted from 1 at
+    the bottom), and for every cell the masks of the lines of k through it.
+    """
+    if (width, height, k) not in _geometries:
+        size = height+1
+        bottom = sum(1 << (col*size) for col in range(width))
+        full = bottom*((1 << height)-1)
+        shifts = (1, size, height, height+2)
+        # A line starts at a cell if its k cells are on the board
+        lines = []
+        for s in shifts:
+            starts = full
+            for i in range(1, k):
+                starts &= full >> i*s
+            lines.append(starts)
+        cell_lines = [[] for _ in range(width*size)]
+        for s, starts in zip(shifts, lines):
+            line = sum(1 << i*s for i in range(k))
+            for cell in range(width*size):
+                if starts >> cell & 1:
+                    for i in range(k):
+                        cell_lines[cell + i*s].append(line << cell)
+        center = 0
+        for col in {(width-1)//2, width//2}:
+            center |= ((1 << height)-1) << (col*size)
+        odd_rows = bottom*sum(1 << row for row in range(0, height, 2))
+        _geometries[(width, height, k)] = (bottom, full, (1 << size)-1, shifts, tuple(lines), center, odd_rows,
+                                           tuple(tuple(cell) for cell in cell_lines))
+    return _geometries[(width, height, k)]
+
 class Board:
-    def __init__(self, width=7, height=6):
-        """Initialize a Connect 4 Board with a specific width and height"""
+    """
+    Connect 4 board stored as two bitboards, one for the checkers of each player. k is the number of checkers
+    in a row that wins the game; Connect 4 is k = 4, but any m×n board with any k is supported.
+
+    Each column uses height+1 bits: bit col*(height+1)+r is set when the cell r rows above the bottom of column
+    col holds a checker of the player. The extra bit on top of each column is always empty, so shifting a
+    bitboard never carries a line from one column into the next. Python integers have arbitrary precision,
+    so any width and height are supported.
+    """
+    def __init__(self, width=7, height=6, k=4):
+        """Initialize a Connect 4 Board with a specific width, height and number of checkers in a row to win"""
         self.width = width
         self.height = height
-        self.board = [self.width*[' '] for i in range(self.height)] 
+        self.k = k
+        self.x_mask = 0                     # Bitboard with the checkers of 'X'
+        self.o_mask = 0                     # Bitboard with the checkers of 'O'
+        self.heights = [0]*self.width       # Number of checkers in each column
+        self.num_moves = 0
+        # _shifts move a bitboard one cell vertically, horizontally, and along the two diagonals
+        # _cell_lines holds, for the bit of each cell, the masks of the lines of k cells through it
+        (self._bottom, self._full, self._column, self._shifts,
+         self._lines, self._center, self._odd_rows, self._cell_lines) = _geometry(width, height, k)
         self.lastRow = None 
         self.lastCol = None 
         self.lastPlayer = None
 
+    @property
+    def board(self):
+        """Returns the board as a list of rows, from top to bottom, of ' ', 'X' and 'O' strings."""
+        rows = []
+        for row in range(self.height):
+            r = self.height-1-row   # Rows are indexed from the top; bits from the bottom
+            line = []
+            for col in range(self.width):
+                bit = 1 << (col*(self.height+1)+r)
+                if self.x_mask & bit:
+                    line.append('X')
+                elif self.o_mask & bit:
+                    line.append('O')
+                else:
+                    line.append(' ')
+            rows.append(line)
+        return rows
+
+    def copy(self):
+        """Returns a copy of the board."""
+        copy_board = Board(self.width, self.height, self.k)
+        copy_board.x_mask = self.x_mask
+        copy_board.o_mask = self.o_mask
+        copy_board.heights = self.heights.copy()
+        copy_board.num_moves = self.num_moves
+        copy_board.lastRow = self.lastRow
+        copy_board.lastCol = self.lastCol
+        copy_board.lastPlayer = self.lastPlayer
+        return copy_board
+
     def __repr__(self):
         """Prints a representation of the Connect4 Board."""
         # Start with the empty string 
         board_str = "" 
 
-        for row in range(self.height):
+        for line in self.board:
             # Initialize each row with a | 
-            board_str += "|" 
-            for col in range(self.width):
-                board_str += self.board[row][col]+"|"
-            board_str += "\n" 
+            board_str += "|" + "|".join(line) + "|\n"
         # Line of dashes 
         board_str += "-"*(self.width*2+1)+"\n" 
         for col in range(self.width):
@@ -35,11 +124,8 @@ class Board:
 
     def available_moves(self): 
         """Inputs a board and returns an array with all the allowable moves with indexes"""
-        allowableMoves = []
-        for col in range(self.width):
-            if self.allows_move(col):
-                allowableMoves.append(col)
-        return allowableMoves
+        height = self.height
+        return [col for col, h in enumerate(self.heights) if h < height]
     
     def allows_move(self, col):
         """Input a column and returns True if one can place a piece
@@ -47,24 +133,26 @@ class Board:
         # If the column isn't within the allowed range return False 
         if col not in range(self.width): 
             return False
-        else:
-            # Check to see if the top column is empty or not 
-            if self.board[0][col]==' ':  
-                return True
-            else:
-                return False 
+        # Check to see if the column still has an empty cell
+        return self.heights[col] < self.height
+
     def perform_move(self, col, ox):
         """Inputs a column and a string ox and updates the board 
             with the piece 'ox' in the desired column"""
-        #Decrement from the bottom row to the top row 
-        for row in range(self.height-1, -1, -1):
-            # If the location is empty 
-            if self.board[row][col] == ' ': 
-                self.board[row][col] = ox
-                self.lastRow = row 
-                self.lastCol = col
-                self.lastPlayer = ox 
-                return 
+        h = self.heights[col]
+        # Nothing happens if the column is full
+        if h == self.height:
+            return
+        bit = 1 << (col*(self.height+1)+h)
+        if ox == 'X':
+            self.x_mask |= bit
+        else:
+            self.o_mask |= bit
+        self.heights[col] = h+1
+        self.num_moves += 1
+        self.lastRow = self.height-1-h
+        self.lastCol = col
+        self.lastPlayer = ox
             
     def create_board(self, moveString):
         """ Accepts a string of columns and places
@@ -94,11 +182,47 @@ class Board:
     
     def undo_move(self, col):
         """Input a column col and removes the top checker from this column."""
-        # Go from the top down 
-        for row in range(self.height): 
-            if self.board[row][col] != ' ': #If it is not empty
-                self.board[row][col] = ' ' #Make it empty
-                return 
+        h = self.heights[col]
+        # Nothing happens if the column is empty
+        if h == 0:
+            return
+        # Clear the top checker of the column in both bitboards
+        bit = 1 << (col*(self.height+1)+h-1)
+        self.x_mask &= ~bit
+        self.o_mask &= ~bit
+        self.heights[col] = h-1
+        self.num_moves -= 1
+        # The removed checker can't be part of a winning line anymore
+        self.lastRow = None
+        self.lastCol = None
+        self.lastPlayer = None
+
+    def key(self):
+        """
+        Returns an integer that uniquely identifies the checkers on the board. Adding the bottom row to the
+        occupied cells leaves one bit on top of each column, which encodes the column heights; the checkers
+        of 'X' then tell the two players apart.
+        """
+        return self.x_mask + (self.x_mask | self.o_mask) + self._bottom
+
+    def mirror(self, bits):
+        """Returns the bitboard bits with the order of the columns reversed."""
+        size = self.height+1
+        mirrored = 0
+        for col in range(self.width):
+            mirrored |= ((bits >> (col*size)) & self._column) << ((self.width-1-col)*size)
+        return mirrored
+
+    def symmetric_key(self):
+        """
+        Returns the smaller of the keys of the board and of its mirror image, which is the same for
+        both positions, and True if that key belongs to the mirror image.
+        """
+        key = self.key()
+        mirrored = self.mirror(key)
+        if mirrored < key:
+            return mirrored, True
+        return key, False
 
     def is_terminal(self):
         """
@@ -110,42 +234,132 @@ class Board:
         """Input a boards and returns True if the board is a winning position
             and False otherwise."""
 
-        row = self.lastRow 
-        col = self.lastCol
         ox = self.lastPlayer 
 
         # No moves made on the board so far
-        if row is None:
+        if ox is None:
             return False 
-        # Checks to see if there is a horizontal win
-        for c in range(max(0, col-3), min(self.width-3, col+1)):
-            if self.board[row][c]+self.board[row][c+1]+self.board[row][c+2]+self.board[row][c+3] == ox*4:
-                    return True
-        # Checks to see if there is a vertical win
-        if row<self.height-3: 
-            if self.board[row][col]+self.board[row+1][col]+self.board[row+2][col]+self.board[row+3][col] == ox*4:
+        mask = self.x_mask if ox == 'X' else self.o_mask
+        # Only the lines through the last checker can have been completed
+        for line in self._cell_lines[self.lastCol*(self.height+1) + self.height-1-self.lastRow]:
+            if mask & line == line:
                 return True
-        # Checks to see if there is a win on the upper right diagonal 
-        for i in range(4):
-            r = row-i
-            c = col-i
-            # Loop through all possible winning locations and see if they're valid 
-            if 0<=r<self.height-3 and 0<=c<self.width-3: 
-                if self.board[r][c]+self.board[r+1][c+1]+self.board[r+2][c+2]+self.board[r+3][c+3]==ox*4:
-                    return True
-        # Checks to see if there is a win on the upper left diagonal
-        for i in range(4): 
-            r = row-i
-            c = col+i
-            # Loop through all possible winning locations and see if they're valid 
-            if 0<=r<self.height-3 and 3<=c<self.width: 
-                if self.board[r][c]+self.board[r+1][c-1]+self.board[r+2][c-2]+self.board[r+3][c-3]==ox*4:
-                    return True       
         return False
 
+    def winning_cells(self, ox):
+        """
+        Returns a bitboard with the empty cells where a checker of ox would complete a line of k. The cells
+        don't need to be playable yet; a cell is playable when the cell below it is taken.
+        """
+        position = self.x_mask if ox == 'X' else self.o_mask
+        empty = self._full & ~(self.x_mask | self.o_mask)
+        cells = 0
+        if self.k == 4:
+            # Shorter formula for Connect 4: three checkers on one side of the cell, or two on one side and one
+            # on the other
+            for shift in self._shifts:
+                pair = (position << shift) & (position << 2*shift)
+                cells |= pair & (position << 3*shift)
+                cells |= pair & (position >> shift)
+                pair = (position >> shift) & (position >> 2*shift)
+                cells |= pair & (position << shift)
+                cells |= pair & (position >> 3*shift)
+            return cells & empty
+
+        free = empty | position
+        for shift, lines in zip(self._shifts, self._lines):
+            # Start cells of the lines with k-1 checkers of ox and one empty cell
+            single = lines
+            one = two = 0
+            for i in range(self.k):
+                cell = empty >> i*shift
+                single &= free >> i*shift
+                two |= one & cell
+                one |= cell
+            single &= one & ~two
+            for i in range(self.k):
+                cells |= single << i*shift
+        return cells & empty
+
+    def playable(self):
+        """Returns a bitboard with the cells where a checker can be dropped: the lowest empty cell of each column."""
+        return ((self.x_mask | self.o_mask) + self._bottom) & self._full
+
+    def threats(self, player):
+        """
+        Returns three bitboards for the player to act: the playable cells where player wins at once, the
+        playable cells where the opponent would win at once (which player must block), and the playable cells
+        right below a winning cell of the opponent (where a checker of player would let the opponent win).
+        """
+        other = 'O' if player == 'X' else 'X'
+        playable = self.playable()
+        opponent_cells = self.winning_cells(other)
+        return self.winning_cells(player) & playable, opponent_cells & playable, (opponent_cells >> 1) & playable
+
+    def columns(self, bits):
+        """Returns the sorted list of the columns with a cell in the bitboard bits."""
+        size = self.height+1
+        return [col for col in range(self.width) if (bits >> (col*size)) & self._column]
+
+    def evaluate(self):
+        """
+        Returns a heuristic value of a non-terminal position, from -1 (good for 'O') to 1 (good for 'X'),
+        exclusive, so it never ties with a win or a loss.
+
+        The value counts, for each player, the lines of k cells with k-2 or k-1 of the player's checkers and
+        no checker of the opponent, the checkers in the center, and the threats (empty cells that would complete
+        a line of k). Threats on odd rows, counted from the bottom, are worth more to 'X' and threats on
+        even rows are worth more to 'O', since those are the threats each player can force at the end of the game.
+
+        All lines of one direction are counted at once with the precomputed masks of the board size, so the
+        cost doesn't depend on the number of checkers.
+        """
+        x = self.x_mask
+        o = self.o_mask
+        k = self.k
+        empty = self._full & ~(x | o)
+        x_free = empty | x
+        o_free = empty | o
+        twos = 0        # Lines with k-2 checkers of 'X' minus lines with k-2 checkers of 'O'
+        threes = 0      # Lines with k-1 checkers of 'X' minus lines with k-1 checkers of 'O'
+        x_threats = 0
+        o_threats = 0
+        for shift, lines in zip(self._shifts, self._lines):
+            # Start cells of the lines without checkers of the opponent
+            x_open = lines
+            o_open = lines
+            # Start cells of the lines with at least one, two and three empty cells
+            one = two = three = 0
+            for i in range(k):
+                x_open &= x_free >> i*shift
+                o_open &= o_free >> i*shift
+                cell = empty >> i*shift
+                three |= two & cell
+                two |= one & cell
+                one |= cell
+            # An open line with one empty cell has k-1 checkers of the player, and with two, k-2
+            single = one & ~two
+            double = two & ~three
+            x_single = x_open & single
+            o_single = o_open & single
+            twos += (x_open & double).bit_count() - (o_open & double).bit_count()
+            threes += x_single.bit_count() - o_single.bit_count()
+            # The empty cell of a line with k-1 checkers of the player is a threat
+            for i in range(k):
+                x_threats |= x_single << i*shift
+                o_threats |= o_single << i*shift
+        x_threats &= empty
+        o_threats &= empty
+
+        score = (TWO_WEIGHT*twos + THREE_WEIGHT*threes
+                 + CENTER_WEIGHT*((x & self._center).bit_count() - (o & self._center).bit_count())
+                 + THREAT_WEIGHT*(x_threats.bit_count() - o_threats.bit_count())
+                 + PARITY_WEIGHT*((x_threats & self._odd_rows).bit_count() - (o_threats & ~self._odd_rows).bit_count()))
+        return score/(abs(score)+EVAL_SCALE)
+
     def is_draw(self):
         """ Returns whether or not the current position is a draw"""
-        return(not self.available_moves())
+        return self.num_moves == self.width*self.height
     
     def get_player_move(self, ox):
         """Input a player's checker piece and gets a move for them"""
@@ -164,27 +378,41 @@ class Board:
         print(self.lastPlayer, " wins -- Congratulations!")
         print(self)
     
-    def host_game(self, ox = 'X'):
-        """Hosts a game which can be played between two players"""
+    def host_game(self, ox = 'X', engines=None):
+        """
+        Hosts a game which can be played between two players. engines optionally maps 'X' or 'O' to an
+        EngineSession (see session.py) that chooses the moves of that player; the other players are asked for theirs.
+        """
         print("Welcome to Connect Four!\n")
+        engines = engines or {}
         gameOver = False
         moves = ''
         while not gameOver: 
             # Print current board position 
             print(self) 
             # Get the move an add it to the board 
-            col_move = self.get_player_move(ox) 
+            if ox in engines:
+                col_move = engines[ox].choose_move(self, ox)
+                print(ox+"'s choice", col_move)
+            else:
+                col_move = self.get_player_move(ox) 
             self.perform_move(col_move, ox)  
             moves += str(col_move)
             #print(moves)
-            if(self.winsFor()):
+            if(self.is_terminal()):
                 gameOver = True
             # Change player 
             if(ox == 'X'): 
                 ox='O'
             else:
                 ox='X'
-        self.print_congrats()
+        for session in engines.values():
+            session.stop()
+        if self.has_winner():
+            self.print_congrats()
+        else:
+            print("It's a draw!")
+            print(self)
         return moves
 
     def game_value(self):
@@ -0,0 +1,216 @@
+import math
+import sys
+import time
+import numpy as np
+from connect4 import Board
+
+# Directions of the lines of four as (row, column) steps: vertical, horizontal and the two diagonals
+DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+def board_array(board):
+    """Returns the checkers of board as an int8 array of shape (height, width), rows from the bottom up, 1 for 'X' and -1 for 'O'."""
+    cells = np.zeros((board.height, board.width), dtype=np.int8)
+    for col in range(board.width):
+        for row in range(board.heights[col]):
+            bit = 1 << (col*(board.height+1)+row)
+            cells[row, col] = 1 if board.x_mask & bit else -1
+    return cells
+
+def rollouts(board, player, count, rng, k=4):
+    """
+    Plays count random games at once from the position on board, with player to act, and returns an array with
+    their results: 1 if 'X' won, -1 if 'O' won and 0 for a draw.
+
+    The games are stored as a NumPy array of boards with k-1 empty cells of padding around them, so the lines
+    through the last checker of every game are checked with the same array operations, without bounds checks.
+    At each step every unfinished game drops a checker in a random column that isn't full.
+    """
+    height, width = board.height, board.width
+    pad = k-1
+    games = np.zeros((count, height+2*pad, width+2*pad), dtype=np.int8)
+    games[:, pad:pad+height, pad:pad+width] = board_array(board)
+    heights = np.tile(np.array(board.heights, dtype=np.int64), (count, 1))
+    results = np.zeros(count, dtype=np.int8)
+    active = np.arange(count)
+    value = 1 if player == 'X' else -1
+
+    for _ in range(width*height - board.num_moves):
+        # A random column that isn't full for each unfinished game
+        choices = rng.random((len(active), width))
+        choices[heights[active] == height] = -1
+        cols = choices.argmax(axis=1)
+        rows = heights[active, cols]
+        heights[active, cols] += 1
+        r, c = rows+pad, cols+pad
+        games[active, r, c] = value
+
+        won = np.zeros(len(active), dtype=bool)
+        for dr, dc in DIRECTIONS:
+            length = np.ones(len(active), dtype=np.int64)
+            for sign in (1, -1):
+                same = np.ones(len(active), dtype=bool)
+                for step in range(1, k):
+                    same &= games[active, r + sign*step*dr, c + sign*step*dc] == value
+                    length += same
+            won |= length >= k
+        results[active[won]] = value
+        active = active[~won]
+        if len(active) == 0:
+            break
+        value = -value
+    return results
+
+class Node:
+    """
+    Node of the search tree of MCTS. player is the player to act in the position of the node, move the column
+    played to reach it from its parent, and key the Board.key of the position. total is the sum of the results of
+    the games played through the node, from the point of view of 'X'.
+    """
+    __slots__ = ('parent', 'move', 'player', 'key', 'children', 'untried', 'visits', 'total', 'value')
+
+    def __init__(self, parent, move, player, board):
+        self.parent = parent
+        self.move = move
+        self.player = player
+        self.key = board.key()
+        self.children = []
+        self.visits = 0
+        self.total = 0
+        # Game value of a terminal position; None otherwise
+        self.value = board.game_value() if board.is_terminal() else None
+        self.untried = [] if self.value is not None else board.available_moves()
+
+class MCTS:
+    """
+    Monte Carlo tree search with the UCT selection rule.
+
+    Each iteration walks down the tree from the root, choosing the child with the highest upper confidence bound
+    mean + exploration*sqrt(ln(visits of the parent)/visits of the child), where the mean is the score of the child
+    for the player who chooses, scaled to [0, 1]. It then adds one child for an untried move and scores it with
+    batch_size random games played at once by rollouts, or with batch_size times its game value if the game is
+    over there.
+
+    The search stops after iterations iterations or time_limit seconds, whichever comes first. With reuse, the
+    tree of the previous search is kept and the next search starts from the node of its position, when the new
+    position is at most two moves after the previous one.
+    """
+    def __init__(self, exploration=math.sqrt(2), iterations=None, time_limit=None, batch_size=64, reuse=True, seed=None):
+        if iterations is None and time_limit is None:
+            iterations = 1000
+        self.exploration = exploration
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.batch_size = batch_size
+        self.reuse = reuse
+        self.rng = np.random.default_rng(seed)
+        self.root = None
+
+    def search(self, board, player):
+        """
+        Searches the position on board, with player to act.
+
+        The function returns three values:
+        1. the estimated score of the position, from -1 ('O' wins) to 1 ('X' wins), given by the mean result of
+           the games played through the chosen move;
+        2. the move with the most visits, None if the game is over
+        3. the number of random games played by the search
+        """
+        root = self._find_root(board, player)
+        if root.value is not None:
+            self.root = root
+            return root.value, None, 0
+        deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        playouts = 0
+        iteration = 0
+        # The root is always expanded, so a search with no time left still chooses a move
+        while not root.children or (self.iterations is None or iteration < self.iterations) and \
+              (deadline is None or time.perf_counter() < deadline):
+            playouts += self._iterate(root, board)
+            iteration += 1
+
+        self.root = root
+        best = max(root.children, key=lambda child: child.visits)
+        return best.total/best.visits, best.move, playouts
+
+    def ponder(self, board, player, stop):
+        """
+        Grows the tree of the position on board, with player to act, until the event stop is set, and returns the
+        number of random games played. The next search reuses the tree, so pondering on the opponent's turn
+        searches every reply at once.
+        """
+        root = self._find_root(board, player)
+        self.root = root
+        playouts = 0
+        while root.value is None and not stop.is_set():
+            playouts += self._iterate(root, board)
+        return playouts
+
+    def _find_root(self, board, player):
+        """Returns the node of the position on board from the previous tree, or a new node if it isn't there."""
+        if self.reuse and self.root is not None:
+            key = board.key()
+            nodes = [self.root]
+            for _ in range(3):
+                for node in nodes:
+                    if node.key == key and node.player == player:
+                        node.parent = None      # Lets the rest of the old tree be freed
+                        return node
+                nodes = [child for node in nodes for child in node.children]
+        return Node(None, None, player, board)
+
+    def _iterate(self, root, board):
+        """Runs one iteration of the search from root and returns the number of random games played."""
+        node = root
+        path = []
+        # Selection: descend through fully expanded nodes
+        while not node.untried and node.children:
+            node = self._select(node)
+            board.perform_move(node.move, node.parent.player)
+            path.append(node.move)
+        # Expansion: add one child for an untried move
+        if node.untried:
+            move = node.untried.pop(self.rng.integers(len(node.untried)))
+            board.perform_move(move, node.player)
+            path.append(move)
+            child = Node(node, move, 'O' if node.player == 'X' else 'X', board)
+            node.children.append(child)
+            node = child
+
+        # Simulation: the game value of a finished game, or the results of random games
+        games = self.batch_size
+        if node.value is not None:
+            total = games*node.value
+        else:
+            total = int(rollouts(board, node.player, games, self.rng, board.k).sum())
+        for move in reversed(path):
+            board.undo_move(move)
+
+        # Backpropagation
+        while node is not None:
+            node.visits += games
+            node.total += total
+            node = node.parent
+        return games
+
+    def _select(self, node):
+        """Returns the child of node with the highest upper confidence bound."""
+        sign = 1 if node.player == 'X' else -1
+        log_visits = math.log(node.visits)
+        best = None
+        best_bound = -math.inf
+        for child in node.children:
+            mean = (1 + sign*child.total/child.visits)/2
+            bound = mean + self.exploration*math.sqrt(log_visits/child.visits)
+            if bound > best_bound:
+                best, best_bound = child, bound
+        return best
+
+if __name__ == "__main__":
+    # Usage: python mcts.py [moves] [seconds]
+    moves = sys.argv[1] if len(sys.argv) > 1 else ''
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 2
+    b = Board()
+    player = b.create_board(moves)
+    print(b)
+    score, move, playouts = MCTS(time_limit=seconds).search(b, player)
+    print('move', move, 'score', round(score, 3), playouts, 'random games,', round(playouts/seconds), 'per second')
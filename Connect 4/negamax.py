@@ -0,0 +1,141 @@
+from alphabeta import opponent
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+from math import inf
+
+EPSILON = 1e-9      # Width of the null windows; smaller than the difference between any two evaluations
+
+def negamax(board, player, alpha, beta, ply, table=None, ordering=None):
+    """
+    Negamax version of alpha_beta with principal variation search. Scores are given from the point of view
+    of the player who is to act, so both players maximize and the window is negated at each level.
+
+    The first move of each node is searched with the full window (alpha, beta); the other moves are searched
+    with a null window (alpha, alpha + EPSILON), which only tells whether they are better than the first move,
+    and are searched again with the full window when they are.
+
+    table and ordering are the same as in alpha_beta. Tables store scores from the point of view of the player
+    to act, so a table used by negamax must not be shared with alpha_beta.
+
+    The function returns three values:
+    1. the score of the optimal move from the point of view of player;
+    2. the optimal move
+    3. the total number of nodes expanded to find the optimal move
+    """
+    sign = 1 if player == 'X' else -1
+
+    if board.is_terminal():
+        # If the current state is terminal, return the game value for player and no move
+        return sign*board.game_value(), None, 0
+    elif ply == 0:
+        # If maximum search depth is reached, return the heuristic value of the position for player
+        return sign*board.evaluate(), None, 0
+
+    moves = board.available_moves()
+    if ordering is not None:
+        moves = ordering.order_moves(board, player, moves, ply)
+    if table is not None:
+        key, mirrored = board.symmetric_key()
+        key = 2*key + (player == 'O')
+        alpha_orig = alpha
+        entry = table.probe(key)
+        if entry is not None:
+            depth, value, flag, move = entry
+            if move is not None and mirrored:
+                move = board.width-1-move
+            if depth >= ply:
+                if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                    return value, move, 0
+            if move in moves:
+                moves.remove(move)
+                moves.insert(0, move)
+
+    v = -inf
+    best_move = None
+    total_nodes = 1
+
+    for i, move in enumerate(moves):
+        board.perform_move(move, player)
+        if i == 0:
+            # The first move is assumed to be the best one and gets the full window
+            result = negamax(board, opponent(player), -beta, -alpha, ply - 1, table, ordering)
+            score = -result[0]
+            total_nodes += result[2]
+        else:
+            # Null window: only checks whether the move is better than alpha
+            result = negamax(board, opponent(player), -alpha - EPSILON, -alpha, ply - 1, table, ordering)
+            score = -result[0]
+            total_nodes += result[2]
+            if alpha < score < beta:
+                # The move is better than expected; search it again to get its exact score
+                result = negamax(board, opponent(player), -beta, -score, ply - 1, table, ordering)
+                score = -result[0]
+                total_nodes += result[2]
+        board.undo_move(move)
+
+        if score > v:
+            v = score
+            best_move = move
+        if v > alpha:
+            alpha = v
+        if alpha >= beta:
+            # Prune the remaining moves
+            if ordering is not None:
+                ordering.cutoff(board, player, move, ply)
+            break
+
+    if table is not None:
+        if v <= alpha_orig:
+            flag = UPPER
+        elif v >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        stored_move = best_move
+        if stored_move is not None and mirrored:
+            stored_move = board.width-1-stored_move
+        table.store(key, ply, v, flag, stored_move)
+
+    return v, best_move, total_nodes
+
+def pvs(board, player, ply, table=None, ordering=None):
+    """
+    Runs negamax with principal variation search from the full window and returns the same three values
+    as alpha_beta, with the score from the point of view of 'X'.
+    """
+    sign = 1 if player == 'X' else -1
+    score, move, nodes = negamax(board, player, -inf, inf, ply, table, ordering)
+    return sign*score, move, nodes
+
+def mtdf(board, player, ply, first_guess=0, table=None, ordering=None):
+    """
+    MTD(f): finds the score of the position with a sequence of null-window negamax searches. Each search tells
+    whether the score is above or below a guess and returns a bound; the guess moves to the bound until the
+    upper and lower bounds meet. first_guess is from the point of view of 'X'; a good guess, such as the
+    score of a shallower search, reduces the number of searches.
+
+    The searches share the transposition table (a new one is created if table is None), which is what makes
+    searching the same tree several times affordable.
+
+    The function returns the same three values as alpha_beta, with the score from the point of view of 'X'.
+    """
+    if table is None:
+        table = TranspositionTable()
+    sign = 1 if player == 'X' else -1
+
+    g = sign*first_guess
+    lower, upper = -inf, inf
+    best_move = None
+    total_nodes = 0
+
+    while lower < upper:
+        beta = g + EPSILON if g == lower else g
+        g, move, nodes = negamax(board, player, beta - EPSILON, beta, ply, table, ordering)
+        total_nodes += nodes
+        if g < beta:
+            upper = g
+        else:
+            # The move of a search that failed high reaches at least the new lower bound
+            lower = g
+            best_move = move
+
+    return sign*g, best_move, total_nodes
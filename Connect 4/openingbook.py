@@ -0,0 +1,118 @@
+import mmap
+import struct
+import sys
+from connect4 import Board
+from ordering import KillerHistory
+from negamax import pvs
+from transposition import TranspositionTable
+
+MAGIC = b'C4BK'
+HEADER = struct.Struct('<4sBBH')    # Magic, width, height and depth of the book
+RECORD = struct.Struct('<QhB')      # Position key, value and best move
+VALUE_SCALE = 32000                 # Values in [-1, 1] are stored as integers in [-VALUE_SCALE, VALUE_SCALE]
+
+def book_positions(depth, width=7, height=6):
+    """
+    Returns a dictionary with all the positions reachable from the empty board with at most depth moves, keyed
+    by Board.symmetric_key so a position and its mirror image appear once. Each value is the move string of
+    the first path found to the position; positions where the game is over are left out.
+    """
+    positions = {}
+
+    def visit(board, moves, player):
+        key, _ = board.symmetric_key()
+        if key in positions:
+            return
+        positions[key] = moves
+        if len(moves) == depth:
+            return
+        for col in board.available_moves():
+            board.perform_move(col, player)
+            if not board.is_terminal():
+                visit(board, moves + str(col), 'O' if player == 'X' else 'X')
+            board.undo_move(col)
+
+    visit(Board(width, height), '', 'X')
+    return positions
+
+def build_book(filename, depth, ply, width=7, height=6, verbose=False):
+    """
+    Builds an opening book with the best move and value of every position with at most depth moves and writes it
+    to filename. Each position is searched with principal variation search to the depth ply; values are from
+    the point of view of 'X', as in alpha_beta.
+
+    The file starts with a header and stores one fixed-size record per position sorted by key, so it can be
+    searched with a binary search without being loaded. Keys are stored in 64 bits, so boards whose keys need more
+    (width*(height+1) > 64, such as 8x8) are rejected with a ValueError.
+    """
+    if width*(height+1) > 8*struct.calcsize('<Q'):
+        raise ValueError('the keys of %dx%d boards need %d bits, more than the 64 bits of a book record'
+                         % (width, height, width*(height+1)))
+    positions = book_positions(depth, width, height)
+    table = TranspositionTable()
+    ordering = KillerHistory()
+    records = []
+    for i, (key, moves) in enumerate(positions.items()):
+        board = Board(width, height)
+        player = board.create_board(moves)
+        value, move, _ = pvs(board, player, ply, table, ordering)
+        _, mirrored = board.symmetric_key()
+        if mirrored:
+            move = width-1-move      # Moves are stored for the position with the smaller key
+        records.append((key, round(value*VALUE_SCALE), move))
+        if verbose and (i+1) % 1000 == 0:
+            print(i+1, 'of', len(positions), 'positions searched')
+    records.sort()
+
+    with open(filename, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, width, height, depth))
+        for record in records:
+            file.write(RECORD.pack(*record))
+    return len(records)
+
+class OpeningBook:
+    """
+    Opening book stored in a file written by build_book. The file is memory-mapped and searched with a binary
+    search over its sorted records, so opening a book is instant and only the pages visited by lookups are read.
+    """
+    def __init__(self, filename):
+        self._file = open(filename, 'rb')
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.depth = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC:
+            raise ValueError(filename + " is not an opening book")
+        self.size = (len(self._data) - HEADER.size)//RECORD.size
+
+    def lookup(self, board):
+        """
+        Returns the value (from the point of view of 'X') and the best move of the position on board, or None if
+        the position isn't in the book.
+        """
+        if board.width != self.width or board.height != self.height or board.k != 4 or board.num_moves > self.depth:
+            return None
+        key, mirrored = board.symmetric_key()
+
+        low, high = 0, self.size
+        while low < high:
+            middle = (low+high)//2
+            stored, value, move = RECORD.unpack_from(self._data, HEADER.size + middle*RECORD.size)
+            if stored < key:
+                low = middle+1
+            elif stored > key:
+                high = middle
+            else:
+                if mirrored:
+                    move = self.width-1-move
+                return value/VALUE_SCALE, move
+        return None
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+if __name__ == "__main__":
+    # Usage: python openingbook.py <book file> [depth] [search depth]
+    filename = sys.argv[1] if len(sys.argv) > 1 else 'book.bin'
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    ply = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    print(build_book(filename, depth, ply, verbose=True), 'positions written to', filename)
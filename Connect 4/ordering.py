@@ -0,0 +1,72 @@
+class MoveOrdering:
+    """
+    Interface for ordering the moves searched by alpha_beta.
+
+    Extend this class when implementing a new move ordering. order_moves receives the board, the player to act,
+    the list of available moves and the remaining search depth, and returns the moves in the order they should be
+    searched. cutoff is called with the move that caused a beta cutoff, so orderings can learn from the search.
+    """
+    def order_moves(self, board, player, moves, ply):
+        return moves
+
+    def cutoff(self, board, player, move, ply):
+        pass
+
+class CenterFirst(MoveOrdering):
+    """
+    Static ordering that searches the columns closest to the center first; central columns take part in more
+    winning lines than the columns on the sides.
+    """
+    def order_moves(self, board, player, moves, ply):
+        center = (board.width-1)/2
+        return sorted(moves, key=lambda col: abs(col-center))
+
+class ThreatsFirst(CenterFirst):
+    """
+    Searches first the moves that win immediately, then the moves that block an immediate win of the opponent,
+    then the remaining moves from the center out.
+    """
+    def order_moves(self, board, player, moves, ply):
+        forced, rest = self._split(board, player, super().order_moves(board, player, moves, ply))
+        return forced + rest
+
+    def _split(self, board, player, moves):
+        """
+        Splits moves into the forced moves (wins first, then blocks) and the remaining moves, keeping the
+        relative order of moves.
+        """
+        wins, blocks, _ = board.threats(player)
+        wins = board.columns(wins)
+        blocks = board.columns(blocks)
+        first = [col for col in moves if col in wins] + [col for col in moves if col in blocks and col not in wins]
+        return first, [col for col in moves if col not in first]
+
+class KillerHistory(ThreatsFirst):
+    """
+    Dynamic ordering that learns from the cutoffs of the search. After the winning and blocking moves, it searches
+    the killer moves of the current depth (the last moves that caused a cutoff at that depth) and then the
+    remaining moves by their history score. The history score of a move is the sum of ply*ply over all the
+    cutoffs it caused, keyed by the player and the cell where the checker lands.
+    """
+    def __init__(self, num_killers=2):
+        self.num_killers = num_killers
+        self.killers = {}
+        self.history = {}
+
+    def order_moves(self, board, player, moves, ply):
+        forced, rest = self._split(board, player, CenterFirst.order_moves(self, board, player, moves, ply))
+        killers = [col for col in self.killers.get(ply, []) if col in rest]
+        rest = [col for col in rest if col not in killers]
+        # sorted is stable, so moves with the same history score stay in center-first order
+        rest.sort(key=lambda col: -self.history.get((player, col, board.heights[col]), 0))
+        return forced + killers + rest
+
+    def cutoff(self, board, player, move, ply):
+        killers = self.killers.setdefault(ply, [])
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[self.num_killers:]
+
+        cell = (player, move, board.heights[move])
+        self.history[cell] = self.history.get(cell, 0) + ply*ply
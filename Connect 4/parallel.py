@@ -0,0 +1,88 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from alphabeta import alpha_beta, opponent
+from connect4 import Board
+from transposition import TranspositionTable
+from math import inf
+
+def search_move(board, player, move, alpha, beta, ply, table_size=None, ordering=None):
+    """
+    Searches the child of board reached by move with alpha_beta and the window (alpha, beta). Runs in a worker
+    process; table_size and ordering (a MoveOrdering class) give the transposition table and the move ordering
+    created for the search, if any.
+
+    Returns the score of the child and the number of nodes expanded.
+    """
+    table = TranspositionTable(table_size) if table_size else None
+    board.perform_move(move, player)
+    score, _, nodes = alpha_beta(board, opponent(player), alpha, beta, ply - 1, table, ordering() if ordering else None)
+    board.undo_move(move)
+    return score, nodes
+
+def parallel_alpha_beta(board, player, ply, executor, table_size=None, ordering=None):
+    """
+    Splits alpha_beta at the root over the processes of executor, following the young brothers wait rule: the
+    first move (the eldest brother) is searched alone to get a bound, and then the other moves are searched at
+    the same time, each in its own process, with the window narrowed by that bound. The score and the move are
+    the same as those of alpha_beta(board, player, -inf, inf, ply); ply must be at least 1, since there is
+    nothing to split without searching the moves of the root.
+
+    The function returns three values:
+    1. the score of the optimal move for the player who is to act;
+    2. the optimal move
+    3. the total number of nodes expanded to find the optimal move
+    """
+    if ply < 1:
+        raise ValueError('ply must be at least 1')
+    if board.is_terminal():
+        return board.game_value(), None, 0
+    moves = board.available_moves()
+    if ordering is not None:
+        moves = ordering().order_moves(board, player, moves, ply)
+
+    # The eldest brother is searched with the full window
+    best_score, total_nodes = search_move(board, player, moves[0], -inf, inf, ply, table_size, ordering)
+    best_move = moves[0]
+    total_nodes += 1
+
+    # The young brothers only need to tell whether they are better than the eldest brother
+    if player == 'X':
+        alpha, beta = best_score, inf
+    else:
+        alpha, beta = -inf, best_score
+    futures = [executor.submit(search_move, board, player, move, alpha, beta, ply, table_size, ordering)
+               for move in moves[1:]]
+
+    for move, future in zip(moves[1:], futures):
+        score, nodes = future.result()
+        total_nodes += nodes
+        if (player == 'X' and score > best_score) or (player == 'O' and score < best_score):
+            best_score = score
+            best_move = move
+
+    return best_score, best_move, total_nodes
+
+def benchmark(positions, ply, processes=None):
+    """
+    Times alpha_beta and parallel_alpha_beta on the positions (move strings) at the depth ply and prints the speedup.
+    """
+    processes = processes or os.cpu_count()
+    with ProcessPoolExecutor(processes) as executor:
+        # Starts the processes of the pool before timing
+        list(executor.map(abs, range(processes)))
+
+        serial = 0
+        parallel = 0
+        for moves in positions:
+            b = Board()
+            player = b.create_board(moves)
+            start = time.perf_counter()
+            alpha_beta(b, player, -inf, inf, ply)
+            serial += time.perf_counter() - start
+            start = time.perf_counter()
+            parallel_alpha_beta(b, player, ply, executor)
+            parallel += time.perf_counter() - start
+
+    print('ply', ply, 'processes', processes, 'serial', round(serial, 3),
+          'parallel', round(parallel, 3), 'speedup', round(serial/parallel, 2))
@@ -0,0 +1,240 @@
+import asyncio
+import itertools
+import math
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from alphabeta import iterative_deepening
+from connect4 import Board
+from transposition import TranspositionTable
+
+DEFAULT_TIME = 1.0      # Seconds per engine move when NEW doesn't give them
+MAX_TIME = 10.0         # Largest number of seconds per engine move a game may ask for
+MAX_SIZE = 15           # Largest width and height of a board
+
+# Transposition tables of the worker process, one per board size, reused by all the games it searches
+_tables = {}
+
+def engine_move(width, height, k, moves, time_limit):
+    """
+    Chooses the move of the player to act after moves (a bytes object with one column per move) with
+    iterative_deepening for time_limit seconds, in a worker process.
+    """
+    board = Board(width, height, k)
+    player = 'X'
+    for col in moves:
+        board.perform_move(col, player)
+        player = 'O' if player == 'X' else 'X'
+    table = _tables.get((width, height, k))
+    if table is None:
+        table = _tables[(width, height, k)] = TranspositionTable()
+    _, move, _ = iterative_deepening(board, player, time_limit, table=table, threats=True)
+    return move
+
+class Game:
+    """
+    One game hosted by the server. Only the settings and the columns played are stored, one byte per move, so a
+    game takes a few hundred bytes; the Board is rebuilt from the moves when a request needs it.
+    """
+    __slots__ = ('width', 'height', 'k', 'human', 'time_limit', 'moves', 'thinking')
+
+    def __init__(self, width, height, k, human, time_limit):
+        self.width = width
+        self.height = height
+        self.k = k
+        self.human = human              # 'X' or 'O', the side of the client; the engine plays the other one
+        self.time_limit = time_limit
+        self.moves = bytearray()
+        self.thinking = False           # Whether the engine is searching its move
+
+    def board(self):
+        """Returns the Board of the position and the player to act."""
+        board = Board(self.width, self.height, self.k)
+        player = 'X'
+        for col in self.moves:
+            board.perform_move(col, player)
+            player = 'O' if player == 'X' else 'X'
+        return board, player
+
+    def state(self, game_id):
+        """Returns the STATE response of the game: its id, moves and status."""
+        board, player = self.board()
+        if board.has_winner():
+            status = board.lastPlayer + '-WINS'
+        elif board.is_draw():
+            status = 'DRAW'
+        else:
+            status = player
+        moves = ','.join(str(col) for col in self.moves) or '-'
+        return 'STATE %d %s %s' % (game_id, moves, status)
+
+class GameServer:
+    """
+    Hosts Connect 4 games between clients and the engine over a local socket, with a line-based protocol. Each
+    request is one line, and each gets one response line:
+
+    NEW <side> [seconds] [width height k]   starts a game where the client plays side ('X' or 'O')
+    MOVE <id> <column>                      plays the move of the client, then the reply of the engine
+    SHOW <id>                               shows the game
+    QUIT <id>                               ends the game; the response is "OK <id>"
+
+    NEW, MOVE and SHOW answer "STATE <id> <moves> <status>", where moves are the columns played separated by
+    commas ('-' if none) and status is the player to act, 'X-WINS', 'O-WINS' or 'DRAW'. Failures are answered
+    with "ERROR <message>". If the engine fails to move, the request that needed the move fails: the move of MOVE
+    is taken back and the game of NEW isn't created.
+
+    Requests are handled concurrently, so a response is written as soon as it is ready. Engine moves are searched
+    in a shared process pool, each within the time of its game, while the event loop keeps serving the other
+    games. The games of a connection end when it closes.
+    """
+    def __init__(self, max_workers=None):
+        # Forked workers would inherit the sockets of the connections open at the time, and keep them open
+        # after the server closes them
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+        self._ids = itertools.count(1)
+        self.games = {}
+
+    async def handle_request(self, line, write, owned):
+        """
+        Handles the request in line for the connection owning the game ids in owned, and writes the response with
+        the function write.
+        """
+        try:
+            words = line.split()
+            command = words[0].upper()
+            if command == 'NEW':
+                response = await self._new(words[1:], owned)
+            elif command in ('MOVE', 'SHOW', 'QUIT'):
+                game_id = int(words[1])
+                if game_id not in owned:
+                    raise ValueError('unknown game %d' % game_id)
+                if command == 'MOVE':
+                    response = await self._move(game_id, int(words[2]))
+                elif command == 'SHOW':
+                    response = self.games[game_id].state(game_id)
+                else:
+                    owned.discard(game_id)
+                    del self.games[game_id]
+                    response = 'OK %d' % game_id
+            else:
+                raise ValueError('unknown command ' + words[0])
+        except IndexError:
+            response = 'ERROR malformed request'
+        except Exception as e:
+            response = 'ERROR ' + (str(e) or type(e).__name__)
+        await write(response + '\n')
+
+    async def _new(self, args, owned):
+        human = args[0].upper()
+        if human not in ('X', 'O'):
+            raise ValueError("side must be X or O")
+        time_limit = float(args[1]) if len(args) > 1 else DEFAULT_TIME
+        if not (math.isfinite(time_limit) and 0 < time_limit <= MAX_TIME):
+            raise ValueError('seconds must be greater than 0 and at most %g' % MAX_TIME)
+        width, height, k = (int(arg) for arg in args[2:5]) if len(args) > 2 else (7, 6, 4)
+        if not (1 <= width <= MAX_SIZE and 1 <= height <= MAX_SIZE and 1 < k <= max(width, height)):
+            raise ValueError('invalid board size')
+        game_id = next(self._ids)
+        game = Game(width, height, k, human, time_limit)
+        self.games[game_id] = game
+        owned.add(game_id)
+        if human == 'O':
+            try:
+                await self._engine(game)
+            except Exception:
+                owned.discard(game_id)
+                self.games.pop(game_id, None)
+                raise
+        return game.state(game_id)
+
+    async def _move(self, game_id, col):
+        game = self.games[game_id]
+        if game.thinking:
+            raise ValueError('the engine is thinking')
+        board, player = game.board()
+        if board.is_terminal():
+            raise ValueError('the game is over')
+        if player != game.human:
+            raise ValueError('not your turn')
+        if not board.allows_move(col):
+            raise ValueError('column %d is full or outside the board' % col)
+        game.moves.append(col)
+        board.perform_move(col, player)
+        if not board.is_terminal():
+            try:
+                await self._engine(game)
+            except Exception:
+                # Otherwise the game would wait forever for the engine to move
+                del game.moves[-1]
+                raise
+        return game.state(game_id)
+
+    async def _engine(self, game):
+        """Plays the move of the engine, searched in the process pool. Errors of the search are raised."""
+        game.thinking = True
+        try:
+            loop = asyncio.get_running_loop()
+            move = await loop.run_in_executor(self._executor, engine_move, game.width, game.height, game.k,
+                                              bytes(game.moves), game.time_limit)
+            game.moves.append(move)
+        finally:
+            game.thinking = False
+
+    async def serve_stream(self, reader, write):
+        """
+        Reads requests from reader until the end of the stream, handles them concurrently, and then ends the
+        games started by the stream.
+        """
+        tasks = set()
+        owned = set()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.strip():
+                task = asyncio.create_task(self.handle_request(line.decode(), write, owned))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+        for game_id in owned:
+            self.games.pop(game_id, None)
+
+    async def client(self, reader, writer):
+        """Serves one connection."""
+        async def write(data):
+            writer.write(data.encode())
+            await writer.drain()
+
+        try:
+            await self.serve_stream(reader, write)
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def serve_unix(self, path):
+        """Serves the connections received on the Unix socket path."""
+        server = await asyncio.start_unix_server(self.client, path)
+        async with server:
+            await server.serve_forever()
+
+    async def serve_tcp(self, port, host='127.0.0.1'):
+        """Serves the connections received on the TCP port of host, the local machine by default."""
+        server = await asyncio.start_server(self.client, host, port)
+        async with server:
+            await server.serve_forever()
+
+    def shutdown(self):
+        self._executor.shutdown(cancel_futures=True)
+
+if __name__ == "__main__":
+    # Usage: python server.py [port]             (TCP on 127.0.0.1, port 4444 by default)
+    #        python server.py --socket <path>    (Unix socket)
+    server = GameServer()
+    try:
+        if len(sys.argv) > 2 and sys.argv[1] == '--socket':
+            asyncio.run(server.serve_unix(sys.argv[2]))
+        else:
+            asyncio.run(server.serve_tcp(int(sys.argv[1]) if len(sys.argv) > 1 else 4444))
+    finally:
+        server.shutdown()
@@ -0,0 +1,165 @@
+import sys
+import threading
+import time
+from alphabeta import alpha_beta, iterative_deepening, opponent, SearchTimeout
+from connect4 import Board
+from mcts import MCTS
+from ordering import KillerHistory
+from transposition import TranspositionTable
+from math import inf
+
+MIN_SEARCH_TIME = 0.01      # Seconds the 'iterative' engine searches a move at least, even if pondering used up the time
+
+class EngineSession:
+    """
+    Engine that plays all the moves of one side of a game, for Board.host_game and for automated play.
+
+    The session keeps its search state between moves: the transposition table and the killer moves of the
+    'iterative' engine (iterative_deepening with alpha_beta), or the tree of the 'mcts' engine. With ponder, it
+    also searches during the opponent's turn in a background thread. The 'iterative' engine predicts the reply
+    from the table and searches the position after it; the 'mcts' engine grows the tree below its move, which
+    covers every reply. When the position to play is one of the pondered positions (a hit), the time already
+    pondered counts towards time_limit, so the move is answered at once if the opponent took as long as a search.
+    If pondering didn't complete a search by then, the move is still searched for MIN_SEARCH_TIME seconds.
+
+    Pondering shares the interpreter with the opponent, so it is meant for human opponents, which wait in input(),
+    or for engines playing in other processes.
+    """
+    def __init__(self, engine='iterative', time_limit=1.0, max_ply=None, ponder=True, threats=True, seed=None,
+                 table_size=1 << 20):
+        if engine not in ('iterative', 'mcts'):
+            raise ValueError("engine must be 'iterative' or 'mcts'")
+        self.engine = engine
+        self.time_limit = time_limit
+        self.max_ply = max_ply
+        self.ponder = ponder
+        self.threats = threats
+        self.table = TranspositionTable(table_size) if engine == 'iterative' else None
+        self.ordering = KillerHistory() if engine == 'iterative' else None
+        self.mcts = MCTS(time_limit=time_limit, seed=seed) if engine == 'mcts' else None
+        self.prediction = None      # Reply the 'iterative' engine is pondering on
+        self.hits = 0
+        self.misses = 0
+        self._thread = None
+        self._stop = None
+        self._targets = set()       # (key, player) of the positions that count as hits
+        self._result = None         # (score, move, depth) of the deepest completed ponder search
+        self._started = 0.0
+
+    def choose_move(self, board, player):
+        """
+        Returns the move of player in the position on board, and starts pondering on the opponent's turn. The
+        board is left unchanged.
+        """
+        hit, pondered = self.stop(board, player)
+        remaining = self.time_limit - pondered if hit else self.time_limit
+
+        if self.engine == 'mcts':
+            self.mcts.time_limit = max(remaining, 0)
+            _, move, _ = self.mcts.search(board, player)
+        elif hit and remaining <= 0 and self._result is not None:
+            move = self._result[1]
+        else:
+            _, move, _ = iterative_deepening(board, player, max(remaining, MIN_SEARCH_TIME), self.max_ply, self.table,
+                                             self.ordering, threats=self.threats)
+
+        if self.ponder and move is not None:
+            after = board.copy()
+            after.perform_move(move, player)
+            if not after.is_terminal():
+                self._start(after, opponent(player))
+        return move
+
+    def stop(self, board=None, player=None):
+        """
+        Stops pondering, if the session is. Returns whether the position on board, with player to act, is one of
+        the pondered positions and the seconds spent pondering.
+        """
+        if self._thread is None:
+            return False, 0.0
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        pondered = time.perf_counter() - self._started
+        if board is None:
+            return False, pondered
+        hit = (board.key(), player) in self._targets
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return hit, pondered
+
+    def is_pondering(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait(self, timeout=None):
+        """
+        Waits up to timeout seconds (without limit if None) for pondering to end by itself, which happens when
+        the 'iterative' engine completes its deepest search or the tree of the 'mcts' engine is solved. Returns
+        whether pondering has ended; the pondered position still counts as a hit.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return not self.is_pondering()
+
+    def _start(self, board, player):
+        """Starts pondering on the position on board, with player (the opponent of the session) to act."""
+        self._stop = threading.Event()
+        self._result = None
+        self.prediction = None
+        if self.engine == 'mcts':
+            self._targets = set()
+            for col in board.available_moves():
+                board.perform_move(col, player)
+                self._targets.add((board.key(), opponent(player)))
+                board.undo_move(col)
+            target = self.mcts.ponder
+        else:
+            self.prediction = self._predict(board, player)
+            board.perform_move(self.prediction, player)
+            if board.is_terminal():
+                return
+            player = opponent(player)
+            self._targets = {(board.key(), player)}
+            target = self._ponder
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=target, args=(board, player, self._stop), daemon=True)
+        self._thread.start()
+
+    def _predict(self, board, player):
+        """
+        Returns the reply expected from player: the best move stored in the table by the last search, or the
+        best move of a shallow search if the position isn't there.
+        """
+        key, mirrored = board.symmetric_key()
+        entry = self.table.probe(2*key + (player == 'O'))
+        if entry is not None and entry[3] is not None:
+            move = entry[3]
+            return board.width-1-move if mirrored else move
+        _, move, _ = alpha_beta(board, player, -inf, inf, 2, self.table, self.ordering, threats=self.threats)
+        return move
+
+    def _ponder(self, board, player, stop):
+        """Runs alpha_beta with increasing depths on the position on board until stop is set."""
+        max_depth = board.width*board.height - board.num_moves
+        if self.max_ply is not None:
+            max_depth = min(max_depth, self.max_ply)
+        for ply in range(1, max_depth + 1):
+            try:
+                score, move, _ = alpha_beta(board.copy(), player, -inf, inf, ply, self.table, self.ordering,
+                                            threats=self.threats, stop=stop)
+            except SearchTimeout:
+                return
+            self._result = score, move, ply
+            if abs(score) == 1:
+                return
+
+if __name__ == "__main__":
+    # Usage: python session.py [side of the human player] [seconds per move] [engine]
+    human = sys.argv[1] if len(sys.argv) > 1 else 'X'
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 1
+    engine = sys.argv[3] if len(sys.argv) > 3 else 'iterative'
+    session = EngineSession(engine, seconds)
+    Board().host_game(engines={opponent(human): session})
+    print('pondering hits', session.hits, 'misses', session.misses)
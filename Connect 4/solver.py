@@ -0,0 +1,281 @@
+from transposition import TranspositionTable, LOWER, UPPER
+
+class Position:
+    """
+    Compact position used by the Solver, stored as two bitboards with the same layout as Board: current has the
+    checkers of the player to act and mask has all the checkers. Only the number of moves tells the players apart;
+    'X' is to act when it is even.
+    """
+    def __init__(self, width=7, height=6):
+        self.width = width
+        self.height = height
+        self.current = 0
+        self.mask = 0
+        self.moves = 0
+        self.bottom = sum(1 << (col*(height+1)) for col in range(width))
+        self.full = self.bottom*((1 << height)-1)
+        # Shifts of the horizontal and the two diagonal directions; vertical lines can only be completed on top
+        self.shifts = tuple((shift, 2*shift, 3*shift) for shift in (height+1, height, height+2))
+
+    @staticmethod
+    def from_moves(moveString, width=7, height=6):
+        """
+        Returns the position reached by playing the columns in moveString, alternating players and starting
+        with 'X', as Board.create_board does. Raises ValueError if a move is not playable or ends the game.
+
+        Positions only hold games in progress or drawn on a full board: a Position stores the checkers of the
+        player to act, so it has no way to tell that the player who just moved has won, and the Solver assumes
+        nobody has. Move strings whose last move wins have to be scored with Board instead.
+        """
+        position = Position(width, height)
+        for colDigit in moveString:
+            col = int(colDigit)
+            if not position.can_play(col) or position.is_winning_move(col):
+                raise ValueError("invalid move sequence: " + moveString)
+            position.play(col)
+        return position
+
+    def copy(self):
+        """Returns a copy of the position."""
+        position = Position.__new__(Position)
+        position.__dict__.update(self.__dict__)
+        return position
+
+    def column_mask(self, col):
+        """Returns the bitboard with all the cells of column col."""
+        return ((1 << self.height)-1) << (col*(self.height+1))
+
+    def can_play(self, col):
+        """Returns True if column col isn't full."""
+        return 0 <= col < self.width and not self.mask & (1 << (self.height-1+col*(self.height+1)))
+
+    def play(self, col):
+        """Drops a checker of the player to act in column col."""
+        self.play_bit((self.mask + (1 << (col*(self.height+1)))) & self.column_mask(col))
+
+    def play_bit(self, move):
+        """Drops a checker of the player to act in the cell of the bitboard move."""
+        self.current ^= self.mask
+        self.mask |= move
+        self.moves += 1
+
+    def undo_bit(self, move):
+        """Takes back the checker in the cell of the bitboard move, which must be the last one played."""
+        self.mask ^= move
+        self.current ^= self.mask
+        self.moves -= 1
+
+    def is_winning_move(self, col):
+        """Returns True if the player to act wins by playing in column col."""
+        return bool(self.winning_cells(self.current) & self.possible() & self.column_mask(col))
+
+    def can_win_next(self):
+        """Returns True if the player to act can win with the next move."""
+        return bool(self.winning_cells(self.current) & self.possible())
+
+    def possible(self):
+        """Returns the bitboard with the cells where a checker can be dropped."""
+        return (self.mask + self.bottom) & self.full
+
+    def winning_cells(self, position):
+        """Returns the empty cells that complete a line of four for the checkers in position."""
+        cells = (position << 1) & (position << 2) & (position << 3)
+        for one, two, three in self.shifts:
+            pair = (position << one) & (position << two)
+            cells |= pair & ((position << three) | (position >> one))
+            pair = (position >> one) & (position >> two)
+            cells |= pair & ((position << one) | (position >> three))
+        return cells & (self.full ^ self.mask)
+
+    def non_losing_moves(self):
+        """
+        Returns the bitboard with the playable cells that don't let the opponent win with the next move. Assumes
+        the player to act can't win with the next move. If the opponent threatens to win, the only candidate is
+        the cell that blocks it (or none if there are two such cells); cells right below a threat of the
+        opponent are never candidates, because they would let the opponent play the threat.
+        """
+        possible = self.possible()
+        opponent_wins = self.winning_cells(self.current ^ self.mask)
+        forced = possible & opponent_wins
+        if forced:
+            if forced & (forced-1):
+                return 0
+            possible = forced
+        return possible & ~(opponent_wins >> 1)
+
+    def key(self):
+        """Returns an integer that uniquely identifies the position."""
+        return self.current + self.mask + self.bottom
+
+class Solver:
+    """
+    Strong solver for Connect 4: finds the game-theoretic value of a position under perfect play.
+
+    Scores follow the player to act: a positive score means the player to act wins, zero is a draw and a negative
+    score is a loss. The absolute value is larger for faster wins: a win with the last checker of the game scores
+    1 and each earlier checker adds one. The search is a negamax with alpha-beta pruning and:
+    - a transposition table storing bounds of the scores, keyed by the position;
+    - pruning of the moves that lose at once and immediate detection of forced moves;
+    - bounds on the score from the number of moves left, which shrink the window as the game goes on;
+    - moves ordered by the number of threats they create, then from the center out;
+    - null-window searches that bisect the range of possible scores.
+
+    The search is exhaustive, so its time depends on how far the game is from being decided. On the 7x6 board,
+    positions with 12 or more moves typically take up to two seconds. Positions with 7 to 10 moves take from a
+    few seconds to several minutes: '3232415' takes about 2 seconds and '4562365113' about 45. Earlier positions
+    aren't practical to solve.
+
+    The table size is prime: keys hold the columns in order, so with a power of two, key % size would only keep
+    the cells of the first columns and most positions would share a slot.
+    """
+    def __init__(self, width=7, height=6, table_size=1048583):
+        self.width = width
+        self.height = height
+        self.table = TranspositionTable(table_size, 'always')
+        self.column_order = sorted(range(width), key=lambda col: abs(col-(width-1)/2))
+        self.column_masks = [((1 << height)-1) << (col*(height+1)) for col in self.column_order]
+        self.nodes = 0
+
+    def negamax(self, position, alpha, beta):
+        """
+        Returns the score of position if it is within (alpha, beta); otherwise returns a bound on the score that
+        is outside the window. Assumes the player to act can't win with the next move.
+        """
+        self.nodes += 1
+        cells = self.width*self.height
+
+        moves = position.non_losing_moves()
+        if moves == 0:
+            # Every move lets the opponent win with the next one
+            return -((cells - position.moves)//2)
+        if position.moves >= cells-2:
+            # Neither player can win in the last two moves
+            return 0
+
+        # The opponent can't win with its next move, so the score is at least this
+        lower = -((cells-2 - position.moves)//2)
+        if alpha < lower:
+            alpha = lower
+            if alpha >= beta:
+                return alpha
+        # The player to act can't win with the next move, so the score is at most this
+        upper = (cells-1 - position.moves)//2
+        key = position.key()
+        entry = self.table.probe(key)
+        if entry is not None:
+            _, value, flag, _ = entry
+            if flag == UPPER:
+                upper = min(upper, value)
+            elif flag == LOWER and value > alpha:
+                alpha = value
+                if alpha >= beta:
+                    return alpha
+        if beta > upper:
+            beta = upper
+            if alpha >= beta:
+                return beta
+
+        # Moves with more threats first; sorted is stable, so ties keep the center-first order
+        candidates = []
+        for column in self.column_masks:
+            move = moves & column
+            if move:
+                threats = position.winning_cells(position.current | move).bit_count()
+                candidates.append((threats, move))
+        candidates.sort(key=lambda candidate: -candidate[0])
+
+        # The children are searched in place and the move taken back afterwards, which is cheaper than a copy
+        for _, move in candidates:
+            position.play_bit(move)
+            score = -self.negamax(position, -beta, -alpha)
+            position.undo_bit(move)
+            if score >= beta:
+                self.table.store(key, 0, score, LOWER, None)
+                return score
+            if score > alpha:
+                alpha = score
+
+        self.table.store(key, 0, alpha, UPPER, None)
+        return alpha
+
+    def solve(self, position):
+        """Returns the exact score of position."""
+        cells = self.width*self.height
+        if position.can_win_next():
+            return (cells+1 - position.moves)//2
+
+        lower = -((cells - position.moves)//2)
+        upper = (cells+1 - position.moves)//2
+        while lower < upper:
+            # Null-window search around the middle of the range, biased towards zero to explore faster results first
+            middle = lower + (upper-lower)//2
+            if middle <= 0 and lower//2 < middle:
+                middle = lower//2
+            elif middle >= 0 and upper//2 > middle:
+                middle = upper//2
+            score = self.negamax(position, middle, middle+1)
+            if score <= middle:
+                upper = score
+            else:
+                lower = score
+        return lower
+
+    def best_move(self, position):
+        """Returns the score of position and a column that reaches it, or None if the board is full."""
+        cells = self.width*self.height
+        for col in self.column_order:
+            if position.can_play(col) and position.is_winning_move(col):
+                return (cells+1 - position.moves)//2, col
+        moves = [col for col in self.column_order if position.can_play(col)]
+        if not moves:
+            return 0, None
+
+        score = self.solve(position)
+        for col in moves:
+            child = position.copy()
+            child.play(col)
+            if child.moves == cells:
+                if score == 0:
+                    return score, col
+                continue
+            if child.can_win_next():
+                continue
+            # A null-window search tells whether the score of the child is at most -score
+            if self.negamax(child, -score, -score+1) <= -score:
+                return score, col
+        return score, moves[0]
+
+    def distance(self, position, score):
+        """
+        Returns the number of moves, counting from position, until the game ends under perfect play when position
+        has the given score.
+        """
+        cells = self.width*self.height
+        if score == 0:
+            return cells - position.moves
+        # The winner drops its winning checker when cells+1-2*|score| or one less moves have been played, on
+        # its own turn: the player to act plays when an even number of moves were played from position
+        before = cells+1 - 2*abs(score)
+        if (before - position.moves) % 2 != (0 if score > 0 else 1):
+            before -= 1
+        return before+1 - position.moves
+
+def solve(moveString, solver=None):
+    """
+    Solves the 7x6 position reached by the moves in moveString (as in Board.create_board).
+
+    The function returns three values:
+    1. the game value under perfect play: 1 if 'X' wins, -1 if 'O' wins and 0 for a draw;
+    2. the number of moves until the end of the game under perfect play;
+    3. a move that reaches that value (None if the board is full)
+
+    Raises ValueError if moveString has a move that isn't playable or that wins the game (see Position.from_moves).
+    See Solver for the number of moves the solver needs to answer in seconds.
+    """
+    if solver is None:
+        solver = Solver()
+    position = Position.from_moves(moveString, solver.width, solver.height)
+    score, move = solver.best_move(position)
+    sign = 1 if position.moves % 2 == 0 else -1      # Scores follow the player to act
+    value = 0 if score == 0 else (sign if score > 0 else -sign)
+    return value, solver.distance(position, score), move
@@ -0,0 +1,87 @@
+import json
+
+class SearchStats:
+    """
+    Optional statistics collector for minimax, alpha_beta and iterative_deepening. The searches only record
+    into it when one is passed, so searches without a collector pay nothing but a test against None.
+
+    Counters are kept per remaining depth (the ply argument of the search at the node):
+    - visits: calls of the search, including the ones answered by a table, a tablebase or a leaf
+    - nodes: nodes expanded, as counted by the searches
+    - leaves: terminal positions and heuristic evaluations
+    - cutoffs: beta cutoffs, and cutoff_moves[i] the number of cutoffs caused by the i-th move searched
+    - probes and hits of the transposition table
+    iterative_deepening also records the depth, nodes and seconds of each completed iteration.
+    """
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Resets all the counters."""
+        self.visits = {}
+        self.nodes = {}
+        self.leaves = {}
+        self.cutoffs = {}
+        self.cutoff_moves = {}
+        self.probes = 0
+        self.hits = 0
+        self.iterations = []
+
+    def visit(self, ply):
+        self.visits[ply] = self.visits.get(ply, 0) + 1
+
+    def node(self, ply):
+        self.nodes[ply] = self.nodes.get(ply, 0) + 1
+
+    def leaf(self, ply):
+        self.leaves[ply] = self.leaves.get(ply, 0) + 1
+
+    def cutoff(self, ply, index):
+        """Records a beta cutoff at depth ply caused by the move searched in position index (0 for the first)."""
+        self.cutoffs[ply] = self.cutoffs.get(ply, 0) + 1
+        self.cutoff_moves[index] = self.cutoff_moves.get(index, 0) + 1
+
+    def probe(self, hit):
+        self.probes += 1
+        if hit:
+            self.hits += 1
+
+    def iteration(self, ply, nodes, seconds):
+        self.iterations.append({'ply': ply, 'nodes': nodes, 'seconds': seconds})
+
+    def branching_factors(self):
+        """
+        Returns the effective branching factor at each depth: the mean number of children searched by the nodes
+        expanded at that depth. Moves pruned by cutoffs aren't searched, so good move ordering lowers it.
+        """
+        return {ply: self.visits.get(ply-1, 0)/nodes for ply, nodes in self.nodes.items() if ply > 0}
+
+    def first_move_cutoff_rate(self):
+        """Returns the fraction of the cutoffs caused by the first move searched, or None if there were none."""
+        total = sum(self.cutoff_moves.values())
+        return self.cutoff_moves.get(0, 0)/total if total else None
+
+    def to_dict(self):
+        """Returns the statistics as a dictionary that can be written as JSON; depths become string keys."""
+        def by_depth(counters):
+            return {str(key): counters[key] for key in sorted(counters, reverse=True)}
+        return {
+            'visits': by_depth(self.visits),
+            'nodes': by_depth(self.nodes),
+            'leaves': by_depth(self.leaves),
+            'cutoffs': by_depth(self.cutoffs),
+            'cutoff_moves': {str(index): self.cutoff_moves[index] for index in sorted(self.cutoff_moves)},
+            'first_move_cutoff_rate': self.first_move_cutoff_rate(),
+            'branching_factors': {str(ply): round(factor, 3) for ply, factor in sorted(self.branching_factors().items(), reverse=True)},
+            'table': {'probes': self.probes, 'hits': self.hits,
+                      'hit_rate': self.hits/self.probes if self.probes else None},
+            'iterations': self.iterations,
+        }
+
+    def to_json(self, filename=None):
+        """Returns the statistics as a JSON string, and writes them to filename if one is given."""
+        text = json.dumps(self.to_dict(), indent=2)
+        if filename is not None:
+            with open(filename, 'w') as file:
+                file.write(text)
+        return text
@@ -0,0 +1,225 @@
+import mmap
+import struct
+import sys
+import time
+import numpy as np
+from itertools import combinations, product
+from math import comb
+
+MAGIC = b'C4TB'
+HEADER = struct.Struct('<4sBBBxQ')      # Magic, width, height, largest number of empty cells, number of positions
+
+# Values stored for each position, 2 bits each
+INVALID = 0         # Not a position of the table: some player already has four in a row
+WIN = 1             # The player to act wins
+LOSS = 2            # The player to act loses
+DRAW = 3
+
+# COMB[i][j] is the binomial coefficient C(i, j)
+COMB = [[comb(i, j) for j in range(65)] for i in range(65)]
+
+def _configurations(width, height):
+    """Returns all the column heights of a board, as tuples, in the order of their index in the table."""
+    return list(product(range(height+1), repeat=width))
+
+def _configuration_index(heights, height):
+    """Returns the index of the column heights, read as a number in base height+1."""
+    index = 0
+    for h in heights:
+        index = index*(height+1) + h
+    return index
+
+def _ranks(cells):
+    """
+    Returns the ranks of the rows of the boolean matrix cells, each one the set of occupied cells (numbered
+    column by column from the bottom up) that hold a checker of 'X', in the combinatorial number system: the
+    sum of C(i, j) over the checkers of 'X', where i is the number of the cell and j counts the checkers of 'X'
+    up to and including that one. Sets with the same number of checkers get distinct ranks from 0 up.
+    """
+    if cells.shape[1] == 0:
+        return np.zeros(len(cells), dtype=np.int64)
+    table = np.array(COMB, dtype=np.int64)
+    counts = np.cumsum(cells, axis=1)
+    return (table[np.arange(cells.shape[1]), counts]*cells).sum(axis=1)
+
+def _has_four(bits, shifts):
+    """Returns, for each bitboard of the array bits, whether it has four checkers in a row."""
+    found = np.zeros(len(bits), dtype=bool)
+    for shift in shifts:
+        pairs = bits & (bits >> shift)
+        found |= (pairs & (pairs >> 2*shift)) != 0
+    return found
+
+def build_tablebase(filename, width, height, max_empty=None, verbose=False):
+    """
+    Solves every position of the board with at most max_empty empty cells (all the positions if max_empty is
+    None) by retrograde analysis, and writes the results to filename.
+
+    Positions are solved one layer at a time, from the full board back to the positions with max_empty empty
+    cells: the value of a position follows from the values of the positions one checker later, which are
+    already known. Within a layer, all the ways to color the checkers of one set of column heights are solved
+    at once with NumPy arrays.
+
+    Positions are numbered without storing them. The sets of column heights each get a block of numbers, given
+    by an index of offsets; within a block, the checkers of 'X' are numbered by their rank (see _ranks). 'X'
+    drops the first checker, so the number of checkers of each player follows from the heights. Each position
+    gets 2 bits (WIN, LOSS or DRAW for the player to act, or INVALID), four positions per byte.
+
+    Returns the number of positions in the table.
+    """
+    cells = width*height
+    if max_empty is None:
+        max_empty = cells
+    size = height+1
+    shifts = (1, size, height, height+2)
+    configurations = _configurations(width, height)
+
+    offsets = np.full(len(configurations), -1, dtype=np.int64)
+    count = 0
+    for index, heights in enumerate(configurations):
+        n = sum(heights)
+        if cells - n <= max_empty:
+            offsets[index] = count
+            count += comb(n, (n+1)//2)
+    values = np.zeros(count, dtype=np.uint8)
+
+    for n in range(cells, cells-max_empty-1, -1):
+        start = time.perf_counter()
+        x_to_act = n % 2 == 0
+        for index, heights in enumerate(configurations):
+            if sum(heights) != n:
+                continue
+            # Bits of the occupied cells, numbered column by column from the bottom up
+            bits = np.array([1 << (col*size+row) for col in range(width) for row in range(heights[col])],
+                            dtype=np.int64)
+            occupied = int(bits.sum())
+            # Every way to give (n+1)//2 of the cells to 'X'
+            k = (n+1)//2
+            chosen = np.array(list(combinations(range(n), k)), dtype=np.int64).reshape(comb(n, k), k)
+            is_x = np.zeros((len(chosen), n), dtype=bool)
+            is_x[np.arange(len(chosen))[:, None], chosen] = True
+            x = (is_x*bits).sum(axis=1)
+            o = occupied ^ x
+            positions = offsets[index] + _ranks(is_x)
+
+            valid = ~(_has_four(x, shifts) | _has_four(o, shifts))
+            if n == cells:
+                values[positions[valid]] = DRAW
+                continue
+            mover = x if x_to_act else o
+            result = np.full(len(chosen), LOSS, dtype=np.uint8)
+            for col in range(width):
+                if heights[col] == height:
+                    continue
+                move = 1 << (col*size + heights[col])
+                wins = _has_four(mover | move, shifts)
+                # The child has the new checker inserted among the occupied cells
+                child_heights = list(heights)
+                child_heights[col] += 1
+                place = sum(heights[:col]) + heights[col]
+                child_x = np.insert(is_x, place, x_to_act, axis=1)
+                child = values[offsets[_configuration_index(child_heights, height)] + _ranks(child_x)]
+                # A loss for the opponent is a win; a draw is a draw unless another move wins
+                result[wins | (child == LOSS)] = WIN
+                result[(result == LOSS) & ~wins & (child == DRAW)] = DRAW
+            values[positions[valid]] = result[valid]
+        if verbose:
+            print(cells-n, 'empty cells solved in', round(time.perf_counter()-start, 2), 'seconds')
+
+    # Four values of 2 bits per byte, the first one in the lowest bits
+    padded = np.zeros((count+3)//4*4, dtype=np.uint8)
+    padded[:count] = values
+    padded = padded.reshape(-1, 4)
+    packed = padded[:, 0] | (padded[:, 1] << 2) | (padded[:, 2] << 4) | (padded[:, 3] << 6)
+
+    with open(filename, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, width, height, max_empty, count))
+        file.write(offsets.astype('<i8').tobytes())
+        file.write(packed.tobytes())
+    return count
+
+class Tablebase:
+    """
+    Endgame tablebase stored in a file written by build_tablebase. The file is memory-mapped, and the value of
+    a position is read from its 2 bits, found from the index of offsets and the rank of the checkers of 'X', so
+    a lookup costs the same at any depth.
+    """
+    def __init__(self, filename):
+        self._file = open(filename, 'rb')
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.max_empty, self.size = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC:
+            raise ValueError(filename + " is not a tablebase")
+        configurations = (self.height+1)**self.width
+        self._offsets = struct.unpack_from('<%dq' % configurations, self._data, HEADER.size)
+        self._values = HEADER.size + 8*configurations
+
+    def lookup(self, board, player):
+        """
+        Returns the game value under perfect play (1 if 'X' wins, -1 if 'O' wins and 0 for a draw) of the position
+        on board with player to act, or None if the position isn't in the table. Positions are in the table if
+        the board has its size and at most max_empty empty cells, the game isn't over and, as in every game
+        started by create_board, 'X' has dropped the first checker and player is the one whose turn it is.
+        """
+        n = board.num_moves
+        if board.width != self.width or board.height != self.height or board.k != 4 or \
+           board.width*board.height - n > self.max_empty:
+            return None
+        if player != ('X' if n % 2 == 0 else 'O') or board.x_mask.bit_count() != (n+1)//2:
+            return None
+        offset = self._offsets[_configuration_index(board.heights, self.height)]
+
+        rank = 0
+        i = 0
+        j = 0
+        x = board.x_mask
+        size = self.height+1
+        for col, h in enumerate(board.heights):
+            for row in range(h):
+                if x >> (col*size+row) & 1:
+                    j += 1
+                    rank += COMB[i][j]
+                i += 1
+        position = offset + rank
+        value = (self._data[self._values + (position >> 2)] >> (2*(position & 3))) & 3
+        if value == INVALID:
+            return None
+        if value == DRAW:
+            return 0
+        sign = 1 if player == 'X' else -1
+        return sign if value == WIN else -sign
+
+    def probe(self, board, player):
+        """
+        Returns the game value of the position (as lookup) and a move that keeps it, or None if the position isn't
+        in the table. Moves are tried from the center out.
+        """
+        value = self.lookup(board, player)
+        if value is None:
+            return None
+        other = 'O' if player == 'X' else 'X'
+        center = (board.width-1)/2
+        for col in sorted(board.available_moves(), key=lambda col: abs(col-center)):
+            board.perform_move(col, player)
+            if board.has_winner():
+                child = 1 if player == 'X' else -1
+            elif board.is_draw():
+                child = 0
+            else:
+                child = self.lookup(board, other)
+            board.undo_move(col)
+            if child == value:
+                return value, col
+        return None
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+if __name__ == "__main__":
+    # Usage: python tablebase.py <tablebase file> <width> <height> [largest number of empty cells]
+    filename = sys.argv[1] if len(sys.argv) > 1 else 'tablebase.bin'
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    height = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    max_empty = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    print(build_tablebase(filename, width, height, max_empty, verbose=True), 'positions written to', filename)
@@ -1,75 +1,16 @@
+import itertools
+import json
 import random
+import threading
 import unittest 
+from unittest import mock
+from alphabeta import SearchTimeout, alpha_beta, iterative_deepening, opponent
 from connect4 import Board
+from ordering import CenterFirst, ThreatsFirst, KillerHistory
+from stats import SearchStats
+from transposition import TranspositionTable
 from math import inf
 
-def opponent(current_player):
-	if current_player == "X":
-		return "O" 
-	else:
-		return "X"
-
-def alpha_beta(board, player, alpha, beta, ply):
-	"""
-	Function receives an instances of the Board class, the player who is to act at this state (either X or O),
-	the value of alpha, beta, and the maximum search depth given by the variable ply.
-
-	The function returns three values: 
-	1. the score of the optimal move for the player who is to act;
-	2. the optimal move
-	3. the total number of nodes expanded to find the optimal move 
-	"""
-
-	if board.is_terminal():
-		# If the current state is terminal, return the game value and no move
-		game_value = board.game_value()
-		return game_value, None, 0
-	elif ply == 0:
-		# If maximum search depth is reached, return neutral values
-		return 0, 0, 0
-	
-	if player == 'X':
-		# If the current player is X, initialize v as negative infinity
-		v = -inf  
-	else:
-		# If the current player is O, initialize v as positive infinity
-		v = inf
-
-	best_move = None		# Initialize the best move as None
-	total_nodes = 1			# Start with 1 node already expanded for the current state
-
-	for move in board.available_moves():
-		board.perform_move(move, player)									# Make the move on the board
-		result = alpha_beta(board, opponent(player), alpha, beta, ply - 1)	# Call minimax with opponent player
-		board.undo_move(move)												# Undo the move to backtrack
-		score = result[0]													# Extract score and nodes_expanded
-		nodes_expanded = result[2]
-		total_nodes += nodes_expanded										# Increment total nodes expanded
-		
-		if player == 'X':
-			# If current player is X (maximizing player)
-			if v < score:
-				# Update v and the best move accordingly
-				v = score	
-				best_move = move
-			if v >= beta:
-				# Prune if v is greater than or equal to beta
-				return v, best_move, total_nodes
-			alpha = max(alpha, v)		# Update alpha
-		else:
-			# If current player is O (minimizing player)
-			if v > score:
-				# Update v and the best move accordingly
-				v = score
-				best_move = move
-			if v <= alpha: 
-				# Prune if v is less than or equal to alpha
-				return v, best_move, total_nodes
-			beta = min(beta, v)			# Update beta
-
-	return v, best_move, total_nodes			# Return the optimal score, move, and total nodes expanded
-
-
 class TestMinMaxDepth1(unittest.TestCase):
 
 	def test_depth1a(self):
@@ -224,6 +165,208 @@ class TestMinMaxDepth5(unittest.TestCase):
 		self.assertEqual(bestMove, 3)	
 		print(expansions)		
 
+# Positions of the depth 5 tests with the score and the move alpha_beta finds for them
+DEPTH5 = [('430265511116', 1, 3), ('536432111330', 1, 5), ('322411004326', 1, 3), ('3541226000220', -1, 4),
+		  ('43231033655', -1, 1), ('345641411335', 1, 5), ('336604464463', 1, 3)]
+
+class TestTranspositionTable(unittest.TestCase):
+	positions = DEPTH5
+
+	def test_depth5_with_table(self):
+		for moves, score, move in self.positions:
+			b = Board()
+			player = b.create_board(moves)
+			_, _, plain_expansions = alpha_beta(b, player, -inf, inf, 5)
+			table = TranspositionTable()
+			bestScore, bestMove, expansions = alpha_beta(b, player, -inf, inf, 5, table)
+			self.assertEqual(bestScore, score)
+			self.assertEqual(bestMove, move)
+			self.assertLessEqual(expansions, plain_expansions)
+			self.assertEqual(table.probes, table.stats()['probes'])
+
+	def test_small_table(self):
+		# Collisions in a tiny table must not change the result
+		for policy in ['depth', 'always']:
+			for moves, score, move in self.positions:
+				b = Board()
+				player = b.create_board(moves)
+				table = TranspositionTable(16, policy)
+				bestScore, bestMove, expansions = alpha_beta(b, player, -inf, inf, 5, table)
+				self.assertEqual(bestScore, score)
+				self.assertGreater(table.overwrites, 0)
+
+	def test_reuse_between_searches(self):
+		b = Board()
+		player = b.create_board('336604464463')
+		table = TranspositionTable()
+		alpha_beta(b, player, -inf, inf, 5, table)
+		bestScore, bestMove, expansions = alpha_beta(b, player, -inf, inf, 5, table)
+		self.assertEqual(bestScore, 1)
+		self.assertEqual(bestMove, 3)
+		self.assertEqual(expansions, 0)
+		self.assertGreater(table.hit_rate(), 0)
+
+	def test_mirror(self):
+		# A position and its mirror image share their entries
+		b = Board()
+		player = b.create_board('336604464463')
+		table = TranspositionTable()
+		alpha_beta(b, player, -inf, inf, 5, table)
+		m = Board()
+		m.create_board(''.join(str(6-int(c)) for c in '336604464463'))
+		bestScore, bestMove, expansions = alpha_beta(m, player, -inf, inf, 5, table)
+		self.assertEqual(bestScore, 1)
+		self.assertEqual(bestMove, 3)
+		self.assertEqual(expansions, 0)
+
+class TestMoveOrdering(unittest.TestCase):
+	positions = DEPTH5
+
+	def test_depth5_orderings(self):
+		for ordering in [CenterFirst, ThreatsFirst, KillerHistory]:
+			for moves, score, move in self.positions:
+				b = Board()
+				player = b.create_board(moves)
+				bestScore, bestMove, expansions = alpha_beta(b, player, -inf, inf, 5, None, ordering())
+				self.assertEqual(bestScore, score)
+				self.assertEqual(bestMove, move)
+
+	def test_fewer_expansions(self):
+		totals = []
+		for ordering in [lambda: None, CenterFirst, ThreatsFirst, KillerHistory]:
+			total = 0
+			for moves, _, _ in self.positions:
+				b = Board()
+				player = b.create_board(moves)
+				total += alpha_beta(b, player, -inf, inf, 6, None, ordering())[2]
+			totals.append(total)
+		self.assertEqual(totals, sorted(totals, reverse=True))
+		self.assertLess(totals[-1], totals[0]/2)
+
+class TestIterativeDeepening(unittest.TestCase):
+	positions = DEPTH5
+
+	def test_depth5_positions(self):
+		for moves, score, move in self.positions:
+			b = Board()
+			player = b.create_board(moves)
+			bestScore, bestMove, expansions = iterative_deepening(b, player, 10, 5)
+			self.assertEqual(bestScore, score)
+			self.assertEqual(bestMove, move)
+			self.assertLessEqual(len(expansions), 5)
+
+	def test_time_limit(self):
+		# A clock that advances 1 ms each time it is read, so the search stops at the same node on every machine
+		clock = itertools.count(0, 0.001)
+		b = Board()
+		before = repr(b)
+		with mock.patch('time.perf_counter', side_effect=lambda: next(clock)):
+			result = iterative_deepening(b, 'X', 0.2, None, None, KillerHistory())
+		# The search stops as soon as the deadline has passed
+		self.assertLessEqual(next(clock), 0.2 + 0.0025)
+		self.assertEqual(repr(b), before)
+		bestScore, bestMove, expansions = result
+		self.assertIn(bestMove, b.available_moves())
+		self.assertGreater(len(expansions), 0)
+		# The interrupted iteration is discarded: the result is that of the completed ones
+		self.assertEqual(iterative_deepening(b, 'X', None, len(expansions), None, KillerHistory()), result)
+
+	def test_no_time(self):
+		b = Board()
+		player = b.create_board('000000')
+		bestScore, bestMove, expansions = iterative_deepening(b, player, 0)
+		self.assertEqual(bestMove, 1)
+		self.assertEqual(expansions, [])
+
+	def test_stop(self):
+		b = Board()
+		player = b.create_board('33')
+		stop = threading.Event()
+		# Until it is set, the event doesn't limit the search, even without a time limit
+		self.assertEqual(iterative_deepening(b, player, None, 5, stop=stop), iterative_deepening(b, player, 10, 5))
+		stop.set()
+		with self.assertRaises(SearchTimeout):
+			alpha_beta(b, player, -inf, inf, 5, stop=stop)
+		self.assertEqual(iterative_deepening(b, player, None, 5, stop=stop), (0, 0, []))
+		self.assertEqual(b.num_moves, 2)
+
+class TestThreats(unittest.TestCase):
+	positions = DEPTH5
+
+	def test_depth5_positions(self):
+		for moves, score, move in self.positions:
+			b = Board()
+			player = b.create_board(moves)
+			bestScore, bestMove, expansions = alpha_beta(b, player, -inf, inf, 5, threats=True)
+			self.assertEqual(bestScore, score)
+			b.perform_move(bestMove, player)
+			# The move reaches the score of the position
+			self.assertEqual(alpha_beta(b, opponent(player), -inf, inf, 4)[0], score)
+
+	def test_forced(self):
+		# 'X' can win at once
+		b = Board()
+		player = b.create_board('001122')
+		self.assertEqual(alpha_beta(b, player, -inf, inf, 3, threats=True), (1, 3, 1))
+		# 'O' must block column 3, and the search decides it without expanding the other moves
+		b = Board()
+		player = b.create_board('00112')
+		self.assertEqual(alpha_beta(b, player, -inf, inf, 1, threats=True)[1], 3)
+		# Two threats of 'X' on the bottom row can't both be blocked; the plain search only sees it a ply later
+		b = Board()
+		player = b.create_board('1626')
+		b.perform_move(3, player)
+		self.assertEqual(alpha_beta(b, 'O', -inf, inf, 1, threats=True)[0], 1)
+		self.assertLess(alpha_beta(b, 'O', -inf, inf, 1)[0], 1)
+		self.assertEqual(alpha_beta(b, 'O', -inf, inf, 2)[0], 1)
+
+	def test_fewer_expansions(self):
+		# Middle game positions, where threats are common
+		totals = [0, 0]
+		for moves in ['3342561', '33425614', '2344332', '43231033']:
+			b = Board()
+			player = b.create_board(moves)
+			totals[0] += alpha_beta(b, player, -inf, inf, 5, TranspositionTable(), KillerHistory())[2]
+			totals[1] += alpha_beta(b, player, -inf, inf, 5, TranspositionTable(), KillerHistory(), threats=True)[2]
+		self.assertLess(totals[1], totals[0])
+
+class TestSearchStats(unittest.TestCase):
+
+	def test_counts(self):
+		b = Board()
+		player = b.create_board('3342')
+		stats = SearchStats()
+		bestScore, bestMove, expansions = alpha_beta(b, player, -inf, inf, 5, stats=stats)
+		self.assertEqual(sum(stats.nodes.values()), expansions)
+		self.assertEqual(stats.visits[5], 1)
+		self.assertEqual(alpha_beta(b, player, -inf, inf, 5)[:2], (bestScore, bestMove))
+		# Every visit is either expanded, a leaf, or cut off by the table (there is none here)
+		self.assertEqual(sum(stats.visits.values()), sum(stats.nodes.values()) + sum(stats.leaves.values()))
+		self.assertEqual(sum(stats.cutoffs.values()), sum(stats.cutoff_moves.values()))
+		self.assertEqual(stats.probes, 0)
+
+	def test_ordering(self):
+		# Ordering moves searches the best move first more often and prunes more
+		b = Board()
+		player = b.create_board('3342')
+		plain = SearchStats()
+		alpha_beta(b, player, -inf, inf, 6, stats=plain)
+		ordered = SearchStats()
+		alpha_beta(b, player, -inf, inf, 6, TranspositionTable(), KillerHistory(), stats=ordered)
+		self.assertGreater(ordered.first_move_cutoff_rate(), plain.first_move_cutoff_rate())
+		self.assertLess(ordered.branching_factors()[4], plain.branching_factors()[4])
+		self.assertGreater(ordered.hits, 0)
+		self.assertLessEqual(ordered.hits, ordered.probes)
+
+	def test_json(self):
+		stats = SearchStats()
+		iterative_deepening(Board(), 'X', 10, 4, None, None, None, None, stats)
+		self.assertEqual([iteration['ply'] for iteration in stats.iterations], [1, 2, 3, 4])
+		data = json.loads(stats.to_json())
+		self.assertEqual(data['iterations'][3]['nodes'], stats.iterations[3]['nodes'])
+		self.assertEqual(data['nodes']['4'], 1)		# Only the root of the last iteration has 4 plies left
+		self.assertEqual(data['table']['probes'], stats.probes)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
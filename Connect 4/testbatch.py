@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from connect4 import Board
+from batch import encode, terminal_values, evaluate_batch, random_games
+from alphabeta import alpha_beta
+from math import inf
+
+class TestBatch(unittest.TestCase):
+
+	def test_encode(self):
+		boards, players, last = encode(['', '0', '3343', '0000000'])
+		for i, moves in enumerate(['', '0', '3343', '0000000']):
+			b = Board()
+			player = b.create_board(moves)
+			# encode stores rows from the bottom up; Board.board lists them from the top down
+			expected = [[{'X': 1, 'O': -1, ' ': 0}[c] for c in row] for row in reversed(b.board)]
+			self.assertEqual(boards[i].tolist(), expected)
+			self.assertEqual(players[i], 1 if player == 'X' else -1)
+			self.assertEqual(last[i], {'X': 1, 'O': -1, None: 0}[b.lastPlayer])
+
+	def test_terminal(self):
+		games = random_games(300, 42, seed=1) + ['0101010', '1122334', '01122323363', '65544343303',
+												 '0123456'*2 + '1234560'*2 + '0123456' + '1234560']
+		boards, players, last = encode(games)
+		terminal, values = terminal_values(boards, last)
+		for i, moves in enumerate(games):
+			b = Board()
+			b.create_board(moves)
+			self.assertEqual(terminal[i], b.is_terminal(), moves)
+			if b.is_terminal():
+				self.assertEqual(values[i], b.game_value(), moves)
+
+	def test_evaluate_batch(self):
+		games = random_games(40, 30, seed=2)
+		with ProcessPoolExecutor(2) as executor:
+			results = evaluate_batch(games, 3, executor, chunksize=4)
+		self.assertEqual(len(results), len(games))
+		for moves, (score, move) in zip(games, results):
+			b = Board()
+			player = b.create_board(moves)
+			expected = alpha_beta(b, player, -inf, inf, 3)
+			self.assertEqual((score, move), expected[:2] if not b.is_terminal() else (b.game_value(), None))
+
+
+if __name__ == '__main__':
+    unittest.main()
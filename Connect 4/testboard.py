@@ -0,0 +1,143 @@
+import unittest 
+from connect4 import Board
+
+class TestBoard(unittest.TestCase):
+
+	def test_wins(self):
+		# Vertical, horizontal, and both diagonals
+		for moves in ['0101010', '0011223', '01122323363', '65544343303']:
+			b = Board()
+			b.create_board(moves)
+			self.assertTrue(b.has_winner())
+			self.assertEqual(b.game_value(), 1)
+
+	def test_no_win_across_columns(self):
+		# Three checkers on top of one column and one at the bottom of the next aren't a line
+		b = Board()
+		b.create_board('0000001001')
+		self.assertFalse(b.has_winner())
+
+	def test_undo(self):
+		b = Board()
+		b.create_board('3344')
+		before = repr(b)
+		b.perform_move(5, 'X')
+		b.undo_move(5)
+		self.assertEqual(repr(b), before)
+		self.assertFalse(b.has_winner())
+
+	def test_full_column(self):
+		b = Board()
+		b.create_board('000000')
+		self.assertFalse(b.allows_move(0))
+		self.assertEqual(b.available_moves(), [1, 2, 3, 4, 5, 6])
+
+	def test_draw(self):
+		b = Board(2, 2)
+		b.create_board('0011')
+		self.assertTrue(b.is_draw())
+		self.assertEqual(b.game_value(), 0)
+
+	def test_large_board(self):
+		b = Board(20, 15)
+		b.create_board('')
+		for col in range(16, 20):
+			b.perform_move(col, 'O')
+		self.assertTrue(b.has_winner())
+		self.assertEqual(b.board[14][16:], ['O', 'O', 'O', 'O'])
+
+	def test_evaluate(self):
+		b = Board()
+		self.assertEqual(b.evaluate(), 0)
+		b.perform_move(3, 'X')
+		center = b.evaluate()
+		b.undo_move(3)
+		b.perform_move(0, 'X')
+		self.assertGreater(center, b.evaluate())
+		b = Board()
+		b.create_board('0343')
+		self.assertLess(b.evaluate(), 0)
+		self.assertGreater(b.evaluate(), -1)
+
+	def test_evaluate_symmetric(self):
+		b = Board()
+		b.create_board('3342561')
+		m = Board()
+		m.create_board(''.join(str(6-int(c)) for c in '3342561'))
+		self.assertEqual(b.evaluate(), m.evaluate())
+
+	def test_winning_cells(self):
+		b = Board()
+		b.create_board('010203')
+		# 'X' threatens the top of column 0 and 'O' the bottom of column 4
+		self.assertEqual(b.winning_cells('X'), 1 << 3)
+		self.assertEqual(b.winning_cells('O'), 1 << (4*7))
+
+	def test_threats(self):
+		b = Board()
+		b.create_board('001122')
+		self.assertEqual(b.playable(), sum(1 << (col*7) for col in range(3, 7)) | (1 << 2) | (1 << 9) | (1 << 16))
+		# 'X' wins in column 3, which is also right below the threat of 'O'
+		wins, blocks, unsafe = b.threats('X')
+		self.assertEqual((wins, blocks, unsafe), (1 << 3*7, 0, 1 << 3*7))
+		# 'O' must block column 3
+		self.assertEqual(b.columns(b.threats('O')[1]), [3])
+		# 'O' threatens the second cell of column 4, so 'X' must not play below it
+		b = Board()
+		b.create_board('65153336')
+		wins, blocks, unsafe = b.threats('X')
+		self.assertEqual((wins, blocks), (0, 0))
+		self.assertEqual(b.columns(unsafe), [4])
+
+	def test_connect_k(self):
+		b = Board(5, 4, 3)
+		b.create_board('01010')
+		self.assertTrue(b.has_winner())
+		b = Board(15, 15, 5)
+		for col in range(5, 9):
+			b.perform_move(col, 'X')
+			self.assertFalse(b.has_winner())
+		# The line is completed in the middle
+		self.assertEqual(b.winning_cells('X'), (1 << 4*16) | (1 << 9*16))
+		b.perform_move(4, 'X')
+		self.assertTrue(b.has_winner())
+		self.assertEqual(b.copy().k, 5)
+
+	def test_connect_k_diagonals(self):
+		for k in (3, 5):
+			# A staircase of checkers of 'X' along each diagonal, supported by checkers of 'O'
+			b = Board(8, 8, k)
+			for col in range(k):
+				for _ in range(col):
+					b.perform_move(col, 'O')
+				b.perform_move(col, 'X')
+			self.assertTrue(b.has_winner())
+			b = Board(8, 8, k)
+			for col in range(k):
+				for _ in range(k-1-col):
+					b.perform_move(col, 'O')
+				b.perform_move(col, 'X')
+			self.assertTrue(b.has_winner())
+
+	def test_cell_lines(self):
+		# The bottom left cell of 7x6 is on one horizontal, one vertical and one diagonal line of four
+		self.assertEqual(len(Board()._cell_lines[0]), 3)
+		# A central cell of 15x15 is on 5 lines of five in each of the four directions
+		self.assertEqual(len(Board(15, 15, 5)._cell_lines[7*16+7]), 20)
+
+	def test_evaluate_k(self):
+		b = Board(9, 9, 5)
+		self.assertEqual(b.evaluate(), 0)
+		b.create_board('384858')
+		three = b.evaluate()
+		self.assertGreater(three, 0)
+		b.create_board('68')
+		# 'X' has four of a line of five with both ends open; 'O' has nothing in a row
+		self.assertGreater(b.evaluate(), three)
+		m = Board(9, 9, 5)
+		m.create_board('50403020')
+		self.assertEqual(b.evaluate(), m.evaluate())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import numpy as np
+from connect4 import Board
+from mcts import MCTS, board_array, rollouts
+
+class TestRollouts(unittest.TestCase):
+
+	def test_board_array(self):
+		b = Board()
+		b.create_board('3343')
+		cells = board_array(b)
+		self.assertEqual(cells[0].tolist(), [0, 0, 0, 1, 1, 0, 0])
+		self.assertEqual(cells[:3, 3].tolist(), [1, -1, -1])
+
+	def test_results(self):
+		rng = np.random.default_rng(0)
+		# The last empty cell can't complete a line of four
+		b = Board()
+		b.create_board('0123456'*2 + '1234560'*2 + '0123456' + '1234560')
+		b.undo_move(0)
+		self.assertTrue((rollouts(b, 'O', 50, rng) == 0).all())
+		# 'X' wins in column 3 next unless 'O' blocks it
+		b = Board()
+		b.create_board('0011224')
+		results = rollouts(b, 'O', 500, rng)
+		self.assertTrue(np.isin(results, (1, -1, 0)).all())
+		self.assertGreater((results == 1).mean(), 0.5)
+
+	def test_random_games_end(self):
+		rng = np.random.default_rng(1)
+		results = rollouts(Board(), 'X', 2000, rng)
+		# 'X' wins more random games than 'O' from the empty board
+		self.assertGreater((results == 1).sum(), (results == -1).sum())
+
+class TestMCTS(unittest.TestCase):
+
+	def test_wins(self):
+		for moves, move in [('001122', 3), ('3434344', 3), ('665544', 3)]:
+			b = Board()
+			player = b.create_board(moves)
+			score, bestMove, playouts = MCTS(iterations=100, batch_size=16, seed=0, reuse=False).search(b, player)
+			self.assertEqual(bestMove, move, moves)
+			self.assertEqual(b.num_moves, len(moves))
+
+	def test_blocks(self):
+		for moves, move in [('00112', 3), ('34343', 3)]:
+			b = Board()
+			player = b.create_board(moves)
+			score, bestMove, playouts = MCTS(iterations=200, batch_size=16, seed=0, reuse=False).search(b, player)
+			self.assertEqual(bestMove, move, moves)
+
+	def test_terminal(self):
+		b = Board()
+		player = b.create_board('0101010')
+		self.assertEqual(MCTS().search(b, player), (1, None, 0))
+
+	def test_reuse(self):
+		engine = MCTS(iterations=50, batch_size=16, seed=0)
+		b = Board()
+		score, move, playouts = engine.search(b, 'X')
+		b.perform_move(move, 'X')
+		b.perform_move(3, 'O')
+		expected = next(child for child in engine.root.children if child.move == move)
+		expected = next(child for child in expected.children if child.move == 3)
+		visits = expected.visits
+		engine.search(b, 'X')
+		self.assertIs(engine.root, expected)
+		self.assertIsNone(engine.root.parent)
+		self.assertEqual(engine.root.visits, visits + 50*engine.batch_size)
+
+	def test_time_limit(self):
+		b = Board()
+		score, move, playouts = MCTS(time_limit=0.2, seed=0).search(b, 'X')
+		self.assertIn(move, range(7))
+		self.assertGreater(playouts, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
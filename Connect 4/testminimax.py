@@ -2,6 +2,7 @@ from math import inf
 import random
 import unittest 
 from connect4 import Board
+from stats import SearchStats
 
 def opponent(current_player):
 	if current_player == "X":
@@ -9,25 +10,33 @@ def opponent(current_player):
 	else:
 		return "X"
 
-def minimax(board, player, ply):
+def minimax(board, player, ply, stats=None):
 
 	"""
 	Function receives an instances of the Board class, the player who is to act at this state (either X or O),
 	and the maximum search depth given by the variable ply.
 
+	stats is an optional SearchStats that records the nodes and leaves of the search.
+
 	The function returns three values: 
 	1. the score of the optimal move for the player who is to act;
 	2. the optimal move
 	3. the total number of nodes expanded to find the optimal move 
 	"""
 	
+	if stats is not None:
+		stats.visit(ply)
 	if board.is_terminal():
 		# If the current state is terminal, return the game value and no move
+		if stats is not None:
+			stats.leaf(ply)
 		game_value = board.game_value()
 		return game_value, None, 0
 	elif ply == 0:
-		# If maximum search depth is reached, return neutral values
-		return 0, 0, 0
+		# If maximum search depth is reached, return the heuristic value of the position
+		if stats is not None:
+			stats.leaf(ply)
+		return board.evaluate(), 0, 0
 	
 	if player == 'X':
 		# If the current player is X, initialize v as negative infinity
@@ -38,10 +47,12 @@ def minimax(board, player, ply):
 
 	best_move = None		# Initialize the best move as None
 	total_nodes = 1			# Start with 1 node already expanded for the current state
+	if stats is not None:
+		stats.node(ply)
 
 	for move in board.available_moves():
 		board.perform_move(move, player)					# Make the move on the board
-		result = minimax(board, opponent(player), ply - 1)	# Call minimax with opponent player
+		result = minimax(board, opponent(player), ply - 1, stats)	# Call minimax with opponent player
 		board.undo_move(move)								# Undo the move to backtrack
 		score = result[0]									# Extract score and nodes_expanded
 		nodes_expanded = result[2]
@@ -215,6 +226,16 @@ class TestMinMaxDepth5(unittest.TestCase):
 		self.assertEqual(bestMove, 3)
 		print(expansions)		
 
+class TestSearchStats(unittest.TestCase):
+
+	def test_branching(self):
+		stats = SearchStats()
+		expansions = minimax(Board(), 'X', 3, stats)[2]
+		self.assertEqual(expansions, 1 + 7 + 49)
+		self.assertEqual(stats.nodes, {3: 1, 2: 7, 1: 49})
+		self.assertEqual(stats.branching_factors(), {3: 7, 2: 7, 1: 7})
+		self.assertEqual(stats.leaves, {0: 343})
+
 
 if __name__ == '__main__':
     unittest.main()
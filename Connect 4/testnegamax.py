@@ -0,0 +1,80 @@
+import unittest
+from alphabeta import alpha_beta, opponent
+from connect4 import Board
+from negamax import pvs, mtdf
+from ordering import CenterFirst, KillerHistory
+from testalphabeta import DEPTH5
+from transposition import TranspositionTable
+from math import inf
+
+CASES = [('010101', 1, 1, 0), ('001122', 1, 1, 3), ('335566', 1, 1, 4), ('3445655606', 1, 1, 6),
+		 ('34232210101', 1, -1, 1), ('23445655606', 1, -1, 6), ('33425614156', 1, -1, 2),
+		 ('303111426551', 3, 1, 2), ('23343566520605001', 3, -1, 6), ('10322104046663', 3, 1, 0),
+		 ('00224460026466', 3, 1, 3), ('102455500041526', 3, -1, 1), ('01114253335255', 3, 1, 2),
+		 ('0325450636643', 3, -1, 5)] + [(moves, 5, score, move) for moves, score, move in DEPTH5]
+
+class TestPVS(unittest.TestCase):
+
+	def test_cases(self):
+		for moves, ply, score, move in CASES:
+			b = Board()
+			player = b.create_board(moves)
+			bestScore, bestMove, expansions = pvs(b, player, ply)
+			self.assertEqual(bestScore, score)
+			self.assertEqual(bestMove, move)
+
+	def test_agrees_with_alpha_beta(self):
+		for moves in ['', '3', '33', '3342', '334256', '01234560']:
+			b = Board()
+			player = b.create_board(moves)
+			expected = alpha_beta(b, player, -inf, inf, 5)[0]
+			self.assertAlmostEqual(pvs(b, player, 5)[0], expected)
+			self.assertAlmostEqual(pvs(b, player, 5, TranspositionTable(), KillerHistory())[0], expected)
+
+class TestMTDf(unittest.TestCase):
+
+	def test_cases(self):
+		for moves, ply, score, move in CASES:
+			b = Board()
+			player = b.create_board(moves)
+			bestScore, bestMove, expansions = mtdf(b, player, ply)
+			self.assertEqual(bestScore, score)
+			b.perform_move(bestMove, player)
+			# The move reaches the score of the position
+			self.assertEqual(alpha_beta(b, opponent(player), -inf, inf, ply - 1)[0], score)
+
+	def test_agrees_with_alpha_beta(self):
+		for moves in ['', '3', '33', '3342', '334256', '01234560']:
+			b = Board()
+			player = b.create_board(moves)
+			expected = alpha_beta(b, player, -inf, inf, 5)[0]
+			self.assertAlmostEqual(mtdf(b, player, 5)[0], expected)
+			self.assertAlmostEqual(mtdf(b, player, 5, 0, None, CenterFirst())[0], expected)
+
+	def expansions(self, moves, ply):
+		# Each engine gets its own table and the same ordering; MTD(f) starts from the score of a search two plies
+		# shallower, and the nodes of that search count towards its total
+		b = Board()
+		player = b.create_board(moves)
+		full = alpha_beta(b, player, -inf, inf, ply, TranspositionTable(), CenterFirst())[2]
+		null = pvs(b, player, ply, TranspositionTable(), CenterFirst())[2]
+		table, ordering = TranspositionTable(), CenterFirst()
+		guess, _, shallow = pvs(b, player, ply - 2, table, ordering)
+		return full, null, shallow + mtdf(b, player, ply, guess, table, ordering)[2]
+
+	def test_pvs_expansions(self):
+		# Balanced openings where the first child searched is usually the best, so the null windows of its siblings
+		# fail low without re-searches: 21116 nodes for alpha_beta against 11653 for PVS
+		totals = [sum(counts) for counts in zip(*(self.expansions(moves, 7) for moves in ['3342', '3324']))]
+		self.assertLess(totals[1], 0.6 * totals[0])
+
+	def test_mtdf_expansions(self):
+		# Positions where the center column is a poor first move, so PVS keeps re-searching while MTD(f) only
+		# moves its bound a few times: 25192 nodes for alpha_beta against 7158 for MTD(f)
+		positions = ['3344', '2233', '43231033655', '536432111330']
+		totals = [sum(counts) for counts in zip(*(self.expansions(moves, 7) for moves in positions))]
+		self.assertLess(totals[2], 0.4 * totals[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from alphabeta import iterative_deepening
+from connect4 import Board
+from openingbook import OpeningBook, book_positions, build_book
+from negamax import pvs
+
+class TestOpeningBook(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		cls.directory = tempfile.TemporaryDirectory()
+		cls.filename = os.path.join(cls.directory.name, 'book.bin')
+		cls.size = build_book(cls.filename, 2, 4)
+		cls.book = OpeningBook(cls.filename)
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.book.close()
+		cls.directory.cleanup()
+
+	def test_positions(self):
+		# Mirror images are folded: 1 + 4 + 25 positions instead of 1 + 7 + 49
+		self.assertEqual([len(book_positions(depth)) for depth in range(3)], [1, 5, 30])
+		self.assertEqual(self.size, 30)
+		self.assertEqual(self.book.size, 30)
+
+	def test_lookup(self):
+		for moves in ['', '0', '3', '12', '65']:
+			b = Board()
+			player = b.create_board(moves)
+			value, move = self.book.lookup(b)
+			self.assertAlmostEqual(value, pvs(b, player, 4)[0], places=4)
+			# The stored move reaches the value of the position
+			b.perform_move(move, player)
+			self.assertAlmostEqual(pvs(b, 'O' if player == 'X' else 'X', 3)[0], value, places=4)
+
+	def test_missing(self):
+		b = Board()
+		b.create_board('333')
+		self.assertIsNone(self.book.lookup(b))
+		self.assertIsNone(self.book.lookup(Board(6, 5)))
+
+	def test_iterative_deepening(self):
+		b = Board()
+		player = b.create_board('3')
+		value, move = self.book.lookup(b)
+		self.assertEqual(iterative_deepening(b, player, 10, None, None, None, self.book), (value, move, []))
+
+	def test_board_size(self):
+		# The keys of 9x6 boards take 63 bits, the most a record holds
+		filename = os.path.join(self.directory.name, 'wide.bin')
+		self.assertEqual(build_book(filename, 1, 1, 9, 6), 6)
+		book = OpeningBook(filename)
+		b = Board(9, 6)
+		b.create_board('8')
+		self.assertIsNotNone(book.lookup(b))
+		book.close()
+		# 8x8 boards need 72 bits
+		filename = os.path.join(self.directory.name, 'large.bin')
+		with self.assertRaises(ValueError):
+			build_book(filename, 1, 1, 8, 8)
+		self.assertFalse(os.path.exists(filename))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import sys
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from alphabeta import alpha_beta
+from connect4 import Board
+from parallel import benchmark, parallel_alpha_beta
+from testalphabeta import DEPTH5
+from math import inf
+
+class TestParallel(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		cls.executor = ProcessPoolExecutor(2)
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.executor.shutdown()
+
+	def test_depth5(self):
+		for moves, score, move in DEPTH5:
+			b = Board()
+			player = b.create_board(moves)
+			bestScore, bestMove, expansions = parallel_alpha_beta(b, player, 5, self.executor)
+			self.assertEqual(bestScore, score)
+			self.assertEqual(bestMove, move)
+
+	def test_same_as_serial(self):
+		for moves in ['', '3', '334', '3342561']:
+			b = Board()
+			player = b.create_board(moves)
+			expected = alpha_beta(b, player, -inf, inf, 4)
+			self.assertEqual(parallel_alpha_beta(b, player, 4, self.executor)[:2], expected[:2])
+
+	def test_ply(self):
+		b = Board()
+		player = b.create_board('33')
+		self.assertEqual(parallel_alpha_beta(b, player, 1, self.executor)[:2], alpha_beta(b, player, -inf, inf, 1)[:2])
+		for ply in [0, -1]:
+			with self.assertRaises(ValueError):
+				parallel_alpha_beta(b, player, ply, self.executor)
+
+
+if __name__ == '__main__':
+	if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+		# Usage: python testparallel.py benchmark [processes]
+		processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+		benchmark([moves for moves, _, _ in DEPTH5], 5, processes)
+		benchmark(['', '3', '33', '3342'], 7, processes)
+	else:
+		unittest.main()
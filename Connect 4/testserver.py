@@ -0,0 +1,125 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from server import GameServer
+
+class TestGameServer(unittest.TestCase):
+
+	def setUp(self):
+		self.server = GameServer(max_workers=1)
+
+	def tearDown(self):
+		self.server.shutdown()
+
+	def run_client(self, client):
+		"""Runs the coroutine client(reader, writer) against the server on a temporary Unix socket."""
+		async def main():
+			with tempfile.TemporaryDirectory() as directory:
+				path = os.path.join(directory, 'server.sock')
+				done = asyncio.Event()
+				async def connection(reader, writer):
+					await self.server.client(reader, writer)
+					done.set()
+				server = await asyncio.start_unix_server(connection, path)
+				async with server:
+					reader, writer = await asyncio.open_unix_connection(path)
+					result = await client(reader, writer)
+					writer.close()
+					# Lets the server see the end of the connection
+					await done.wait()
+					return result
+		return asyncio.run(main())
+
+	def test_game(self):
+		async def client(reader, writer):
+			responses = []
+			for request in ('NEW X 0.05', 'MOVE 1 3', 'SHOW 1', 'MOVE 1 9', 'QUIT 1', 'SHOW 1', 'JUMP'):
+				writer.write((request + '\n').encode())
+				responses.append((await reader.readline()).decode().split())
+			return responses
+		responses = self.run_client(client)
+		self.assertEqual(responses[0], ['STATE', '1', '-', 'X'])
+		self.assertEqual(responses[1][:2], ['STATE', '1'])
+		self.assertEqual(responses[1][2][:2], '3,')
+		self.assertEqual(responses[1][3], 'X')
+		self.assertEqual(responses[2], responses[1])
+		self.assertEqual(responses[3][0], 'ERROR')
+		self.assertEqual(responses[4], ['OK', '1'])
+		self.assertEqual(responses[5][0], 'ERROR')
+		self.assertEqual(responses[6][0], 'ERROR')
+		self.assertEqual(self.server.games, {})
+
+	def test_invalid_time(self):
+		async def client(reader, writer):
+			responses = []
+			for seconds in ('nan', 'inf', '-5', '0', '10.5', 'ten', '10'):
+				writer.write(('NEW X %s\n' % seconds).encode())
+				responses.append((await reader.readline()).decode().split())
+			return responses
+		responses = self.run_client(client)
+		for response in responses[:-1]:
+			self.assertEqual(response[0], 'ERROR')
+		self.assertEqual(responses[-1], ['STATE', '1', '-', 'X'])
+
+	def test_engine_failure(self):
+		async def client(reader, writer):
+			responses = []
+			for request in ('NEW X 0.05', 'MOVE 1 3', 'SHOW 1', 'NEW O 0.05', 'SHOW 2'):
+				if request == 'MOVE 1 3':
+					# The engine moves can't be searched any more
+					self.server.shutdown()
+				writer.write((request + '\n').encode())
+				responses.append((await reader.readline()).decode().split())
+			return responses
+		responses = self.run_client(client)
+		self.assertEqual(responses[1][0], 'ERROR')
+		# The move of the client is taken back, so the client can play again
+		self.assertEqual(responses[2], ['STATE', '1', '-', 'X'])
+		# The game whose first engine move failed isn't kept
+		self.assertEqual(responses[3][0], 'ERROR')
+		self.assertEqual(responses[4], ['ERROR', 'unknown', 'game', '2'])
+
+	def test_play_to_the_end(self):
+		async def client(reader, writer):
+			writer.write(b'NEW O 0.02 4 4 3\n')
+			response = (await reader.readline()).decode().split()
+			game_id = response[1]
+			while response[3] == 'O':
+				moves = [int(col) for col in response[2].split(',')]
+				col = next(col for col in range(4) if moves.count(col) < 4)
+				writer.write(('MOVE %s %d\n' % (game_id, col)).encode())
+				response = (await reader.readline()).decode().split()
+			return response
+		response = self.run_client(client)
+		self.assertIn(response[3], ('X-WINS', 'O-WINS', 'DRAW'))
+
+	def test_concurrent_games(self):
+		async def client(reader, writer):
+			# The engine moves first in every game; the games are served while their searches wait for the pool
+			for _ in range(40):
+				writer.write(b'NEW O 0.01\n')
+			responses = [(await reader.readline()).decode().split() for _ in range(40)]
+			# A slow search doesn't hold up the other games
+			writer.write(b'NEW X 0.5\n')
+			game_id = (await reader.readline()).decode().split()[1]
+			writer.write(('MOVE %s 3\n' % game_id).encode())
+			writer.write(('SHOW %s\n' % game_id).encode())
+			start = time.perf_counter()
+			shown = (await reader.readline()).decode().split()
+			elapsed = time.perf_counter() - start
+			moved = (await reader.readline()).decode().split()
+			return responses, shown, elapsed, moved
+		responses, shown, elapsed, moved = self.run_client(client)
+		self.assertEqual(len({response[1] for response in responses}), 40)
+		for response in responses:
+			self.assertEqual(len(response[2].split(',')), 1)
+			self.assertEqual(response[3], 'O')
+		self.assertEqual(shown[2:], ['3', 'O'])
+		self.assertLess(elapsed, 0.3)
+		self.assertEqual(len(moved[2].split(',')), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
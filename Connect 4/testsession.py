@@ -0,0 +1,111 @@
+import unittest
+from unittest import mock
+from connect4 import Board
+from session import EngineSession, MIN_SEARCH_TIME
+from alphabeta import iterative_deepening
+
+class TestEngineSession(unittest.TestCase):
+
+	def test_keeps_table(self):
+		session = EngineSession(time_limit=0.05, ponder=False)
+		b = Board()
+		player = b.create_board('33')
+		move = session.choose_move(b, player)
+		self.assertIn(move, b.available_moves())
+		self.assertEqual(b.num_moves, 2)
+		stores = session.table.stores
+		self.assertGreater(stores, 0)
+		b.perform_move(move, player)
+		b.perform_move(3, 'O')
+		session.choose_move(b, player)
+		self.assertGreater(session.table.stores, stores)
+		self.assertFalse(session.is_pondering())
+
+	def test_prediction_hit(self):
+		# The ponder search ends by itself at max_ply, and with no time per move the pondered move is played
+		session = EngineSession(time_limit=0, max_ply=4)
+		b = Board()
+		b.create_board('33')
+		b.perform_move(session.choose_move(b, 'X'), 'X')
+		self.assertTrue(session.wait(10))
+		b.perform_move(session.prediction, 'O')
+		with mock.patch('session.iterative_deepening') as search:
+			move = session.choose_move(b, 'X')
+		search.assert_not_called()
+		self.assertIn(move, b.available_moves())
+		self.assertEqual((session.hits, session.misses), (1, 0))
+		session.stop()
+		self.assertFalse(session.is_pondering())
+
+	def test_hit_without_result(self):
+		# Pondering that is stopped before it completes a search
+		session = EngineSession(time_limit=0)
+		b = Board()
+		b.create_board('33')
+		with mock.patch.object(EngineSession, '_ponder', lambda self, board, player, stop: stop.wait()):
+			b.perform_move(session.choose_move(b, 'X'), 'X')
+			self.assertTrue(session.is_pondering())
+			b.perform_move(session.prediction, 'O')
+			with mock.patch('session.iterative_deepening', wraps=iterative_deepening) as search:
+				move = session.choose_move(b, 'X')
+			session.stop()
+		# The move is searched instead of falling back to the first available move
+		self.assertEqual(session.hits, 1)
+		self.assertEqual(search.call_args[0][2], MIN_SEARCH_TIME)
+		self.assertIn(move, b.available_moves())
+
+	def test_prediction_miss(self):
+		session = EngineSession(time_limit=0.1)
+		b = Board()
+		b.create_board('33')
+		b.perform_move(session.choose_move(b, 'X'), 'X')
+		reply = next(col for col in b.available_moves() if col != session.prediction)
+		b.perform_move(reply, 'O')
+		self.assertIn(session.choose_move(b, 'X'), b.available_moves())
+		self.assertEqual((session.hits, session.misses), (0, 1))
+		session.stop()
+
+	def test_mcts_hit(self):
+		session = EngineSession('mcts', time_limit=0, seed=0)
+		b = Board()
+		b.create_board('33')
+		b.perform_move(session.choose_move(b, 'X'), 'X')
+		self.assertTrue(session.is_pondering())
+		b.perform_move(0, 'O')
+		# Any reply is in the tree grown while pondering
+		move = session.choose_move(b, 'X')
+		self.assertIn(move, b.available_moves())
+		self.assertEqual(session.hits, 1)
+		session.stop()
+
+class TestHostGame(unittest.TestCase):
+
+	def test_players(self):
+		b = Board()
+		with mock.patch('builtins.input', side_effect=list('0101010')), mock.patch('builtins.print'):
+			moves = b.host_game()
+		self.assertEqual(moves, '0101010')
+		self.assertEqual(b.game_value(), 1)
+
+	def test_engines(self):
+		b = Board(5, 4)
+		engines = {'X': EngineSession(time_limit=0.02, ponder=False), 'O': EngineSession('mcts', time_limit=0.02, seed=0)}
+		with mock.patch('builtins.print'):
+			moves = b.host_game(engines=engines)
+		self.assertTrue(b.is_terminal())
+		self.assertEqual(len(moves), b.num_moves)
+		self.assertFalse(engines['O'].is_pondering())
+
+	def test_engine_against_player(self):
+		b = Board()
+		session = EngineSession(time_limit=0.05)
+		# The player tries columns 0 and 1 in turn until the game ends
+		with mock.patch('builtins.input', side_effect=list('01'*100)), mock.patch('builtins.print'):
+			moves = b.host_game('X', {'O': session})
+		self.assertEqual(b.game_value(), -1)
+		self.assertEqual(len(moves), b.num_moves)
+		self.assertFalse(session.is_pondering())
+
+
+if __name__ == '__main__':
+    unittest.main()
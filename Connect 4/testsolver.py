@@ -0,0 +1,89 @@
+import time
+import unittest
+from alphabeta import alpha_beta
+from connect4 import Board
+from ordering import ThreatsFirst
+from solver import Position, Solver, solve
+from testalphabeta import DEPTH5
+from transposition import TranspositionTable
+from math import inf
+
+# Positions of the alpha_beta tests with the depth of the test and the value it found
+CASES = [('010101', 1, 1), ('001122', 1, 1), ('335566', 1, 1), ('3445655606', 1, 1), ('34232210101', 1, -1),
+		 ('23445655606', 1, -1), ('33425614156', 1, -1), ('303111426551', 3, 1), ('23343566520605001', 3, -1),
+		 ('10322104046663', 3, 1), ('00224460026466', 3, 1), ('102455500041526', 3, -1), ('01114253335255', 3, 1),
+		 ('0325450636643', 3, -1)] + [(moves, 5, score) for moves, score, _ in DEPTH5]
+
+class TestSolver(unittest.TestCase):
+
+	def test_agrees_with_alpha_beta(self):
+		solver = Solver()
+		for moves, ply, expected in CASES:
+			value, distance, move = solve(moves, solver)
+			self.assertEqual(value, expected)
+			# alpha_beta found the win within ply moves
+			self.assertLessEqual(distance, ply)
+			b = Board()
+			player = b.create_board(moves)
+			b.perform_move(move, player)
+			if distance > 1:
+				self.assertEqual(alpha_beta(b, 'O' if player == 'X' else 'X', -inf, inf, distance - 1)[0], value)
+			else:
+				self.assertTrue(b.has_winner())
+
+	def test_endgames(self):
+		# Near the end of the game, a full-depth alpha_beta finds the exact value too
+		solver = Solver()
+		for moves, expected in [('4612314042566104451205504051', (1, 11, 2)),
+								('020651302050630521314236445315', (-1, 12, 2)),
+								('3530101310350005362351165254', (-1, 6, 1)),
+								('302332516013511534500135105466', (0, 12, 2))]:
+			b = Board()
+			player = b.create_board(moves)
+			self.assertEqual(solve(moves, solver), expected)
+			value, distance, move = expected
+			self.assertEqual(alpha_beta(b, player, -inf, inf, 42 - len(moves), TranspositionTable(), ThreatsFirst())[0], value)
+
+	def test_invalid(self):
+		with self.assertRaises(ValueError):
+			solve('0000000')
+		with self.assertRaises(ValueError):
+			solve('0101010')
+
+	def test_game_over(self):
+		# Strings whose last move wins have no Position, whichever line the move completes
+		for moves in ['0101010', '1122334', '01122323533']:
+			b = Board()
+			b.create_board(moves)
+			self.assertTrue(b.has_winner())
+			with self.assertRaises(ValueError):
+				Position.from_moves(moves)
+			# One move less is a game in progress
+			self.assertEqual(Position.from_moves(moves[:-1]).moves, len(moves) - 1)
+		# A drawn game ends on a full board, which is a Position
+		moves = '452222604310335665144403001154210626331556'
+		self.assertEqual(Position.from_moves(moves).moves, 42)
+		self.assertEqual(solve(moves), (0, 0, None))
+
+
+	def test_solve_time(self):
+		# Representative positions of the range documented in Solver: a drawn position after 14 moves, the slowest
+		# of the 12 move and later samples at about 2 seconds, and a won one after 7 moves
+		for moves, expected, nodes in [('01212001120531', (0, 28, 2), 251943), ('3232415', (1, 24, 6), 268194)]:
+			solver = Solver()
+			start = time.perf_counter()
+			self.assertEqual(solve(moves, solver), expected)
+			self.assertLess(time.perf_counter() - start, 10)
+			self.assertEqual(solver.nodes, nodes)
+
+	def test_undo(self):
+		position = Position.from_moves('3232415')
+		key, moves = position.key(), position.moves
+		move = position.possible() & position.column_mask(3)
+		position.play_bit(move)
+		position.undo_bit(move)
+		self.assertEqual((position.key(), position.moves), (key, moves))
+
+
+if __name__ == '__main__':
+    unittest.main()
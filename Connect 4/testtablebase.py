@@ -0,0 +1,92 @@
+import os
+import random
+import tempfile
+import unittest
+from alphabeta import alpha_beta, iterative_deepening, opponent
+from connect4 import Board
+from tablebase import Tablebase, build_tablebase
+from math import inf
+
+def random_position(rng, width, height, num_moves):
+	"""Returns a board and the player to act after num_moves random moves, or None if the game ended."""
+	b = Board(width, height)
+	player = 'X'
+	for _ in range(num_moves):
+		b.perform_move(rng.choice(b.available_moves()), player)
+		player = opponent(player)
+		if b.is_terminal():
+			return None
+	return b, player
+
+class TestTablebase(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		cls.directory = tempfile.TemporaryDirectory()
+		cls.full = os.path.join(cls.directory.name, 'full.bin')
+		cls.partial = os.path.join(cls.directory.name, 'partial.bin')
+		cls.size = build_tablebase(cls.full, 4, 4)
+		build_tablebase(cls.partial, 4, 4, 6)
+		cls.tablebase = Tablebase(cls.full)
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.tablebase.close()
+		cls.directory.cleanup()
+
+	def test_size(self):
+		self.assertEqual(self.size, 201755)
+		# 2 bits per position after the header and the index
+		self.assertEqual(os.path.getsize(self.full), 16 + 8*5**4 + (self.size+3)//4)
+
+	def test_agrees_with_alpha_beta(self):
+		rng = random.Random(0)
+		for _ in range(200):
+			position = random_position(rng, 4, 4, rng.randint(4, 15))
+			if position is None:
+				continue
+			b, player = position
+			expected = alpha_beta(b, player, -inf, inf, 16 - b.num_moves)[0]
+			self.assertEqual(self.tablebase.lookup(b, player), expected)
+			value, move = self.tablebase.probe(b, player)
+			# The move keeps the value of the position
+			b.perform_move(move, player)
+			if b.is_terminal():
+				self.assertEqual(b.game_value(), value)
+			else:
+				self.assertEqual(self.tablebase.lookup(b, opponent(player)), value)
+
+	def test_empty_board(self):
+		# 4x4 Connect 4 is a draw
+		self.assertEqual(self.tablebase.lookup(Board(4, 4), 'X'), 0)
+
+	def test_missing(self):
+		b = Board(4, 4)
+		b.create_board('0120')
+		self.assertIsNone(self.tablebase.lookup(b, 'O'))		# 'X' is to act
+		self.assertIsNone(self.tablebase.lookup(Board(5, 4), 'X'))
+		partial = Tablebase(self.partial)
+		self.assertIsNone(partial.lookup(b, 'X'))
+		b.create_board('1223301233')
+		self.assertEqual(partial.lookup(b, 'X'), self.tablebase.lookup(b, 'X'))
+		partial.close()
+
+	def test_search(self):
+		# Searches with the partial tablebase stop at positions with 6 empty cells
+		partial = Tablebase(self.partial)
+		rng = random.Random(1)
+		for _ in range(20):
+			position = random_position(rng, 4, 4, 6)
+			if position is None:
+				continue
+			b, player = position
+			score, move, nodes = alpha_beta(b, player, -inf, inf, 10)
+			score_tb, move_tb, nodes_tb = alpha_beta(b, player, -inf, inf, 10, tablebase=partial)
+			self.assertEqual(score_tb, score)
+			self.assertLess(nodes_tb, nodes)
+			self.assertEqual(iterative_deepening(b, player, 10, None, None, None, None, partial)[0], score)
+		partial.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
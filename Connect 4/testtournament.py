@@ -0,0 +1,56 @@
+import json
+import unittest
+from connect4 import Board
+from tournament import play_game, elo, tournament, compare
+
+FAST = [{'name': 'alphabeta-1', 'engine': 'alphabeta', 'ply': 1},
+		{'name': 'alphabeta-3', 'engine': 'alphabeta', 'ply': 3, 'table': True, 'ordering': 'killer'},
+		{'name': 'minimax-2', 'engine': 'minimax', 'ply': 2}]
+
+class TestTournament(unittest.TestCase):
+
+	def test_play_game(self):
+		game = play_game(FAST[1], FAST[0], '33')
+		b = Board()
+		b.create_board(game['moves'])
+		self.assertTrue(b.is_terminal())
+		self.assertEqual(game['result'], b.game_value())
+		self.assertTrue(game['moves'].startswith('33'))
+		stats = game['stats']
+		self.assertEqual(stats['X']['moves'] + stats['O']['moves'], len(game['moves']) - 2)
+		self.assertGreater(stats['X']['nodes'], stats['O']['nodes'])
+
+	def test_elo(self):
+		ratings = elo([('a', 'b', 1)]*10 + [('a', 'b', 0.5)]*10, ['a', 'b'])
+		self.assertAlmostEqual(ratings['a'], -ratings['b'])
+		self.assertGreater(ratings['a'], 0)
+		# Equal results give equal ratings
+		ratings = elo([('a', 'b', 1), ('b', 'a', 1), ('a', 'c', 0.5)], ['a', 'b', 'c'])
+		self.assertEqual(ratings, {'a': 0, 'b': 0, 'c': 0})
+		# A player who wins every game gets a finite rating above the others
+		ratings = elo([('a', 'b', 1)]*5 + [('b', 'c', 1)]*5, ['a', 'b', 'c'])
+		self.assertGreater(ratings['a'], ratings['b'])
+		self.assertGreater(ratings['b'], ratings['c'])
+
+	def test_report(self):
+		report = tournament(FAST, openings=1, processes=2)
+		self.assertEqual(len(report['games']), 6)
+		for name, summary in report['engines'].items():
+			self.assertEqual(summary['games'], 4)
+			self.assertEqual(summary['wins'] + summary['draws'] + summary['losses'], 4)
+			self.assertGreater(summary['nodes_per_second'], 0)
+		self.assertIsNone(report['engines']['alphabeta-1']['branching_factor'])
+		self.assertGreater(report['engines']['minimax-2']['branching_factor'], 1)
+		# The report can be written as JSON
+		self.assertEqual(json.loads(json.dumps(report)), report)
+
+		self.assertEqual(compare(report, report), [])
+		slower = json.loads(json.dumps(report))
+		slower['engines']['minimax-2']['nodes_per_second'] //= 2
+		slower['engines']['minimax-2']['elo'] -= 100
+		self.assertEqual([field for name, field, before, after in compare(report, slower)],
+						 ['nodes_per_second', 'elo'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,255 @@
+import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from alphabeta import alpha_beta, iterative_deepening, opponent
+from connect4 import Board
+from mcts import MCTS
+from negamax import pvs, mtdf
+from ordering import CenterFirst, ThreatsFirst, KillerHistory
+from testminimax import minimax
+from transposition import TranspositionTable
+from math import inf
+
+ORDERINGS = {None: None, 'center': CenterFirst, 'threats': ThreatsFirst, 'killer': KillerHistory}
+
+# Engines played by default, from the weakest to the strongest
+ENGINES = [
+    {'name': 'minimax-3', 'engine': 'minimax', 'ply': 3},
+    {'name': 'alphabeta-5', 'engine': 'alphabeta', 'ply': 5},
+    {'name': 'pvs-6', 'engine': 'pvs', 'ply': 6, 'table': True, 'ordering': 'killer'},
+    {'name': 'iterative-0.5s', 'engine': 'iterative', 'time': 0.5, 'ordering': 'killer', 'threats': True},
+    {'name': 'mcts-0.5s', 'engine': 'mcts', 'time': 0.5},
+]
+
+def make_engine(config):
+    """
+    Returns a function that chooses the moves of the engine described by config for one game. The function
+    receives the board and the player to act and returns the move, the number of nodes expanded (random games
+    for 'mcts') and the depth searched (None for 'mcts').
+
+    config is a dictionary with the name of the engine ('minimax', 'alphabeta', 'pvs', 'mtdf', 'iterative' or
+    'mcts') and its settings: 'ply' for the fixed-depth engines, 'time' in seconds for 'iterative' and 'mcts',
+    'iterations' for 'mcts', 'table' to give the search a transposition table, 'ordering' ('center', 'threats'
+    or 'killer') for its move ordering and 'threats' to decide forced positions from the immediate threats
+    ('alphabeta' and 'iterative'). Tables and orderings are created once per game.
+    """
+    engine = config['engine']
+    ply = config.get('ply')
+    table = TranspositionTable() if config.get('table') else None
+    ordering = ORDERINGS[config.get('ordering')]
+    ordering = ordering() if ordering else None
+    threats = config.get('threats', False)
+
+    if engine == 'minimax':
+        def move(board, player):
+            _, best, nodes = minimax(board, player, ply)
+            return best, nodes, ply
+    elif engine == 'alphabeta':
+        def move(board, player):
+            _, best, nodes = alpha_beta(board, player, -inf, inf, ply, table, ordering, threats=threats)
+            return best, nodes, ply
+    elif engine == 'pvs':
+        def move(board, player):
+            _, best, nodes = pvs(board, player, ply, table, ordering)
+            return best, nodes, ply
+    elif engine == 'mtdf':
+        def move(board, player):
+            _, best, nodes = mtdf(board, player, ply, 0, table, ordering)
+            return best, nodes, ply
+    elif engine == 'iterative':
+        def move(board, player):
+            _, best, nodes = iterative_deepening(board, player, config['time'], ply, table, ordering, threats=threats)
+            return best, sum(nodes), len(nodes)
+    elif engine == 'mcts':
+        search = MCTS(iterations=config.get('iterations'), time_limit=config.get('time'), seed=config.get('seed'))
+        def move(board, player):
+            _, best, games = search.search(board, player)
+            return best, games, None
+    else:
+        raise ValueError("unknown engine: " + str(engine))
+    return move
+
+def play_game(x_config, o_config, opening='', width=7, height=6):
+    """
+    Plays one game between the engines x_config ('X') and o_config ('O') from the position reached by the
+    opening moves, and returns a dictionary with the moves of the game, the result (1 if 'X' won, -1 if 'O' won
+    and 0 for a draw) and, for each player, the number of moves, nodes and seconds spent and the sum of the
+    branching factors of its searches.
+    """
+    board = Board(width, height)
+    player = board.create_board(opening)
+    engines = {'X': make_engine(x_config), 'O': make_engine(o_config)}
+    stats = {ox: {'moves': 0, 'nodes': 0, 'time': 0.0, 'branching': 0.0, 'searches': 0} for ox in 'XO'}
+    moves = opening
+
+    while not board.is_terminal():
+        start = time.perf_counter()
+        move, nodes, depth = engines[player](board, player)
+        elapsed = time.perf_counter() - start
+        record = stats[player]
+        record['moves'] += 1
+        record['nodes'] += nodes
+        record['time'] += elapsed
+        if depth and nodes > 1:
+            # Effective branching factor: the number of nodes of a uniform tree of the same depth
+            record['branching'] += nodes**(1/depth)
+            record['searches'] += 1
+        board.perform_move(move, player)
+        moves += str(move)
+        player = opponent(player)
+
+    return {'moves': moves, 'result': board.game_value(), 'stats': stats}
+
+def _play(args):
+    """Plays one game of the tournament in a worker process."""
+    return play_game(*args)
+
+def elo(games, names, iterations=1000):
+    """
+    Estimates the Elo ratings of the engines from the results of the games, a list of (first name, second name,
+    score of the first) with scores 1, 0.5 or 0. The ratings maximize the likelihood of the results under the
+    Elo model, where the expected score of a against b is 1/(1+10^((Rb-Ra)/400)). Each engine also draws one
+    virtual game against an engine rated 0, so engines that win or lose every game get finite ratings. The
+    ratings are shifted so their mean is 0.
+    """
+    ratings = {name: 0.0 for name in names}
+    for _ in range(iterations):
+        actual = {name: 0.5 for name in names}
+        expected = {name: 1/(1+10**(-ratings[name]/400)) for name in names}
+        count = {name: 1 for name in names}
+        for a, b, score in games:
+            e = 1/(1+10**((ratings[b]-ratings[a])/400))
+            actual[a] += score
+            actual[b] += 1-score
+            expected[a] += e
+            expected[b] += 1-e
+            count[a] += 1
+            count[b] += 1
+        change = 0
+        for name in names:
+            # A step of the gradient ascent of the likelihood, scaled by the number of games
+            step = 800*(actual[name]-expected[name])/count[name]
+            ratings[name] += step
+            change = max(change, abs(step))
+        if change < 0.01:
+            break
+    mean = sum(ratings.values())/len(ratings)
+    return {name: round(rating - mean, 1) for name, rating in ratings.items()}
+
+def tournament(engines=ENGINES, openings=2, opening_moves=2, processes=None, seed=0, width=7, height=6):
+    """
+    Plays a round robin between the engines (configurations as in make_engine, each with a unique 'name'). Every
+    pair of engines plays openings random openings of opening_moves moves twice, once with each engine as 'X',
+    and the games are played in parallel by a pool of processes.
+
+    Returns a dictionary, ready to be written as JSON, with the settings of the tournament, the games played and,
+    for each engine, its record (wins, draws, losses and score), its Elo rating, the nodes expanded per second,
+    the seconds spent per move and the mean effective branching factor of its searches (None for 'mcts').
+    """
+    rng = random.Random(seed)
+    starts = []
+    for _ in range(openings):
+        board = Board(width, height)
+        player = 'X'
+        moves = ''
+        for _ in range(opening_moves):
+            col = rng.choice(board.available_moves())
+            board.perform_move(col, player)
+            player = opponent(player)
+            moves += str(col)
+        starts.append(moves)
+
+    tasks = []
+    for first, second in combinations(engines, 2):
+        for opening in starts:
+            tasks.append((first, second, opening, width, height))
+            tasks.append((second, first, opening, width, height))
+    with ProcessPoolExecutor(processes) as executor:
+        played = list(executor.map(_play, tasks))
+
+    records = {config['name']: {'config': config, 'wins': 0, 'draws': 0, 'losses': 0, 'moves': 0, 'nodes': 0,
+                                'time': 0.0, 'branching': 0.0, 'searches': 0} for config in engines}
+    games = []
+    results = []
+    for (x_config, o_config, opening, _, _), game in zip(tasks, played):
+        x, o = x_config['name'], o_config['name']
+        result = game['result']
+        games.append({'x': x, 'o': o, 'opening': opening, 'moves': game['moves'], 'result': result})
+        results.append((x, o, (result+1)/2))
+        for name, ox, won in ((x, 'X', result == 1), (o, 'O', result == -1)):
+            record = records[name]
+            if result == 0:
+                record['draws'] += 1
+            elif won:
+                record['wins'] += 1
+            else:
+                record['losses'] += 1
+            for field in ('moves', 'nodes', 'time', 'branching', 'searches'):
+                record[field] += game['stats'][ox][field]
+
+    ratings = elo(results, list(records))
+    summary = {}
+    for name, record in records.items():
+        played_games = record['wins'] + record['draws'] + record['losses']
+        summary[name] = {
+            'config': record['config'],
+            'games': played_games,
+            'wins': record['wins'],
+            'draws': record['draws'],
+            'losses': record['losses'],
+            'score': round((record['wins'] + record['draws']/2)/played_games, 3) if played_games else None,
+            'elo': ratings[name],
+            'nodes_per_second': round(record['nodes']/record['time']) if record['time'] else None,
+            'time_per_move': round(record['time']/record['moves'], 4) if record['moves'] else None,
+            'branching_factor': round(record['branching']/record['searches'], 2) if record['searches'] else None,
+        }
+    return {'settings': {'openings': openings, 'opening_moves': opening_moves, 'seed': seed,
+                         'width': width, 'height': height},
+            'engines': summary, 'games': games}
+
+def compare(old, new, tolerance=0.1):
+    """
+    Compares two tournament reports (dictionaries returned by tournament) and returns the list of regressions:
+    engines whose nodes per second dropped, or whose time per move grew, by more than the fraction tolerance,
+    and engines whose Elo rating dropped by more than 400*tolerance.
+    """
+    regressions = []
+    for name, after in new['engines'].items():
+        before = old['engines'].get(name)
+        if before is None:
+            continue
+        if before['nodes_per_second'] and after['nodes_per_second'] is not None and \
+           after['nodes_per_second'] < (1-tolerance)*before['nodes_per_second']:
+            regressions.append((name, 'nodes_per_second', before['nodes_per_second'], after['nodes_per_second']))
+        if before['time_per_move'] and after['time_per_move'] is not None and \
+           after['time_per_move'] > (1+tolerance)*before['time_per_move']:
+            regressions.append((name, 'time_per_move', before['time_per_move'], after['time_per_move']))
+        if after['elo'] < before['elo'] - 400*tolerance:
+            regressions.append((name, 'elo', before['elo'], after['elo']))
+    return regressions
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3 and sys.argv[1] == '--compare':
+        # Usage: python tournament.py --compare <old report> <new report>
+        with open(sys.argv[2]) as file:
+            old = json.load(file)
+        with open(sys.argv[3]) as file:
+            new = json.load(file)
+        regressions = compare(old, new)
+        for name, field, before, after in regressions:
+            print(name, field, before, '->', after)
+        sys.exit(1 if regressions else 0)
+
+    # Usage: python tournament.py [report file] [openings] [processes]
+    filename = sys.argv[1] if len(sys.argv) > 1 else 'tournament.json'
+    openings = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    report = tournament(openings=openings, processes=processes)
+    with open(filename, 'w') as file:
+        json.dump(report, file, indent=2, sort_keys=True)
+    for name, summary in report['engines'].items():
+        print(name, 'elo', summary['elo'], 'score', summary['score'], 'nodes/s', summary['nodes_per_second'],
+              'time/move', summary['time_per_move'], 'branching', summary['branching_factor'])
@@ -0,0 +1,72 @@
+EXACT = 0   # The stored value is the exact value of the position
+LOWER = 1   # The search failed high; the value of the position is at least the stored value
+UPPER = 2   # The search failed low; the value of the position is at most the stored value
+
+class TranspositionTable:
+    """
+    Fixed-size transposition table for the Connect 4 searches.
+
+    Entries are stored in parallel lists with one slot per index, so the memory used by the table doesn't grow
+    during search. A key is mapped to the slot key % size; the full key is stored in the slot to detect
+    collisions. Each entry holds the search depth, the value, the bound type (EXACT, LOWER or UPPER) and
+    the best move found.
+
+    Two replacement policies are supported when a slot is already taken: 'depth' keeps the entry searched
+    to the larger depth, and 'always' overwrites the slot.
+    """
+    def __init__(self, size=1 << 18, policy='depth'):
+        if policy not in ('depth', 'always'):
+            raise ValueError("policy must be 'depth' or 'always'")
+        self.size = size
+        self.policy = policy
+        self.clear()
+
+    def clear(self):
+        """Removes all entries and resets the statistics."""
+        self._keys = [None]*self.size
+        self._depths = [0]*self.size
+        self._values = [0]*self.size
+        self._flags = [EXACT]*self.size
+        self._moves = [None]*self.size
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def probe(self, key):
+        """
+        Returns the entry stored for key as a tuple (depth, value, flag, move), or None if the key isn't
+        in the table.
+        """
+        self.probes += 1
+        index = key % self.size
+        if self._keys[index] != key:
+            return None
+        self.hits += 1
+        return self._depths[index], self._values[index], self._flags[index], self._moves[index]
+
+    def store(self, key, depth, value, flag, move):
+        """Stores an entry for key, following the replacement policy of the table."""
+        index = key % self.size
+        stored = self._keys[index]
+        if stored is not None and stored != key:
+            if self.policy == 'depth' and self._depths[index] > depth:
+                return
+            self.overwrites += 1
+        self._keys[index] = key
+        self._depths[index] = depth
+        self._values[index] = value
+        self._flags[index] = flag
+        self._moves[index] = move
+        self.stores += 1
+
+    def hit_rate(self):
+        """Returns the fraction of probes that found an entry."""
+        if self.probes == 0:
+            return 0.0
+        return self.hits/self.probes
+
+    def stats(self):
+        """Returns the statistics of the table as a dictionary."""
+        return {'size': self.size, 'policy': self.policy, 'probes': self.probes, 'hits': self.hits,
+                'hit_rate': self.hit_rate(), 'stores': self.stores, 'overwrites': self.overwrites}
@@ -1,6 +1,73 @@
 import matplotlib.pyplot as plt
 import numpy as np
+import sys
 import time
+from array import array
+from itertools import combinations
+from math import isqrt
+
+# POPCOUNT[domain] is the number of values in a domain; indexing the table is faster than calling popcount
+POPCOUNT = [domain.bit_count() for domain in range(1 << 9)]
+
+def popcount(domain):
+    """
+    Returns the number of values in a domain. Domains are 9-bit masks: bit d-1 is set if value d is in the domain.
+    """
+    return POPCOUNT[domain]
+
+def lowest_bit(domain):
+    """
+    Returns the mask of the smallest value in the domain.
+    """
+    return domain & -domain
+
+def values(domain):
+    """
+    Returns the masks of the values in the domain, from the smallest value to the largest.
+    """
+    masks = []
+    while domain:
+        bit = lowest_bit(domain)
+        masks.append(bit)
+        domain ^= bit
+    return masks
+
+def digit(bit):
+    """
+    Returns the value (1 to 9) of a domain with a single value.
+    """
+    return bit.bit_length()
+
+def domain_string(domain):
+    """
+    Returns the values in the domain as a string, such as "1357".
+    """
+    return ''.join(str(digit(bit)) for bit in values(domain))
+
+# Tables of unit_tables for each grid width
+_UNIT_TABLES = {}
+
+def unit_tables(width):
+    """
+    Returns the tables of the cells related by the constraints of a grid of the given width, as flat indices
+    (row * width + column). They are built on the first call for each width and shared by all grids:
+
+    units: the cells of each row, column, and box, in this order;
+    cell_units: the row, column, and box of each cell;
+    peers: the cells that share a unit with each cell (20 cells for a 9x9 grid).
+    """
+    if width not in _UNIT_TABLES:
+        box = isqrt(width)
+        rows = [tuple(i * width + j for j in range(width)) for i in range(width)]
+        columns = [tuple(i * width + j for i in range(width)) for j in range(width)]
+        boxes = [tuple((row_init + i) * width + column_init + j for i in range(box) for j in range(box))
+                 for row_init in range(0, width, box) for column_init in range(0, width, box)]
+        cell_units = [(rows[index // width], columns[index % width],
+                       boxes[(index // width) // box * box + (index % width) // box]) for index in range(width * width)]
+        peers = [tuple(sorted(set(row + column + unit) - {index}))
+                 for index, (row, column, unit) in enumerate(cell_units)]
+        _UNIT_TABLES[width] = rows + columns + boxes, cell_units, peers
+    return _UNIT_TABLES[width]
 
 class PlotResults:
     """
@@ -39,31 +106,100 @@ class Grid:
     """
     Class to represent an assignment of values to the 81 variables defining a Sudoku puzzle. 
 
-    Variable _cells stores a matrix with 81 entries, one for each variable in the puzzle. 
-    Each entry of the matrix stores the domain of a variable. Initially, the domains of variables
-    that need to have their values assigned are 123456789; the other domains are limited to the value
-    initially assigned on the grid. Backtracking search and AC3 reduce the the domain of the variables 
-    as they proceed with search and inference.
+    Variable _cells stores a flat array with 81 entries, one for each variable in the puzzle; the variable
+    in row i and column j is at index i * 9 + j. Each entry of the array stores the domain of a variable as
+    a 9-bit mask, where bit d-1 is set if value d is in the domain (see popcount, lowest_bit and values).
+    Initially, the domains of variables that need to have their values assigned are 123456789 (mask 511);
+    the other domains are limited to the value initially assigned on the grid. Backtracking search and AC3
+    reduce the the domain of the variables as they proceed with search and inference.
+
+    Variable _assigned counts the variables whose domain has size 1. Code that changes _cells directly keeps
+    it up to date with set_assigned.
     """
     def __init__(self):
-        self._cells = []
-        self._complete_domain = "123456789"
         self._width = 9
+        self._complete_domain = (1 << self._width) - 1
+        self._cells = array('H', [self._complete_domain]) * (self._width * self._width)
+        self._assigned = 0
+        self._units, self._cell_units, self._peers = unit_tables(self._width)
 
     def copy(self):
         """
         Returns a copy of the grid. 
         """
         copy_grid = Grid()
-        copy_grid._cells = [row.copy() for row in self._cells]
+        copy_grid._cells = self._cells[:]
+        copy_grid._assigned = self._assigned
         return copy_grid
 
     def get_cells(self):
         """
-        Returns the matrix with the domains of all variables in the puzzle.
+        Returns the flat array with the domains of all variables in the puzzle.
         """
         return self._cells
 
+    def get_units(self):
+        """
+        Returns the cells of each row, column, and box of the grid (see unit_tables).
+        """
+        return self._units
+
+    def get_cell_units(self):
+        """
+        Returns the row, column, and box of each cell (see unit_tables).
+        """
+        return self._cell_units
+
+    def get_peers(self):
+        """
+        Returns the cells that share a unit with each cell (see unit_tables).
+        """
+        return self._peers
+
+    def get_domain(self, row, column):
+        """
+        Returns the domain of the variable in (row, column).
+        """
+        return self._cells[row * self._width + column]
+
+    def set_domain(self, row, column, domain):
+        """
+        Sets the domain of the variable in (row, column).
+        """
+        index = row * self._width + column
+        self._assigned += (POPCOUNT[domain] == 1) - (POPCOUNT[self._cells[index]] == 1)
+        self._cells[index] = domain
+
+    def get_assigned(self):
+        """
+        Returns the number of variables whose domain has size 1.
+        """
+        return self._assigned
+
+    def set_assigned(self, assigned):
+        """
+        Sets the number of variables whose domain has size 1.
+        """
+        self._assigned = assigned
+
+    def is_complete(self):
+        """
+        Returns True if every variable has a domain of size 1.
+        """
+        return self._assigned == len(self._cells)
+
+    def restore(self, trail, mark, assigned):
+        """
+        Undoes the changes recorded on trail after its first mark entries, and sets the number of assigned
+        variables back to assigned. The trail is an array of pairs (index of a cell, domain before the change),
+        appended by the code that changes the domains and popped here from the last change to the first.
+        """
+        cells = self._cells
+        while len(trail) > mark:
+            domain = trail.pop()
+            cells[trail.pop()] = domain
+        self._assigned = assigned
+
     def get_width(self):
         """
         Returns the width of the grid.
@@ -94,19 +230,12 @@ class Grid:
         | 1 . 4 | . . . | . . . | 
         - - - - - - - - - - - - - 
         """
-        i = 0
-        row = []
-        for p in string_puzzle:
+        for i, p in enumerate(string_puzzle[:self._width * self._width]):
             if p == '.':
-                row.append(self._complete_domain)
+                self._cells[i] = self._complete_domain
             else:
-                row.append(p)
-
-            i += 1
-
-            if i % self._width == 0:
-                self._cells.append(row)
-                row = []
+                self._cells[i] = 1 << (int(p) - 1)
+        self._assigned = sum(POPCOUNT[domain] == 1 for domain in self._cells)
             
     def print(self):
         """
@@ -135,9 +264,10 @@ class Grid:
             print('|', end=" ")
 
             for j in range(self._width):
-                if len(self._cells[i][j]) == 1:
-                    print(self._cells[i][j], end=" ")
-                elif len(self._cells[i][j]) > 1:
+                size = popcount(self.get_domain(i, j))
+                if size == 1:
+                    print(digit(self.get_domain(i, j)), end=" ")
+                elif size > 1:
                     print('.', end=" ")
                 else:
                     print(';', end=" ")
@@ -156,39 +286,27 @@ class Grid:
         """
         Print the domain of each variable for a given grid of the puzzle.
         """
-        for row in self._cells:
-            print(row)
+        for i in range(self._width):
+            print([domain_string(self.get_domain(i, j)) for j in range(self._width)])
 
     def is_solved(self):
         """
         Returns True if the puzzle is solved and False otherwise. 
         """
-        for i in range(self._width):
-            for j in range(self._width):
-                if len(self._cells[i][j]) > 1 or not self.is_value_consistent(self._cells[i][j], i, j):
-                    return False
+        for index, domain in enumerate(self._cells):
+            if POPCOUNT[domain] != 1 or not self.is_value_consistent(domain, index // self._width, index % self._width):
+                return False
         return True
     
     def is_value_consistent(self, value, row, column):
-        for i in range(self.get_width()):
-            if i == column: continue
-            if self.get_cells()[row][i] == value:
-                return False
-        
-        for i in range(self.get_width()):
-            if i == row: continue
-            if self.get_cells()[i][column] == value:
+        """
+        Returns True if no other variable in the row, column, or unit of (row, column) is assigned value, given
+        as the mask of a single value; returns False otherwise.
+        """
+        cells = self._cells
+        for peer in self._peers[row * self._width + column]:
+            if cells[peer] == value:
                 return False
-
-        row_init = (row // 3) * 3
-        column_init = (column // 3) * 3
-
-        for i in range(row_init, row_init + 3):
-            for j in range(column_init, column_init + 3):
-                if i == row and j == column:
-                    continue
-                if self.get_cells()[i][j] == value:
-                    return False
         return True
 
 class VarSelector:
@@ -205,100 +323,268 @@ class FirstAvailable(VarSelector):
     Naïve method for selecting variables; simply returns the first variable encountered whose domain is larger than one.
     """
     def select_variable(self, grid):
-        cells = grid.get_cells()                # Gets the matrix with the domains of all variables
-        for i in range(grid.get_width()):       # Iterates over the variables in the grid
-            for j in range(grid.get_width()):
-                if len(cells[i][j]) > 1:
-                    return (i,j)                # Return the index of the first variable with domain size > 1        
+        cells = grid.get_cells()                # Gets the array with the domains of all variables
+        for index, domain in enumerate(cells):  # Iterates over the variables in the grid
+            if POPCOUNT[domain] > 1:
+                return divmod(index, grid.get_width())  # Return the row and column of the first variable with domain size > 1
 
 class MRV(VarSelector):
     """
     Implements the MRV heuristic, which returns one of the variables with smallest domain. 
     """
     def select_variable(self, grid):
-        cells = grid.get_cells()                        # Gets the matrix with the domains of all variables
+        cells = grid.get_cells()                        # Gets the array with the domains of all variables
         default = grid.get_width() + 1                  # Initializing minimum domain size as the maximum width
         tuple_val = None
-        for i in range(grid.get_width()):               # Iterates over the variables in the grid
-            for j in range(grid.get_width()):
-                domain = len(cells[i][j])
-                if domain > 1 and domain < default:     # Checking if the domain size is smaller than the current minimum
-                    default = domain
-                    tuple_val = (i,j)                   # Update the selected variable
+        for index, domain in enumerate(cells):          # Iterates over the variables in the grid
+            size = POPCOUNT[domain]
+            if size > 1 and size < default:             # Checking if the domain size is smaller than the current minimum
+                default = size
+                tuple_val = divmod(index, grid.get_width())     # Update the selected variable
         
         return tuple_val                                # Return the selected variable with the smallest domain size
 
-class AC3:
+class PropagationRule:
     """
-    This class implements the methods needed to run AC3 on Sudoku. 
+    Interface for the rules that AC3 runs after its propagation, until none of them changes a domain.
+
+    Extend this class when implementing a new rule. apply makes one pass of the rule over the grid, changing
+    domains only through AC3.restrict, and returns two values: whether a domain changed, and whether the rule
+    detected that the problem can't be solved (in which case the pass may stop at once). Variable removals
+    counts the values the rule removed from domains.
     """
-    def remove_domain_row(self, grid, row, column):
-        """
-        Given a matrix (grid) and a cell on the grid (row and column) whose domain is of size 1 (i.e., the variable has its
-        value assigned), this method removes the value of (row, column) from all variables in the same row. 
-        """
-        variables_assigned = []
- 
-        for j in range(grid.get_width()):
-            if j != column:
-                new_domain = grid.get_cells()[row][j].replace(grid.get_cells()[row][column], '')
+    name = None
 
-                if len(new_domain) == 0:
-                    return None, True
+    def __init__(self):
+        self.removals = 0
 
-                if len(new_domain) == 1 and len(grid.get_cells()[row][j]) > 1:
-                    variables_assigned.append((row, j))
+    def apply(self, grid, ac3, trail):
+        pass
 
-                grid.get_cells()[row][j] = new_domain
-        
-        return variables_assigned, False
+class HiddenSingles(PropagationRule):
+    """
+    Assigns a value to a variable if the variable is the only one in a row, column, or box whose domain has
+    the value. Fails if a value is in no domain of a unit.
+    """
+    name = 'hidden singles'
+
+    def apply(self, grid, ac3, trail):
+        cells = grid.get_cells()
+        complete = (1 << grid.get_width()) - 1
+        changed = False
+        for unit in grid.get_units():
+            once = 0
+            twice = 0
+            for index in unit:
+                domain = cells[index]
+                twice |= once & domain
+                once |= domain
+            if once != complete:
+                return changed, True
+            singles = once & ~twice
+            if singles:
+                for index in unit:
+                    domain = cells[index]
+                    value = domain & singles
+                    if value and POPCOUNT[domain] > 1:
+                        if POPCOUNT[value] > 1:                 # Two values can only go in this variable
+                            return changed, True
+                        self.removals += POPCOUNT[domain] - 1
+                        ac3.restrict(grid, index, value, trail)
+                        changed = True
+        return changed, False
+
+class NakedSubsets(PropagationRule):
+    """
+    Finds size variables of a unit whose domains have size values in total (naked pairs for size 2, naked
+    triples for size 3): these values go in these variables, so they are removed from the other variables of
+    the unit. Fails if size variables of a unit have fewer than size values in total.
+    """
+    def __init__(self, size):
+        super().__init__()
+        self.size = size
+        self.name = 'naked ' + {2: 'pairs', 3: 'triples'}.get(size, str(size) + '-subsets')
+
+    def apply(self, grid, ac3, trail):
+        cells = grid.get_cells()
+        size = self.size
+        changed = False
+        for unit in grid.get_units():
+            candidates = [index for index in unit if 1 < POPCOUNT[cells[index]] <= size]
+            if len(candidates) < size:
+                continue
+            for subset in combinations(candidates, size):
+                union = 0
+                for index in subset:
+                    union |= cells[index]
+                count = POPCOUNT[union]
+                if count < size:
+                    return changed, True
+                if count > size:
+                    continue
+                for index in unit:
+                    domain = cells[index]
+                    if domain & union and index not in subset:
+                        new_domain = domain & ~union
+                        if new_domain == 0:
+                            return changed, True
+                        self.removals += POPCOUNT[domain] - POPCOUNT[new_domain]
+                        ac3.restrict(grid, index, new_domain, trail)
+                        changed = True
+        return changed, False
+
+class HiddenSubsets(PropagationRule):
+    """
+    Finds size values that are only in the domains of the same size variables of a unit (hidden pairs for size
+    2, hidden triples for size 3): these variables take these values, so their other values are removed. Fails
+    if the values are only in the domains of fewer than size variables.
+    """
+    def __init__(self, size):
+        super().__init__()
+        self.size = size
+        self.name = 'hidden ' + {2: 'pairs', 3: 'triples'}.get(size, str(size) + '-subsets')
+
+    def apply(self, grid, ac3, trail):
+        cells = grid.get_cells()
+        width = grid.get_width()
+        size = self.size
+        changed = False
+        for unit in grid.get_units():
+            # places[d] has bit i set if the domain of the i-th variable of the unit has value d + 1
+            places = [0] * width
+            for i, index in enumerate(unit):
+                domain = cells[index]
+                if POPCOUNT[domain] > 1:
+                    for d in range(width):
+                        if domain >> d & 1:
+                            places[d] |= 1 << i
+            candidates = [d for d in range(width) if 1 < POPCOUNT[places[d]] <= size]
+            if len(candidates) < size:
+                continue
+            for subset in combinations(candidates, size):
+                union = 0
+                subset_values = 0
+                for d in subset:
+                    union |= places[d]
+                    subset_values |= 1 << d
+                count = POPCOUNT[union]
+                if count < size:
+                    return changed, True
+                if count > size:
+                    continue
+                reduced = False
+                for i, index in enumerate(unit):
+                    if union >> i & 1:
+                        domain = cells[index]
+                        new_domain = domain & subset_values
+                        if new_domain != domain:
+                            self.removals += POPCOUNT[domain] - POPCOUNT[new_domain]
+                            ac3.restrict(grid, index, new_domain, trail)
+                            reduced = True
+                if reduced:
+                    # places no longer matches the domains; the unit is searched again in the next pass
+                    changed = True
+                    break
+        return changed, False
+
+class PointingClaiming(PropagationRule):
+    """
+    Pointing and claiming (box/line reduction). If the variables of a box that have a value in their domains
+    are all in one row or column, the value is removed from the rest of that row or column (pointing); if the
+    variables of a row or column that have a value are all in one box, the value is removed from the rest of
+    the box (claiming).
+    """
+    name = 'pointing/claiming'
 
-    def remove_domain_column(self, grid, row, column):
+    def __init__(self):
+        super().__init__()
+        self._intersections = {}
+
+    def intersections(self, grid):
         """
-        Given a matrix (grid) and a cell on the grid (row and column) whose domain is of size 1 (i.e., the variable has its
-        value assigned), this method removes the value of (row, column) from all variables in the same column. 
+        Returns, for each box and each row or column that cross, the cells only in the line, the cells in both
+        and the cells only in the box. The table is built once per grid width.
         """
-        variables_assigned = []
-
-        for j in range(grid.get_width()):
-            if j != row:
-                new_domain = grid.get_cells()[j][column].replace(grid.get_cells()[row][column], '')
-                
-                if len(new_domain) == 0:
-                    return None, True
+        width = grid.get_width()
+        if width not in self._intersections:
+            units = grid.get_units()
+            lines, boxes = units[:2 * width], units[2 * width:]
+            table = []
+            for box in boxes:
+                for line in lines:
+                    both = set(box) & set(line)
+                    if both:
+                        table.append((tuple(set(line) - both), tuple(both), tuple(set(box) - both)))
+            self._intersections[width] = table
+        return self._intersections[width]
+
+    def apply(self, grid, ac3, trail):
+        cells = grid.get_cells()
+        changed = False
+        for line_only, both, box_only in self.intersections(grid):
+            shared = 0
+            for index in both:
+                if POPCOUNT[cells[index]] > 1:
+                    shared |= cells[index]
+            if not shared:
+                continue
+            line_rest = 0
+            for index in line_only:
+                line_rest |= cells[index]
+            box_rest = 0
+            for index in box_only:
+                box_rest |= cells[index]
+            # Values of the intersection absent from the rest of one unit are removed from the rest of the other
+            for remove, others in ((shared & ~box_rest & line_rest, line_only), (shared & ~line_rest & box_rest, box_only)):
+                if remove:
+                    for index in others:
+                        domain = cells[index]
+                        if domain & remove:
+                            new_domain = domain & ~remove
+                            if new_domain == 0:
+                                return changed, True
+                            self.removals += POPCOUNT[domain] - POPCOUNT[new_domain]
+                            ac3.restrict(grid, index, new_domain, trail)
+                            changed = True
+        return changed, False
+
+def default_rules():
+    """
+    Returns new instances of all the propagation rules, from the cheapest to the most expensive.
+    """
+    return [HiddenSingles(), PointingClaiming(), NakedSubsets(2), HiddenSubsets(2), NakedSubsets(3), HiddenSubsets(3)]
 
-                if len(new_domain) == 1 and len(grid.get_cells()[j][column]) > 1:
-                    variables_assigned.append((j, column))
+class AC3:
+    """
+    This class implements the methods needed to run AC3 on Sudoku. 
 
-                grid.get_cells()[j][column] = new_domain
+    Variable _queued is the in-queue bitmap of consistency: entry i is 1 while cell i is in the queue, so no
+    cell is queued twice. It is kept between calls and all zero outside of them, as is the queue _stack.
 
-        return variables_assigned, False
+    rules is an optional list of PropagationRule objects (see default_rules). After AC3 reaches its fixpoint,
+    the rules are tried in order; when one changes a domain, AC3 runs again and the rules start over from
+    the first, until no rule changes anything.
+    """
+    def __init__(self, rules=None):
+        self._queued = bytearray()
+        self._stack = []
+        self.rules = rules or []
 
-    def remove_domain_unit(self, grid, row, column):
+    def restrict(self, grid, index, domain, trail):
         """
-        Given a matrix (grid) and a cell on the grid (row and column) whose domain is of size 1 (i.e., the variable has its
-        value assigned), this method removes the value of (row, column) from all variables in the same unit. 
+        Reduces the domain of the variable of the cell index to domain, which must not be empty, recording the
+        change on trail if it is given. A variable whose domain is reduced to size 1 is added to the queue of AC3.
         """
-        variables_assigned = []
-
-        row_init = (row // 3) * 3
-        column_init = (column // 3) * 3
-
-        for i in range(row_init, row_init + 3):
-            for j in range(column_init, column_init + 3):
-                if i == row and j == column:
-                    continue
-
-                new_domain = grid.get_cells()[i][j].replace(grid.get_cells()[row][column], '')
-
-                if len(new_domain) == 0:
-                    return None, True
-
-                if len(new_domain) == 1 and len(grid.get_cells()[i][j]) > 1:
-                    variables_assigned.append((i, j))
-
-                grid.get_cells()[i][j] = new_domain
-        return variables_assigned, False
+        cells = grid.get_cells()
+        if trail is not None:
+            trail.append(index)
+            trail.append(cells[index])
+        cells[index] = domain
+        if POPCOUNT[domain] == 1:
+            grid.set_assigned(grid.get_assigned() + 1)
+            if not self._queued[index]:
+                self._queued[index] = 1
+                self._stack.append(index)
 
     def pre_process_consistency(self, grid):
         """
@@ -310,14 +596,30 @@ class AC3:
         Q = []  # Initialize Q as an empty list
 
         cells = grid.get_cells()  
-        for i in range(grid.get_width()):       # Iterates over the variables in the grid
-            for j in range(grid.get_width()):
-                if len(cells[i][j]) == 1:       # If the domain of the cell has size 1
-                    Q.append((i, j))            # Add the cell to Q
+        for index, domain in enumerate(cells):  # Iterates over the variables in the grid
+            if POPCOUNT[domain] == 1:           # If the domain of the cell has size 1
+                Q.append(divmod(index, grid.get_width()))   # Add the cell to Q
         
         self.consistency(grid, Q)
 
-    def consistency(self, grid, Q):
+    def assign(self, grid, index, value, trail):
+        """
+        Assigns value (the mask of a single value) to the variable of the cell index and runs AC3 from it,
+        recording every domain change on trail (see Grid.restore). Returns True if AC3 detected that the problem
+        can't be solved with the new assignment; the changes are left on the grid and the trail to be undone.
+        """
+        cells = grid.get_cells()
+        if len(self._queued) != len(cells):
+            self._queued = bytearray(len(cells))
+        trail.append(index)
+        trail.append(cells[index])
+        cells[index] = value
+        grid.set_assigned(grid.get_assigned() + 1)
+        self._queued[index] = 1
+        self._stack.append(index)
+        return self._propagate(grid, trail)
+
+    def consistency(self, grid, Q, trail=None):
         """
         This is a domain-specific implementation of AC3 for Sudoku. 
 
@@ -332,32 +634,103 @@ class AC3:
         removing from the domain of all variables in the row, column, and unit the values of 
         the cells given as input. Like the general implementation of AC3, the method adds to 
         Q all variables that have their values assigned during the propagation of the contraints. 
+        The cells of Q are kept as flat indices and marked in the in-queue bitmap, so no cell is queued
+        twice, and each cell is processed with one loop over its precomputed peers.
+
+        If trail is given, each domain change is recorded on it, so that it can be undone with Grid.restore.
 
         The method returns True if AC3 detected that the problem can't be solved with the current
         partial assignment; the method returns False otherwise. 
         """
+        width = grid.get_width()
+        if len(self._queued) != width * width:
+            self._queued = bytearray(width * width)
+        queued = self._queued
+        stack = self._stack
+        for row, column in Q:
+            index = row * width + column
+            if not queued[index]:
+                queued[index] = 1
+                stack.append(index)
+        return self._propagate(grid, trail)
+
+    def _propagate(self, grid, trail):
+        """
+        Runs AC3 from the cells in the queue _stack and then the rules, to their fixpoint; see consistency.
+        Returns True on failure.
+        """
+        if self._revise(grid, trail):
+            return True
+        while self.rules:
+            for rule in self.rules:
+                changed, failure = rule.apply(grid, self, trail)
+                if failure:
+                    for other in self._stack:
+                        self._queued[other] = 0
+                    self._stack.clear()
+                    return True
+                if changed:
+                    break
+            else:
+                return False
+            if self._revise(grid, trail):
+                return True
+        return False
+
+    def _revise(self, grid, trail):
+        """
+        Runs AC3 from the cells in the queue _stack. Returns True on failure.
+        """
+        cells = grid.get_cells()
+        peers = grid.get_peers()
+        queued = self._queued
+        stack = self._stack
+        assigned = grid.get_assigned()
 
-        while Q:                                                   # While Q is not empty
-            var = Q.pop()                                          # Get a variable from Q
-            row1, col = var
+        while stack:                                               # While Q is not empty
+            index = stack.pop()                                    # Get a variable from Q
+            queued[index] = 0
+            value = cells[index]
 
             # Remove the value of the variable from all variables in the same row, column, and unit
-            row, result1 = self.remove_domain_row(grid, row1, col)
-            column, result2 = self.remove_domain_column(grid, row1, col)
-            unit, result3 = self.remove_domain_unit(grid, row1, col)
-
-            if result1 or result2 or result3:                       # if any removal returned failure:
-                # If any removal returned failure, return True for failure
-                return True
-            
-            Q = Q + row + column + unit                             # add to Q all variables that had their domains reduced to size 1
+            for peer in peers[index]:
+                domain = cells[peer]
+                if domain & value:
+                    if domain == value:                             # If any removal returned failure:
+                        for other in stack:
+                            queued[other] = 0
+                        stack.clear()
+                        grid.set_assigned(assigned)
+                        return True                                 # return True for failure
+                    if trail is not None:
+                        trail.append(peer)
+                        trail.append(domain)
+                    domain ^= value
+                    cells[peer] = domain
+                    if POPCOUNT[domain] == 1:                       # add to Q the variables that had their domains reduced to size 1
+                        assigned += 1
+                        if not queued[peer]:
+                            queued[peer] = 1
+                            stack.append(peer)
         
+        grid.set_assigned(assigned)
         return False                                                # If no failure, return False indicating success
 
 class Backtracking:
     """
     Class that implements backtracking search for solving CSPs. 
+
+    The search works in place on a single grid. Every domain change made by an assignment and by AC3 is
+    recorded on the trail _trail, an array of pairs (index of a cell, previous domain); when a value fails,
+    the grid is restored by popping the trail back to the mark taken before the value was tried. The grid
+    counts its assigned variables as they change, so the search never scans the grid to test for a solution.
+
+    rules is passed to AC3 (see AC3). Variable nodes counts the calls of the search, including the one at the root.
     """
+    def __init__(self, rules=None):
+        self._trail = array('H')
+        self._ac3 = AC3(rules)
+        self.nodes = 0
 
     def search(self, grid, var_selector):
         """
@@ -368,29 +741,75 @@ class Backtracking:
         3 var = select-unassigned-var(A)    
         4 for d in domain(var):             
         5 if d is consistent with A:        
-        6 copy_A = A.copy()                 
-        7 {var = d} in copy_A 
-        8 rb = Backtracking(copy_A)
-        9 if rb is not failure:
-        10 return rb
+        6 {var = d} in A, recording the changes on the trail
+        7 rb = Backtracking(A)
+        8 if rb is not failure:
+        9 return rb
+        10 undo the changes recorded since step 6
         11 return failure
-        """
-
-        if grid.is_solved():                                                # 2. if A is complete: return A
-            return grid, False
 
-        var = var_selector.select_variable(grid)                            # 3. var = select-unassigned-var(A)
-
-        selected = grid.get_cells()[var[0]][var[1]]                         # selected = domain(var)
-        for d in selected:                                                  # 4. for d in domain(var):
-            if grid.is_value_consistent(d, var[0], var[1]):                 # 5. if d is consistent with A:
-                copy_grid = grid.copy()                                     # 6. copy_A = A.copy()
-                copy_grid.get_cells()[var[0]][var[1]] = str(d)              # 7. {var = d} in copy_A
-                if not AC3().consistency(copy_grid, [(var[0], var[1])]):    # Check consistency with AC3
-                    rb, condition = self.search(copy_grid, var_selector)    # 8. rb = Backtracking(copy_A)
-                    if condition == False:                                  # 9. if rb is not failure:
-                        return rb, condition                                # 10. return rb
-        return None, True                                                   # 11. return failure
+        Step 5 needs no test: AC3 already removed the values of the assigned variables from the domains of
+        their peers. The grid is solved in place and returned, or left as it was if the search fails.
+        """
+        trail = self._trail
+        assigned = grid.get_assigned()
+        # AC3 for the variables already assigned, as pre_process_consistency, so that assigned values are consistent
+        if self._ac3.consistency(grid, [divmod(index, grid.get_width()) for index, domain in enumerate(grid.get_cells())
+                                        if POPCOUNT[domain] == 1], trail) or not self._search(grid, var_selector):
+            grid.restore(trail, 0, assigned)
+            return None, True
+        del trail[:]
+        return grid, False
+
+    def _search(self, grid, var_selector):
+        """
+        Returns True if assignments that solve the puzzle were found; returns False with the grid restored otherwise.
+        """
+        self.nodes += 1
+        if grid.is_complete():                                              # 2. if A is complete: return A
+            return True
+
+        row, column = var_selector.select_variable(grid)                    # 3. var = select-unassigned-var(A)
+        index = row * grid.get_width() + column
+        trail = self._trail
+        mark = len(trail)
+        assigned = grid.get_assigned()
+
+        domain = grid.get_cells()[index]                                    # domain(var)
+        while domain:                                                       # 4. for d in domain(var):
+            d = domain & -domain
+            domain ^= d
+            if not self._ac3.assign(grid, index, d, trail):                 # 6. {var = d} in A, with AC3
+                if self._search(grid, var_selector):                        # 7. rb = Backtracking(A)
+                    return True                                             # 9. return rb
+            grid.restore(trail, mark, assigned)                             # 10. undo the changes
+        return False                                                        # 11. return failure
+
+def rule_report(problems, var_selector=MRV):
+    """
+    Solves the puzzles with all the rules of default_rules, and again without each rule in turn. Returns, for
+    each rule, the number of values it removed from domains while solving with all the rules and the number
+    of search nodes it saves: the nodes expanded without the rule minus the nodes expanded with all of them.
+    """
+    def count_nodes(rules):
+        nodes = 0
+        for p in problems:
+            g = Grid()
+            g.read_file(p)
+            AC3(rules).pre_process_consistency(g)
+            backtracking = Backtracking(rules)
+            backtracking.search(g, var_selector())
+            nodes += backtracking.nodes
+        return nodes
+
+    rules = default_rules()
+    nodes = count_nodes(rules)
+    report = {}
+    for i, rule in enumerate(rules):
+        others = default_rules()
+        del others[i]
+        report[rule.name] = {'removals': rule.removals, 'nodes_saved': count_nodes(others) - nodes}
+    return report
 
 if __name__ == "__main__":
 
@@ -399,6 +818,12 @@ if __name__ == "__main__":
     problems = file.readlines()               # Read Sudoku problems from file
     file.close()
 
+    if len(sys.argv) > 1 and sys.argv[1] == '--rules':
+        # Usage: python main.py --rules     (values removed and search nodes saved by each propagation rule)
+        for name, counters in rule_report(problems).items():
+            print(name, 'removals', counters['removals'], 'nodes saved', counters['nodes_saved'])
+        sys.exit()
+
     # Initialize lists to store running times
     running_time_mrv = []
     running_time_first_available = []
@@ -0,0 +1,295 @@
+import contextlib
+import io
+import os
+import unittest
+from array import array
+from main import AC3, Backtracking, FirstAvailable, Grid, HiddenSingles, HiddenSubsets, MRV, NakedSubsets, \
+	PointingClaiming, default_rules, digit, domain_string, lowest_bit, popcount, rule_report, unit_tables, values
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+PUZZLE = '4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......'
+SOLUTION = '534678912672195348198342567859761423426853791713924856961537284287419635345286179'
+# PUZZLE with a 9 in its second cell, which AC3 alone doesn't refute: the search fails after 1557 nodes with MRV
+UNSOLVABLE = PUZZLE[0] + '9' + PUZZLE[2:]
+
+def read_problems(count=None):
+	"""Returns the first count puzzles of top95.txt (all of them if count is None)."""
+	with open(os.path.join(DIRECTORY, 'top95.txt')) as file:
+		problems = [line.strip() for line in file if line.strip()]
+	return problems[:count]
+
+def grid_string(grid):
+	"""Returns the grid as a puzzle string: the value of each variable with a domain of size 1, '.' otherwise."""
+	return ''.join(str(digit(domain)) if popcount(domain) == 1 else '.' for domain in grid.get_cells())
+
+class TestDomains(unittest.TestCase):
+
+	def test_popcount(self):
+		self.assertEqual(popcount(0), 0)
+		self.assertEqual(popcount(1 << 4), 1)
+		self.assertEqual(popcount(0x1FF), 9)
+		self.assertEqual([popcount(domain) for domain in range(1 << 9)], [bin(domain).count('1') for domain in range(1 << 9)])
+
+	def test_lowest_bit(self):
+		self.assertEqual(lowest_bit(0), 0)
+		self.assertEqual(lowest_bit(1 << 8), 1 << 8)
+		self.assertEqual(lowest_bit(0x1FF), 1)
+		self.assertEqual(lowest_bit(0b110100), 0b100)
+
+	def test_values(self):
+		self.assertEqual(values(0), [])
+		self.assertEqual(values(1 << 8), [1 << 8])
+		self.assertEqual(values(0x1FF), [1 << d for d in range(9)])
+		self.assertEqual([digit(bit) for bit in values(0x1FF)], list(range(1, 10)))
+
+	def test_domain_string(self):
+		self.assertEqual(domain_string(0), '')
+		self.assertEqual(domain_string(1 << 4), '5')
+		self.assertEqual(domain_string(0x1FF), '123456789')
+		self.assertEqual(domain_string(0b101010101), '13579')
+
+	def test_unit_tables(self):
+		units, cell_units, peers = unit_tables(9)
+		self.assertIs(unit_tables(9)[0], units)
+		self.assertEqual(len(units), 27)
+		for unit in units:
+			self.assertEqual(sorted(unit), sorted(set(unit)))
+			self.assertEqual(len(unit), 9)
+		# Row 4, column 5 and the middle box of the cell in row 4 and column 5
+		self.assertEqual(cell_units[41], (tuple(range(36, 45)), tuple(range(5, 81, 9)), (30, 31, 32, 39, 40, 41, 48, 49, 50)))
+		for index in range(81):
+			self.assertEqual(len(peers[index]), 20)
+			self.assertNotIn(index, peers[index])
+			self.assertEqual(set(peers[index]), set().union(*cell_units[index]) - {index})
+		# A 4x4 grid has boxes of 2x2 cells and 7 peers per cell
+		units, cell_units, peers = unit_tables(4)
+		self.assertEqual(cell_units[0][2], (0, 1, 4, 5))
+		self.assertEqual(peers[0], (1, 2, 3, 4, 5, 8, 12))
+
+class TestGrid(unittest.TestCase):
+
+	def test_read_file(self):
+		for puzzle in [PUZZLE] + read_problems():
+			g = Grid()
+			g.read_file(puzzle)
+			self.assertEqual(grid_string(g), puzzle)
+			self.assertEqual(g.get_assigned(), 81 - puzzle.count('.'))
+			for index, p in enumerate(puzzle):
+				self.assertEqual(g.get_domain(index // 9, index % 9), 0x1FF if p == '.' else 1 << (int(p) - 1))
+
+	def test_set_domain(self):
+		g = Grid()
+		g.read_file(PUZZLE)
+		assigned = g.get_assigned()
+		g.set_domain(0, 1, 1 << 5)
+		self.assertEqual(g.get_assigned(), assigned + 1)
+		g.set_domain(0, 0, 0b11)
+		g.set_domain(0, 1, 0)
+		self.assertEqual(g.get_assigned(), assigned - 1)
+		copy = g.copy()
+		g.set_domain(0, 2, 1)
+		self.assertEqual(copy.get_domain(0, 2), 0x1FF)
+
+	def test_print(self):
+		g = Grid()
+		g.read_file(PUZZLE)
+		g.set_domain(0, 1, 0)
+		output = io.StringIO()
+		with contextlib.redirect_stdout(output):
+			g.print()
+		lines = output.getvalue().split('\n')
+		self.assertEqual(lines[0], '- ' * 13)
+		self.assertEqual(lines[1], '| 4 ; . | . . . | 8 . 5 | ')
+		self.assertEqual(lines[4], '- ' * 13)
+		self.assertEqual(lines[11], '| 1 . 4 | . . . | . . . | ')
+		self.assertEqual(len(lines), 15)
+
+	def test_is_solved(self):
+		g = Grid()
+		g.read_file(SOLUTION)
+		self.assertTrue(g.is_solved())
+		self.assertTrue(g.is_complete())
+		g.read_file(PUZZLE)
+		self.assertFalse(g.is_solved())
+		# Swapping two values of a row keeps the row valid but breaks their columns
+		g.read_file(SOLUTION[1] + SOLUTION[0] + SOLUTION[2:])
+		self.assertTrue(g.is_complete())
+		self.assertFalse(g.is_solved())
+
+class TestBacktracking(unittest.TestCase):
+
+	def check_solution(self, puzzle, grid):
+		self.assertTrue(grid.is_solved())
+		for p, solved in zip(puzzle, grid_string(grid)):
+			if p != '.':
+				self.assertEqual(p, solved)
+
+	def test_restore(self):
+		g = Grid()
+		g.read_file(PUZZLE)
+		AC3().pre_process_consistency(g)
+		before = g.get_cells()[:]
+		assigned = g.get_assigned()
+		ac3 = AC3()
+		trail = array('H')
+		failures = 0
+		for index, domain in enumerate(before):
+			for value in values(domain) if popcount(domain) > 1 else []:
+				failed = ac3.assign(g, index, value, trail)
+				failures += failed
+				# Both branches that fail and branches that succeed leave changes on the trail, undone by restore
+				self.assertGreater(len(trail), 2)
+				g.restore(trail, 0, assigned)
+				self.assertEqual(len(trail), 0)
+				self.assertEqual(g.get_cells(), before)
+				self.assertEqual(g.get_assigned(), assigned)
+		self.assertGreater(failures, 0)
+
+	def test_top95(self):
+		# Every puzzle with the rules, and the first ones with AC3 alone and with each variable selector
+		for puzzle in read_problems():
+			g = Grid()
+			g.read_file(puzzle)
+			grid, failure = Backtracking(default_rules()).search(g, MRV())
+			self.assertFalse(failure)
+			self.assertIs(grid, g)
+			self.check_solution(puzzle, grid)
+		for puzzle in read_problems(3):
+			for var_selector in (MRV(), FirstAvailable()):
+				g = Grid()
+				g.read_file(puzzle)
+				grid, failure = Backtracking().search(g, var_selector)
+				self.assertFalse(failure)
+				self.check_solution(puzzle, grid)
+
+	def test_unsolvable(self):
+		for rules in (None, default_rules()):
+			g = Grid()
+			g.read_file(UNSOLVABLE)
+			before = g.get_cells()[:]
+			assigned = g.get_assigned()
+			backtracking = Backtracking(rules)
+			self.assertEqual(backtracking.search(g, MRV()), (None, True))
+			# The failed branches are all undone
+			self.assertEqual(g.get_cells(), before)
+			self.assertEqual(g.get_assigned(), assigned)
+			if rules is None:
+				self.assertEqual(backtracking.nodes, 1557)
+		# Two equal values in a row fail before any search
+		g = Grid()
+		g.read_file('44' + PUZZLE[2:])
+		backtracking = Backtracking()
+		self.assertEqual(backtracking.search(g, MRV()), (None, True))
+		self.assertEqual(backtracking.nodes, 0)
+		self.assertEqual(grid_string(g), '44' + PUZZLE[2:])
+
+class TestRules(unittest.TestCase):
+	FULL = 0x1FF
+
+	def grid(self, domains):
+		"""Returns a grid where every domain is full except those given in domains, a dictionary {index: domain}."""
+		g = Grid()
+		for index, domain in domains.items():
+			g.set_domain(index // 9, index % 9, domain)
+		return g
+
+	def apply(self, rule, grid, expected):
+		"""
+		Applies one pass of rule to grid and checks that the domains given in expected, a dictionary
+		{index: domain}, are the only ones that change. The changes are on the trail, so restore undoes them.
+		"""
+		before = grid.get_cells()[:]
+		assigned = grid.get_assigned()
+		ac3 = AC3()
+		ac3.consistency(grid, [])            # Sizes the in-queue bitmap of AC3
+		trail = array('H')
+		changed, failure = rule.apply(grid, ac3, trail)
+		self.assertEqual((changed, failure), (bool(expected), False))
+		for index, domain in enumerate(grid.get_cells()):
+			self.assertEqual(domain, expected.get(index, before[index]), 'cell %d' % index)
+		self.assertEqual(rule.removals, sum(popcount(before[index]) - popcount(domain) for index, domain in expected.items()))
+		grid.restore(trail, 0, assigned)
+		self.assertEqual(grid.get_cells(), before)
+
+	def test_hidden_singles(self):
+		# 5 is only in the fourth cell of the first row
+		five = 1 << 4
+		g = self.grid({index: self.FULL & ~five for index in range(9) if index != 3})
+		self.apply(HiddenSingles(), g, {3: five})
+		self.assertEqual(g.get_assigned(), 0)
+		# A row without 5 can't be solved
+		g = self.grid({index: self.FULL & ~five for index in range(9)})
+		self.assertEqual(HiddenSingles().apply(g, AC3(), None), (False, True))
+		# Nothing to do on full domains
+		self.apply(HiddenSingles(), Grid(), {})
+
+	def test_naked_pairs(self):
+		# The first two cells of the first row can only be 1 or 2, so no other cell of the row or of the first box can
+		g = self.grid({0: 0b11, 1: 0b11})
+		others = [2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 18, 19, 20]
+		self.apply(NakedSubsets(2), g, {index: self.FULL & ~0b11 for index in others})
+		# Three cells of a row with the same two values can't be solved
+		g = self.grid({0: 0b11, 1: 0b11, 5: 0b11})
+		self.assertTrue(NakedSubsets(2).apply(g, AC3(), None)[1])
+
+	def test_naked_triples(self):
+		# Three cells of a column share the values 1, 2 and 3 without any of them having all three
+		g = self.grid({0: 0b011, 9: 0b110, 72: 0b101})
+		others = [18, 27, 36, 45, 54, 63]
+		self.apply(NakedSubsets(3), g, {index: self.FULL & ~0b111 for index in others})
+
+	def test_hidden_pairs(self):
+		# 1 and 2 are only in the first two cells of the first row, which therefore can't take other values
+		g = self.grid({index: self.FULL & ~0b11 for index in range(2, 9)})
+		self.apply(HiddenSubsets(2), g, {0: 0b11, 1: 0b11})
+		# 1, 2 and 3 only in the first two cells can't be solved
+		g = self.grid({index: self.FULL & ~0b111 for index in range(2, 9)})
+		self.assertTrue(HiddenSubsets(3).apply(g, AC3(), None)[1])
+
+	def test_hidden_triples(self):
+		g = self.grid({index: self.FULL & ~0b111 for index in range(3, 9)})
+		self.apply(HiddenSubsets(3), g, {0: 0b111, 1: 0b111, 2: 0b111})
+
+	def test_pointing(self):
+		# In the first box, 1 is only in the first row, so it leaves the rest of the first row
+		g = self.grid({index: self.FULL & ~1 for index in (9, 10, 11, 18, 19, 20)})
+		self.apply(PointingClaiming(), g, {index: self.FULL & ~1 for index in range(3, 9)})
+
+	def test_claiming(self):
+		# In the first row, 1 is only in the first box, so it leaves the rest of the first box
+		g = self.grid({index: self.FULL & ~1 for index in range(3, 9)})
+		self.apply(PointingClaiming(), g, {index: self.FULL & ~1 for index in (9, 10, 11, 18, 19, 20)})
+
+	def test_fixpoint(self):
+		# The fourth puzzle of top95.txt takes 12347 nodes with AC3 alone
+		puzzle = read_problems(4)[3]
+		g = Grid()
+		g.read_file(puzzle)
+		ac3 = AC3(default_rules())
+		self.assertFalse(ac3.pre_process_consistency(g))
+		for rule in default_rules():
+			self.assertEqual(rule.apply(g, ac3, None), (False, False))
+		self.assertFalse(ac3.consistency(g, [divmod(index, 9) for index in range(81) if popcount(g.get_cells()[index]) == 1]))
+		nodes = []
+		for rules in (None, default_rules()):
+			g = Grid()
+			g.read_file(puzzle)
+			backtracking = Backtracking(rules)
+			grid, failure = backtracking.search(g, MRV())
+			self.assertTrue(grid.is_solved())
+			nodes.append(backtracking.nodes)
+		self.assertEqual(nodes[0], 12347)
+		self.assertLess(nodes[1], nodes[0] / 100)
+
+	def test_rule_report(self):
+		report = rule_report(read_problems(2))
+		self.assertEqual(list(report), [rule.name for rule in default_rules()])
+		self.assertEqual(list(report), ['hidden singles', 'pointing/claiming', 'naked pairs', 'hidden pairs',
+										'naked triples', 'hidden triples'])
+		self.assertGreater(report['hidden singles']['removals'], 0)
+		for counters in report.values():
+			self.assertGreaterEqual(counters['removals'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()